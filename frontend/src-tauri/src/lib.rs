@@ -1,8 +1,28 @@
 use serde::Deserialize;
 //use std::path::PathBuf;
-use std::sync::{Arc, Mutex};
+use std::sync::{Arc, Mutex, OnceLock};
 use tauri::{AppHandle, Emitter, Manager, State};
 use std::env; 
+use std::time::{Duration, SystemTime, UNIX_EPOCH};
+
+// 后端据此识别同一桌面客户端：重新提交会取消本实例的旧任务，关闭窗口时取消本实例的全部任务
+// 每个桌面实例启动时生成自己的 id，多个实例（或多个用户）之间互不取消任务
+static DESKTOP_CLIENT_ID: OnceLock<String> = OnceLock::new();
+
+fn desktop_client_id() -> &'static str {
+    DESKTOP_CLIENT_ID.get_or_init(|| {
+        use std::hash::{BuildHasher, Hasher};
+        // RandomState 每个进程随机取种子，再混入启动时间与进程号
+        let mut hasher = std::collections::hash_map::RandomState::new().build_hasher();
+        let nanos = SystemTime::now()
+            .duration_since(UNIX_EPOCH)
+            .map(|d| d.as_nanos())
+            .unwrap_or(0);
+        hasher.write_u128(nanos);
+        hasher.write_u32(std::process::id());
+        format!("desktop-{:016x}", hasher.finish())
+    })
+}
 // ============ 命令参数定义 ============
 
 #[derive(Deserialize)]
@@ -24,6 +44,7 @@ async fn call_service(
     let payload = serde_json::json!({
         "city": city,
         "date": dateOffset,
+        "client_id": desktop_client_id(),
     });
 
     println!("[Client] Sending to 8888: {}", payload);
@@ -47,6 +68,23 @@ async fn call_service(
     Ok(format!("Status: {}\nResponse: {}", status, body))
 }
 
+// 关闭窗口时通知后端取消本客户端的所有任务，释放 LLM 资源
+async fn cancel_backend_jobs() {
+    let payload = serde_json::json!({ "client_id": desktop_client_id() });
+
+    let result = reqwest::Client::new()
+        .post("http://localhost:8888/cancel")
+        .json(&payload)
+        .timeout(Duration::from_secs(2))
+        .send()
+        .await;
+
+    match result {
+        Ok(resp) => println!("[Client] Cancel jobs: {}", resp.status()),
+        Err(e) => println!("[Client] Cancel jobs failed: {}", e),
+    }
+}
+
 // ============ 启动内部 Log Server 的核心逻辑 ============
 
 fn start_log_server_impl(app: AppHandle, started_flag: Arc<Mutex<bool>>) {
@@ -168,6 +206,7 @@ pub fn run() {
         .plugin(tauri_plugin_opener::init())
         .manage(started_flag)
         .setup(|app| {
+            println!("[Client] client_id: {}", desktop_client_id());
             let app_handle = app.handle().clone();
             let state = app.state::<Arc<Mutex<bool>>>();
             let flag = (*state).clone();
@@ -178,6 +217,11 @@ pub fn run() {
 
             Ok(())
         })
+        .on_window_event(|_window, event| {
+            if let tauri::WindowEvent::CloseRequested { .. } = event {
+                tauri::async_runtime::block_on(cancel_backend_jobs());
+            }
+        })
         .invoke_handler(tauri::generate_handler![call_service, start_log_server,])
         .run(tauri::generate_context!())
         .expect("error while running tauri application");
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+agents/student_host.py
+在同一进程、同一事件循环中运行多个 Agent（launch.py --cohost）
+用法: python student_host.py gryffindor-student.yaml slytherin-student.yaml ...
+
+与每个 YAML 各自运行 `openagents agent start` 相比，OpenAgents 只导入一次，
+各 Agent 共用同一个事件循环与 LLM 客户端；每个 Agent 仍各自注册、各自连接网络。
+启用追踪（TRACE_EXPORTER）时，各学生处理委派任务的耗时作为 span 挂在协调器的 trace 之下。
+"""
+import argparse
+import asyncio
+import contextvars
+import logging
+import os
+import signal
+import sys
+from pathlib import Path
+
+from openagents.agents import orchestrator, runner
+from openagents.config import llm_configs
+from openagents.mods.coordination.task_delegation import TaskDelegationAdapter
+from openagents.utils.agent_loader import load_agent_from_yaml
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+from tools.fastpath import install_uvloop, log_fastpath
+from tools.tracing import init_tracer
+
+DEFAULT_NETWORK_HOST = "localhost"
+DEFAULT_NETWORK_PORT = 8700
+# 经由 LLM 网关时由 launch.py 设置：各 Agent 以自己的 agent_id 作为 key，网关按 key 公平排队
+LLM_KEY_PER_AGENT = os.environ.get("LLM_KEY_PER_AGENT") == "1"
+
+# 当前正在调用 LLM 的 Agent（orchestrate_agent / get_llm 期间有效）
+current_agent = contextvars.ContextVar("current_agent", default=None)
+
+
+# --- 共享 LLM 客户端 ---
+def share_model_providers(key_per_agent: bool = False):
+    """
+    OpenAgents 每次调用 LLM 都会新建 provider（及其中的 AsyncOpenAI 客户端与连接池）。
+    同一进程内按 (provider, 模型, 地址, key) 复用同一个实例，所有 Agent 共享连接池。
+    key_per_agent: 用调用方的 agent_id 代替 key，每个 Agent 各自复用一个 provider
+    """
+    create = llm_configs.create_model_provider
+    providers = {}
+
+    def shared_create_model_provider(provider, model_name, api_base=None, api_key=None, **kwargs):
+        if key_per_agent and current_agent.get():
+            api_key = current_agent.get()
+        key = (provider, model_name, api_base, api_key, tuple(sorted(kwargs.items())))
+        if key not in providers:
+            providers[key] = create(provider, model_name, api_base=api_base, api_key=api_key, **kwargs)
+            logging.info(f"🔌 LLM client created: {provider}/{model_name} ({len(providers)} shared)")
+        return providers[key]
+
+    # orchestrator / runner 在导入时已绑定函数名，需替换各自模块中的引用
+    orchestrator.create_model_provider = shared_create_model_provider
+    runner.create_model_provider = shared_create_model_provider
+    if key_per_agent:
+        track_calling_agent()
+
+
+def track_calling_agent():
+    """在 orchestrate_agent 与 AgentRunner.get_llm 期间记下调用方的 agent_id，供创建 provider 时使用"""
+    orchestrate_agent = runner.orchestrate_agent
+    get_llm = runner.AgentRunner.get_llm
+
+    async def orchestrate_agent_as(*args, agent_id=None, **kwargs):
+        token = current_agent.set(agent_id)
+        try:
+            return await orchestrate_agent(*args, agent_id=agent_id, **kwargs)
+        finally:
+            current_agent.reset(token)
+
+    def get_llm_as(self):
+        token = current_agent.set(self.agent_id)
+        try:
+            return get_llm(self)
+        finally:
+            current_agent.reset(token)
+
+    runner.orchestrate_agent = orchestrate_agent_as
+    runner.AgentRunner.get_llm = get_llm_as
+
+
+# --- 学生端追踪 ---
+# 任务结束时学生不再收到对应的通知，以这些事件收尾未结束的 span
+TASK_END_NOTIFICATIONS = {"task.notification.timeout": "timeout", "task.notification.canceled": "canceled"}
+
+
+def trace_student_tasks():
+    """
+    为 TaskDelegationAdapter 打补丁：收到 task.notification.assigned 时，以 payload 中协调器传来的
+    traceparent 为父开始 "student.task" span，complete_task / fail_task 或超时、撤销时结束。
+    """
+    tracer = init_tracer("student-host")
+    if not tracer.enabled:
+        return
+    open_spans = {}
+    process_incoming_event = TaskDelegationAdapter.process_incoming_event
+    complete_task = TaskDelegationAdapter.complete_task
+    fail_task = TaskDelegationAdapter.fail_task
+
+    def finish(task_id: str, error: str = None):
+        tracer.end_span(open_spans.pop(task_id, None), error)
+
+    async def traced_process_incoming_event(self, event):
+        payload = event.payload or {}
+        task_id = payload.get("task_id")
+        if event.event_name == "task.notification.assigned" and task_id and task_id not in open_spans:
+            task_payload = payload.get("payload") or {}
+            project_id = task_payload.get("project_id")
+            open_spans[task_id] = tracer.start_span(
+                "student.task", task_payload.get("traceparent"),
+                agent=self.agent_id, task_id=task_id, project_id=project_id,
+            )
+            logging.info(f"🧵 [{self.agent_id}] Task {task_id} for project {project_id}")
+        elif event.event_name in TASK_END_NOTIFICATIONS and task_id:
+            finish(task_id, TASK_END_NOTIFICATIONS[event.event_name])
+        return await process_incoming_event(self, event)
+
+    async def traced_complete_task(self, task_id: str, *args, **kwargs):
+        result = await complete_task(self, task_id, *args, **kwargs)
+        finish(task_id, None if result and result.get("success") else f"complete_task failed: {result}")
+        return result
+
+    async def traced_fail_task(self, task_id: str, *args, **kwargs):
+        try:
+            return await fail_task(self, task_id, *args, **kwargs)
+        finally:
+            finish(task_id, "failed by agent")
+
+    TaskDelegationAdapter.process_incoming_event = traced_process_incoming_event
+    TaskDelegationAdapter.complete_task = traced_complete_task
+    TaskDelegationAdapter.fail_task = traced_fail_task
+
+
+# --- 启动与停止 ---
+async def start_agent(yaml_path: Path):
+    """加载一个 YAML 并连接网络，返回 Agent 实例"""
+    agent, connection = load_agent_from_yaml(str(yaml_path))
+    connection = connection or {}
+    await agent.async_start(
+        network_host=connection.get("host", DEFAULT_NETWORK_HOST),
+        network_port=connection.get("port", DEFAULT_NETWORK_PORT),
+        network_id=connection.get("network_id"),
+        # 元数据需全部为字符串（gRPC 连接时整型会导致序列化失败）
+        metadata={"agent_type": type(agent).__name__, "config_file": str(yaml_path), "host_pid": str(os.getpid())},
+        password_hash=connection.get("password_hash"),
+    )
+    logging.info(f"✅ [{agent.agent_id}] Started from {yaml_path.name}")
+    return agent
+
+
+async def main(yaml_paths: list[Path]):
+    share_model_providers(LLM_KEY_PER_AGENT)
+    trace_student_tasks()
+
+    stop = asyncio.Event()
+    if sys.platform != "win32":
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+
+    # 各 Agent 独立连接网络，并发启动
+    results = await asyncio.gather(*(start_agent(path) for path in yaml_paths), return_exceptions=True)
+    agents = []
+    for path, result in zip(yaml_paths, results):
+        if isinstance(result, BaseException):
+            logging.error(f"❌ Failed to start {path.name}: {result}")
+        else:
+            agents.append(result)
+    if not agents:
+        sys.exit(1)
+
+    logging.info(f"🏰 Hosting {len(agents)} agents in one process: {', '.join(a.agent_id for a in agents)}")
+    try:
+        await stop.wait()
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        logging.info("🛑 Stopping hosted agents...")
+        await asyncio.gather(*(agent.async_stop() for agent in agents), return_exceptions=True)
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="在一个进程中运行多个 Agent")
+    parser.add_argument("configs", nargs="+", help="Agent YAML 配置文件（相对路径基于 agents/ 目录）")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    args = _parse_args()
+    paths = [Path(c) if Path(c).is_absolute() else Path(current_dir) / c for c in args.configs]
+    missing = [p for p in paths if not p.exists()]
+    if missing:
+        sys.exit(f"Agent 配置不存在: {', '.join(map(str, missing))}")
+
+    log_fastpath()
+    install_uvloop()
+    asyncio.run(main(paths))
@@ -1,8 +1,18 @@
 #!/usr/bin/env python3
 import asyncio
+import functools
+import json
 import logging
+import math
 import os
 import sys
+import time
+from collections import Counter, deque
+from types import SimpleNamespace
+
+# 启动计时起点（launch.py --profile-startup），需在导入 aiohttp / openagents 之前记录
+_IMPORTS_STARTED_AT = time.time()
+
 from aiohttp import web
 
 # OpenAgents 核心组件
@@ -15,10 +25,60 @@ project_root = os.path.dirname(current_dir)
 sys.path.insert(0, project_root)
 
 # --- 外部工具导入 ---
+from tools.debug import add_debug_routes
+from tools.fastpath import install_uvloop, json_dumps, json_loads, log_fastpath
+from tools.loop_monitor import LoopLagMonitor
+from tools.journal import WorkflowJournal
+from tools.http_frontend import reuse_port_supported, start_frontend_workers, start_queue_reader
+from tools.http_request import new_job_id, parse_cancel_request, parse_generate_request
 from tools.send_result import send_result_to_server
-from tools.weather import get_weather_report
+from tools.scheduler import PriorityScheduler
+from tools.startup_timeline import PROFILE_DIR_ENV, StartupTimeline
+from tools.stats import AdaptiveTimeouts
+from tools.tracing import (current_traceparent, init_tracer, install_log_context, record_error,
+                           set_project_id, span)
+from tools.weather import forecast_cache_stats, get_weather_report, weather_history_stats
+
+# --- 启动时间线 ---
+STARTUP_TIMELINE = StartupTimeline("weather-connector") if os.environ.get(PROFILE_DIR_ENV) else None
+if STARTUP_TIMELINE:
+    STARTUP_TIMELINE.mark("imports started", at=_IMPORTS_STARTED_AT)
+    STARTUP_TIMELINE.mark("imports done")
+
+
+def mark_startup(phase: str):
+    if STARTUP_TIMELINE:
+        STARTUP_TIMELINE.mark(phase)
+
+
+def finish_startup_profile():
+    """写出时间线，供 launch.py 合并到总报告"""
+    if STARTUP_TIMELINE:
+        path = STARTUP_TIMELINE.save(os.environ[PROFILE_DIR_ENV])
+        logging.info(f"{STARTUP_TIMELINE.report()}\n⏱️  Saved to {path}")
 
 # --- 全局配置 ---
+HTTP_PORT = 8888
+# 多进程前端：>0 时由多个 worker 通过 SO_REUSEPORT 共享 HTTP_PORT，协调器自身只监听本地 ADMIN_PORT
+FRONTEND_WORKERS = int(os.environ.get("FRONTEND_WORKERS", "0"))
+ADMIN_PORT = int(os.environ.get("ADMIN_PORT", "8889"))
+# 热重载时 Agent 会被逐个重启：工作流先处理其他学生，最多等待 AGENT_RESTART_WAIT 秒
+AGENT_RESTART_WAIT = float(os.environ.get("AGENT_RESTART_WAIT", "60"))
+# 事件循环延迟监控：调度延迟超过阈值（秒）时记录阻塞位置
+LOOP_LAG_THRESHOLD = float(os.environ.get("LOOP_LAG_THRESHOLD", "0.1"))
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", "0.05"))
+# 诊断接口 /debug/*：未设置 DEBUG_TOKEN 时不注册
+DEBUG_TOKEN = os.environ.get("DEBUG_TOKEN")
+# 工作流检查点日志：重启后据此恢复未完成的工作流；设为空字符串则关闭
+WORKFLOW_JOURNAL = os.environ.get("WORKFLOW_JOURNAL", os.path.join(project_root, "logs", "workflow_journal.jsonl"))
+JOURNAL_FSYNC = os.environ.get("JOURNAL_FSYNC", "1") != "0"
+# 每结束这么多个工作流压缩一次检查点日志（0 表示只在启动时压缩）
+JOURNAL_COMPACT_EVERY = int(os.environ.get("JOURNAL_COMPACT_EVERY", "200"))
+# 提交超过该秒数的未完成工作流在重启时直接丢弃，不再恢复
+JOURNAL_MAX_AGE = float(os.environ.get("JOURNAL_MAX_AGE", "3600"))
+# 重新接管时仍在执行中的任务状态（A2A TaskState）
+RUNNING_TASK_STATES = ("submitted", "working")
+
 # 定义固定顺序：Gryffindor -> Slytherin -> Ravenclaw -> Hufflepuff
 STUDENT_AGENTS = [
     "gryffindor-student",
@@ -27,6 +87,83 @@ STUDENT_AGENTS = [
     "hufflepuff-student"
 ]
 TASK_TIMEOUT_SECONDS = 120
+# 每次委派前的间隔（秒）
+DELEGATION_INTERVAL_SECONDS = float(os.environ.get("DELEGATION_INTERVAL_SECONDS", "1"))
+
+# 自适应超时：按各学生历史耗时的 p99 × 系数推导，样本不足时使用 TASK_TIMEOUT_SECONDS
+TASK_TIMEOUT_FACTOR = float(os.environ.get("TASK_TIMEOUT_FACTOR", "2.0"))
+TASK_TIMEOUT_FLOOR = float(os.environ.get("TASK_TIMEOUT_FLOOR", "20"))
+TASK_TIMEOUT_CEILING = float(os.environ.get("TASK_TIMEOUT_CEILING", "300"))
+# 样本不足时，连续超时每次将默认期限乘以该系数（不低于 TASK_TIMEOUT_FLOOR），卡死的学生会越来越快地失败；
+# 每第 TASK_TIMEOUT_PROBE_EVERY 次连续超时按完整默认期限探测一次。已有样本时超时不缩短期限
+TASK_TIMEOUT_BACKOFF = float(os.environ.get("TASK_TIMEOUT_BACKOFF", "0.5"))
+TASK_TIMEOUT_PROBE_EVERY = int(os.environ.get("TASK_TIMEOUT_PROBE_EVERY", "4"))
+
+# 优先级调度：交互式请求优先于批量/预热任务，每个学生同一时刻只处理 STUDENT_CONCURRENCY 个任务
+PRIORITY_WEIGHTS = {"interactive": 4, "batch": 1}
+DEFAULT_PRIORITY = "interactive"
+STUDENT_CONCURRENCY = int(os.environ.get("STUDENT_CONCURRENCY", "1"))
+PRIORITY_MAX_WAIT = float(os.environ.get("PRIORITY_MAX_WAIT", "60"))
+
+# 合并模式：一次任务由 combined-student 同时生成四个学院的建议
+COMBINED_AGENT = "combined-student"
+WORKFLOW_MODES = ("separate", "combined")
+DEFAULT_WORKFLOW_MODE = os.environ.get("WORKFLOW_MODE", "separate")
+
+# 预热（launch.py --warmup）：开放 HTTP 端口前向各学生发送一个小任务，并预取热门城市的天气
+WARMUP = os.environ.get("WARMUP", "0") == "1"
+WARMUP_AGENTS = [a for a in os.environ.get("WARMUP_AGENTS", ",".join(STUDENT_AGENTS)).split(",") if a]
+WARMUP_CITIES = [c.strip() for c in os.environ.get("WARMUP_CITIES", "").split(",") if c.strip()]
+WARMUP_TIMEOUT = float(os.environ.get("WARMUP_TIMEOUT", "180"))
+WARMUP_WEATHER_TEXT = (
+    "【Warm-up 天气报告】\n日期: 2000-01-01\n天气: 晴朗\n温度: 10°C ~ 20°C\n降水: 0mm\n风速: 5km/h"
+)
+
+# /generate 请求的可选值与默认值（协调器与前端 worker 共用同一套校验）
+REQUEST_OPTIONS = {
+    "modes": WORKFLOW_MODES,
+    "default_mode": DEFAULT_WORKFLOW_MODE,
+    "priorities": tuple(PRIORITY_WEIGHTS),
+    "default_priority": DEFAULT_PRIORITY,
+}
+
+json_response = functools.partial(web.json_response, dumps=json_dumps)
+
+
+def _house_text(value) -> str:
+    """单个学院的建议：字符串直接使用，结构化的值取其中的文本字段，都没有时序列化为 JSON"""
+    if isinstance(value, dict):
+        for key in ("value", "text", "advice", "content"):
+            if isinstance(value.get(key), str):
+                return value[key].strip()
+        return json.dumps(value, ensure_ascii=False)
+    return str(value).strip()
+
+
+def split_combined_result(result) -> dict:
+    """
+    解析 combined-student 的结果。
+    complete_task 传回的结构化结果（dict，或 {"value": ...} 包装）直接按学院拆分；
+    只有字符串结果才从中截取 JSON 对象解析。
+    返回 {student_id: 建议文本}，缺失或无法解析的学院不会出现在结果中。
+    """
+    if isinstance(result, dict) and "value" in result and not any(s in result for s in STUDENT_AGENTS):
+        result = result["value"]
+    if isinstance(result, str):
+        start, end = result.find("{"), result.rfind("}")
+        if start == -1 or end <= start:
+            return {}
+        try:
+            result = json.loads(result[start:end + 1], strict=False)
+        except json.JSONDecodeError:
+            return {}
+    if not isinstance(result, dict):
+        return {}
+    return {
+        student_id: _house_text(result[student_id])
+        for student_id in STUDENT_AGENTS
+        if result.get(student_id)
+    }
 
 
 # --- 主服务类 (继承 WorkerAgent) ---
@@ -40,168 +177,746 @@ class WeatherCoordinatorAgent(WorkerAgent):
         super().__init__(**kwargs)
         self.delegation_adapter = TaskDelegationAdapter()
         self.runner = None
+        self.timeouts = AdaptiveTimeouts(
+            default=TASK_TIMEOUT_SECONDS,
+            factor=TASK_TIMEOUT_FACTOR,
+            floor=TASK_TIMEOUT_FLOOR,
+            ceiling=TASK_TIMEOUT_CEILING,
+            backoff=TASK_TIMEOUT_BACKOFF,
+            probe_every=TASK_TIMEOUT_PROBE_EVERY,
+        )
+        self.scheduler = PriorityScheduler(
+            PRIORITY_WEIGHTS, capacity=STUDENT_CONCURRENCY, max_wait=PRIORITY_MAX_WAIT
+        )
+        self.loop_monitor = LoopLagMonitor(LOOP_LAG_THRESHOLD, LOOP_LAG_INTERVAL)
+        # 正在重启的 Agent -> 恢复可用时触发的事件
+        self.agent_ready: dict[str, asyncio.Event] = {}
+        # 已委派、尚未结束的任务 task_id -> agent_id
+        self.task_agents: dict[str, str] = {}
+        # 进行中的任务：job_id -> {"task": 工作流 asyncio.Task, "task_ids": 未完成的委派任务, "client_id": ...}
+        self.jobs: dict[str, dict] = {}
+        self.frontend_workers = []
+        self.journal = (WorkflowJournal(WORKFLOW_JOURNAL, fsync=JOURNAL_FSYNC, compact_every=JOURNAL_COMPACT_EVERY)
+                        if WORKFLOW_JOURNAL else None)
+        self.warmup_report = None
 
     async def on_startup(self):
+        mark_startup("network connected")
         self.delegation_adapter.bind_client(self.client)
         self.delegation_adapter.bind_connector(self.client.connector)
         self.delegation_adapter.bind_agent(self.agent_id)
 
         logging.info(f"✅ Agent '{self.agent_id}' started and adapters bound.")
         logging.info("🌐 Workflow: Receive HTTP Request -> Delegate to Students -> Send Results")
+        self.loop_monitor.start()
+        await self.resume_jobs()
+        if WARMUP:
+            self.warmup_report = await self.warm_up()
+            mark_startup("warm-up done")
 
         app = web.Application()
         app.router.add_post("/generate", self.handle_http_request)
+        app.router.add_post("/cancel", self.handle_cancel)
+        app.router.add_get("/stats", self.handle_stats)
+        app.router.add_get("/agents", self.handle_agents)
+        app.router.add_post("/agents/{agent_id}/{state:available|unavailable}", self.handle_agent_state)
+        if DEBUG_TOKEN:
+            add_debug_routes(app, DEBUG_TOKEN, self._debug_task_labels)
+            logging.info("🩺 Debug routes enabled: /debug/profile, /debug/tasks")
 
         self.runner = web.AppRunner(app)
         await self.runner.setup()
-        site = web.TCPSite(self.runner, '0.0.0.0', 8888)
+
+        if FRONTEND_WORKERS > 0 and reuse_port_supported():
+            listener, self.frontend_workers = start_frontend_workers(
+                FRONTEND_WORKERS, '0.0.0.0', HTTP_PORT, REQUEST_OPTIONS, f"http://127.0.0.1:{ADMIN_PORT}"
+            )
+            start_queue_reader(listener, asyncio.get_running_loop(), self._handle_frontend_request)
+            site = web.TCPSite(self.runner, '127.0.0.1', ADMIN_PORT)
+            await site.start()
+            mark_startup("frontend workers spawned, admin listening")
+            finish_startup_profile()
+            logging.info(f"🚀 {FRONTEND_WORKERS} frontend workers on http://0.0.0.0:{HTTP_PORT} (SO_REUSEPORT), "
+                         f"admin on http://127.0.0.1:{ADMIN_PORT}")
+            return
+
+        if FRONTEND_WORKERS > 0:
+            logging.warning("⚠️ SO_REUSEPORT is not supported on this platform, using a single HTTP server.")
+        site = web.TCPSite(self.runner, '0.0.0.0', HTTP_PORT)
         await site.start()
+        mark_startup("HTTP listening")
+        finish_startup_profile()
+
+        logging.info(f"🚀 HTTP Server started on http://0.0.0.0:{HTTP_PORT}")
 
-        logging.info("🚀 HTTP Server started on http://0.0.0.0:8888")
+    async def warm_up(self) -> dict:
+        """
+        预热：并发向 WARMUP_AGENTS 各委派一个合成任务并等待完成（LLM 加载模型、建立连接、处理提示词），
+        同时预取 WARMUP_CITIES 的天气（写入预报网格缓存）。失败只记录，不阻止启动。
+        预热耗时包含冷启动开销，不计入自适应超时样本。
+        """
+        logging.info(f"🔥 Warming up {len(WARMUP_AGENTS)} agents and {len(WARMUP_CITIES)} cities...")
+        started = time.monotonic()
 
-    async def _delegate_task(self, assignee_id: str, description: str, project_id: str):
-        """委派任务并返回 task_id"""
-        result = await self.delegation_adapter.delegate_task(
-            assignee_id=assignee_id,
-            description=description,
-            payload={"project_id": project_id}
+        async def warm_agent(agent_id: str):
+            t0 = time.monotonic()
+            if agent_id == COMBINED_AGENT:
+                description = f"Generate travel advice for all four houses based on this weather:\n{WARMUP_WEATHER_TEXT}"
+            else:
+                description = f"Generate travel advice based on this weather:\n{WARMUP_WEATHER_TEXT}"
+            task_id = await self._delegate_task(agent_id, description, None, WARMUP_TIMEOUT)
+            if not task_id:
+                return agent_id, {"status": "failed (delegation)", "seconds": round(time.monotonic() - t0, 3)}
+            try:
+                event = await self._wait_for_task(task_id, WARMUP_TIMEOUT)
+                status = "ok" if event else "failed (no event)"
+            except asyncio.TimeoutError:
+                status = "timeout"
+                await self._revoke_timed_out_task(task_id, agent_id)
+            finally:
+                self.task_agents.pop(task_id, None)
+            return agent_id, {"status": status, "seconds": round(time.monotonic() - t0, 3)}
+
+        async def warm_city(city: str):
+            t0 = time.monotonic()
+            text = await asyncio.to_thread(get_weather_report, city, "0")
+            status = "ok" if text.startswith("【") else text.splitlines()[0][:120]
+            return city, {"status": status, "seconds": round(time.monotonic() - t0, 3)}
+
+        agents, cities = await asyncio.gather(
+            asyncio.gather(*(warm_agent(a) for a in WARMUP_AGENTS)),
+            asyncio.gather(*(warm_city(c) for c in WARMUP_CITIES)),
         )
+        report = {"agents": dict(agents), "cities": dict(cities), "total_s": round(time.monotonic() - started, 3)}
 
-        if result and result.get("success") and "task_id" in result.get("data", {}):
-            task_id = result["data"]["task_id"]
+        for name, result in [*agents, *cities]:
+            icon = "✅" if result["status"] == "ok" else "⚠️"
+            logging.info(f"🔥 {icon} {name}: {result['status']} in {result['seconds']:.2f}s")
+        logging.info(f"🔥 Warm-up finished in {report['total_s']:.2f}s")
+        return report
+
+    async def _handle_frontend_request(self, kind: str, job_id, data: dict):
+        """处理前端 worker 经本地连接转交的 /generate 请求（/cancel 由 worker 转发到管理端口）"""
+        try:
+            if kind == "generate":
+                with span("http.receive", route="/generate", frontend=True, project_id=job_id):
+                    await self.submit_job(data, job_id)
+        except Exception as e:
+            logging.error(f"❌ Failed to handle frontend {kind} request: {e}", exc_info=True)
+
+    async def _delegate_task(self, assignee_id: str, description: str, project_id: str,
+                             timeout: float = TASK_TIMEOUT_SECONDS):
+        """委派任务并返回 task_id；启用追踪时 payload 附带 traceparent，学生端的 span 挂在委派 span 之下"""
+        with span("delegate", agent=assignee_id, timeout_s=round(timeout, 1)) as delegate_span:
+            payload = {"project_id": project_id}
+            if delegate_span.traceparent:
+                payload["traceparent"] = delegate_span.traceparent
+            result = await self.delegation_adapter.delegate_task(
+                assignee_id=assignee_id,
+                description=description,
+                payload=payload,
+                timeout_seconds=max(1, math.ceil(timeout))
+            )
+            data = (result or {}).get("data") or {}
+            task_id = data.get("task_id") if result and result.get("success") else None
+            delegate_span.set("task_id", task_id)
+            if not task_id:
+                delegate_span.set_error(f"delegation failed: {result}")
+
+        if task_id:
             logging.info(f"📤 Task {task_id} delegated to {assignee_id}")
+            self._register_task(project_id, task_id, assignee_id)
+            await self._checkpoint(project_id, "delegated", agent=assignee_id, task_id=task_id)
             return task_id
 
         logging.error(f"❌ Failed to delegate to {assignee_id}: {result}")
         return None
 
-    async def _wait_and_send_result(self, task_id: str, student_id: str):
+    def _register_task(self, project_id: str, task_id: str, assignee_id: str):
+        """登记进行中的委派任务，供撤销与 /agents 统计使用"""
+        self.task_agents[task_id] = assignee_id
+        job = self.jobs.get(project_id)
+        if job is not None:
+            job["task_ids"].add(task_id)
+
+    async def _send_result(self, content: str, project_id: str = None):
+        """上传结果；send_result_to_server 是同步的 requests 调用，放到线程中执行以免阻塞事件循环"""
+        with span("result.ship", bytes=len(content)) as ship_span:
+            outcome = await asyncio.to_thread(send_result_to_server, "weather-connector", content, project_id)
+            if not outcome.startswith("Successfully"):
+                ship_span.set_error(outcome)
+
+    async def _send_student_result(self, student_id: str, content: str, project_id: str, status: str = "ok"):
+        """上传某个学生的结果（或失败说明），并记入检查点，恢复时不再重复处理该学生"""
+        await self._send_result(content, project_id)
+        await self._checkpoint(project_id, "result", student=student_id, status=status)
+
+    async def _checkpoint(self, job_id: str, event: str, **fields):
+        """写入检查点日志；fsync 放到线程中执行"""
+        if self.journal is None or job_id is None:
+            return
+        try:
+            await asyncio.to_thread(self.journal.record, job_id, event, **fields)
+        except OSError as e:
+            logging.error(f"❌ Failed to write journal ({event} for {job_id}): {e}")
+
+    def _release_task(self, project_id: str, task_id: str):
+        """委派任务已结束（完成/超时/失败），不再需要撤销"""
+        self.task_agents.pop(task_id, None)
+        job = self.jobs.get(project_id)
+        if job is not None:
+            job["task_ids"].discard(task_id)
+
+    def _track_job(self, job_id: str, task: asyncio.Task, client_id: str = None):
+        """登记工作流，结束后自动移除"""
+        self.jobs[job_id] = {"task": task, "task_ids": set(), "client_id": client_id, "submitted_at": time.time()}
+        task.add_done_callback(lambda _: self.jobs.pop(job_id, None))
+
+    def _debug_task_labels(self) -> dict:
+        """/debug/tasks 中为工作流任务附加 job_id、已运行时间与未完成的委派任务"""
+        now = time.time()
+        return {
+            job["task"]: {
+                "job_id": job_id,
+                "age_s": round(now - job["submitted_at"], 3),
+                "pending_task_ids": sorted(job["task_ids"]),
+            }
+            for job_id, job in self.jobs.items()
+        }
+
+    async def cancel_job(self, job_id: str) -> list:
+        """
+        取消工作流：停止 run_workflow，并通过 TaskDelegationAdapter 撤销仍在进行的委派任务。
+        迟到的完成事件不再有人等待，会被直接丢弃。返回成功撤销的 task_id 列表。
+        """
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return []
+
+        job["task"].cancel()
+        await self._checkpoint(job_id, "cancelled")
+        revoked = []
+        for task_id in list(job["task_ids"]):
+            self.task_agents.pop(task_id, None)
+            result = await self.delegation_adapter.cancel_task(task_id)
+            if result and result.get("success"):
+                revoked.append(task_id)
+            else:
+                logging.warning(f"⚠️ Failed to cancel task {task_id}: {result}")
+
+        logging.info(f"🛑 Job {job_id} cancelled, revoked tasks: {revoked}")
+        return revoked
+
+    async def _revoke_timed_out_task(self, task_id: str, agent_id: str):
+        """超时放弃的任务也要撤销，否则学生仍在为无人等待的结果占用 LLM"""
+        try:
+            result = await self.delegation_adapter.cancel_task(task_id)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        if result and result.get("success"):
+            logging.info(f"🛑 [{agent_id}] Timed-out task {task_id} revoked.")
+        else:
+            logging.warning(f"⚠️ Failed to cancel timed-out task {task_id}: {result}")
+
+    def _is_available(self, agent_id: str) -> bool:
+        return agent_id not in self.agent_ready
+
+    def set_agent_available(self, agent_id: str, available: bool):
+        """由启动器在滚动重启前后调用"""
+        if available:
+            event = self.agent_ready.pop(agent_id, None)
+            if event is not None:
+                event.set()
+                logging.info(f"▶️ [{agent_id}] Available again.")
+        elif agent_id not in self.agent_ready:
+            self.agent_ready[agent_id] = asyncio.Event()
+            logging.info(f"⏸️ [{agent_id}] Marked unavailable (restarting).")
+
+    async def _wait_until_available(self, agent_id: str, deadline_at: float = None) -> bool:
+        """Agent 正在重启时等待其恢复，超过 AGENT_RESTART_WAIT 或整体期限则返回 False"""
+        event = self.agent_ready.get(agent_id)
+        if event is None:
+            return True
+        wait = AGENT_RESTART_WAIT
+        if deadline_at is not None:
+            wait = min(wait, deadline_at - asyncio.get_running_loop().time())
+        logging.info(f"⏸️ [{agent_id}] Restarting, waiting up to {max(0, wait):.0f}s...")
+        try:
+            await asyncio.wait_for(event.wait(), timeout=max(0, wait))
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _task_timeout(self, agent_id: str, deadline_at: float = None) -> float:
+        """本次等待的超时：自适应超时，且不超过请求整体期限的剩余时间"""
+        timeout = self.timeouts.timeout_for(agent_id)
+        if deadline_at is not None:
+            timeout = min(timeout, deadline_at - asyncio.get_running_loop().time())
+        return timeout
+
+    async def _wait_for_task(self, task_id: str, timeout: float = TASK_TIMEOUT_SECONDS):
+        """等待任务完成事件（兼容两种事件名），超时抛出 asyncio.TimeoutError"""
+        # wait_event 自带默认 30s 超时，这里放宽一点，由外层 wait_for 统一控制期限
+        return await asyncio.wait_for(
+            self.client.wait_event(
+                condition=lambda e: (
+                    e.payload and
+                    e.payload.get("task_id") == task_id and
+                    e.event_name in ("task.notification.completed", "task.complete")
+                ),
+                timeout=timeout + 1
+            ),
+            timeout=timeout
+        )
+
+    @staticmethod
+    def _extract_result_text(event) -> str:
+        """从完成事件中取出结果文本；没有 value 字段的结构化结果序列化为 JSON（而不是 Python repr）"""
+        result = event.payload.get("result")
+        if isinstance(result, dict):
+            value = result.get("value", result)
+            return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        return str(result)
+
+    async def _reattach_task(self, task_id: str, timeout: float):
+        """
+        重新接管重启前委派的任务。先登记完成事件的等待，再查询任务状态，避免两者之间送达的完成事件丢失。
+        返回可 await 的完成事件：已完成的任务直接由其结果构造事件，仍在执行的继续等待；
+        任务已失败、超时或不存在时返回 None，需要重新委派。
+        """
+        waiter = asyncio.ensure_future(self._wait_for_task(task_id, timeout))
+        result = await self.delegation_adapter.get_task(task_id)
+        data = (result or {}).get("data") or {}
+        status = data.get("status") if result and result.get("success") else None
+
+        if status in RUNNING_TASK_STATES:
+            logging.info(f"🔗 Re-attached to running task {task_id} ({status}).")
+            return waiter
+
+        waiter.cancel()
+        if status == "completed":
+            artifact = next((a for a in data.get("artifacts", []) if a.get("name") == "result"), {})
+            value = next((p["data"] for p in artifact.get("parts", []) if p.get("type") == "data"), None)
+            logging.info(f"🔗 Task {task_id} already completed while the coordinator was down.")
+            done = asyncio.get_running_loop().create_future()
+            done.set_result(SimpleNamespace(event_name="task.get", payload={"task_id": task_id, "result": value}))
+            return done
+
+        logging.info(f"🔁 Task {task_id} is {status or 'unknown'}, re-delegating.")
+        return None
+
+    async def _wait_and_send_result(self, task_id: str, student_id: str,
+                                    timeout: float = TASK_TIMEOUT_SECONDS, project_id: str = None,
+                                    waiter=None):
         """
         等待任务完成并发送结果
         兼容两种事件名以防止误判
+        waiter: 重新接管任务时由 _reattach_task 给出；此时耗时不完整，不计入自适应超时样本
         """
-        logging.info(f"⏳ [{student_id}] Watching task {task_id}...")
+        logging.info(f"⏳ [{student_id}] Watching task {task_id} (timeout {timeout:.0f}s)...")
+        started = time.monotonic()
+        fresh = waiter is None
 
         try:
-            event = await asyncio.wait_for(
-                self.client.wait_event(
-                    condition=lambda e: (
-                        e.payload and
-                        e.payload.get("task_id") == task_id and
-                        e.event_name in ("task.notification.completed", "task.complete")
-                    )
-                ),
-                timeout=TASK_TIMEOUT_SECONDS
-            )
+            with span("student.wait", agent=student_id, task_id=task_id, reattached=not fresh):
+                event = await (waiter if waiter is not None else self._wait_for_task(task_id, timeout))
 
             if event:
+                if fresh:
+                    self.timeouts.record(student_id, time.monotonic() - started)
                 logging.info(f"✅ [{student_id}] Task {task_id} completed (Event: {event.event_name}).")
-                result = event.payload.get("result")
-
-                if isinstance(result, dict):
-                    res_text = result.get("value", str(result))
-                else:
-                    res_text = str(result)
+                res_text = self._extract_result_text(event)
 
                 # --- 修改点：上传任务完成情况 ---
                 report = f"Agent: {student_id}\n{res_text}"
-                send_result_to_server("weather-connector", report)
+                await self._send_student_result(student_id, report, project_id)
                 # ------------------------------
                 logging.info(f"📤 [{student_id}] Result sent.")
             else:
                 # --- 修改点：上传无事件情况 ---
                 err_msg = f"Task Status: Failed (No Event)\nAgent: {student_id}"
                 logging.warning(err_msg)
-                send_result_to_server("weather-connector", err_msg)
+                await self._send_student_result(student_id, err_msg, project_id, "failed")
 
         except asyncio.TimeoutError:
+            # 仅当超时由自适应期限触发时计数（被请求整体期限截断的不计）
+            if fresh and timeout >= self.timeouts.timeout_for(student_id):
+                self.timeouts.record_timeout(student_id)
+            await self._revoke_timed_out_task(task_id, student_id)
             # --- 修改点：上传超时情况 ---
-            err_msg = f"Task Status: Failed (Timeout)\nAgent: {student_id}\nTimeout: >{int(TASK_TIMEOUT_SECONDS)}s"
+            err_msg = f"Task Status: Failed (Timeout)\nAgent: {student_id}\nTimeout: >{int(timeout)}s"
             logging.warning(f"⏰ {err_msg}")
-            send_result_to_server("weather-connector", err_msg)
+            await self._send_student_result(student_id, err_msg, project_id, "failed")
         except Exception as e:
             # --- 修改点：上传异常情况 ---
             err_msg = f"Task Status: Failed (Error)\nAgent: {student_id}\nException: {e}"
             logging.error(f"❌ {err_msg}", exc_info=True)
-            send_result_to_server("weather-connector", err_msg)
+            await self._send_student_result(student_id, err_msg, project_id, "failed")
+
+    async def _run_combined(self, weather_text: str, project_id: str, deadline_at: float = None,
+                            priority: str = DEFAULT_PRIORITY, students=STUDENT_AGENTS, task_id: str = None):
+        """
+        合并模式：同一段天气文本只发送一次，由 combined-student 一次生成四个学院的建议，
+        再拆分成四条结果按原有格式上传。
+        恢复工作流时 students 只含尚未上传结果的学生，task_id 为重启前委派的合并任务。
+        """
+        async with self.scheduler.slot(COMBINED_AGENT, priority):
+            await self._run_combined_task(weather_text, project_id, deadline_at, students, task_id)
+
+    async def _run_combined_task(self, weather_text: str, project_id: str, deadline_at: float = None,
+                                 students=STUDENT_AGENTS, task_id: str = None):
+        """在调度名额内执行合并任务"""
+        if not await self._wait_until_available(COMBINED_AGENT, deadline_at):
+            for student_id in students:
+                err_msg = f"Task Status: Skipped (Unavailable)\nAgent: {student_id}"
+                logging.warning(err_msg)
+                await self._send_student_result(student_id, err_msg, project_id, "skipped")
+            return
+
+        timeout = self._task_timeout(COMBINED_AGENT, deadline_at)
+        if timeout <= 0:
+            for student_id in students:
+                err_msg = f"Task Status: Skipped (Deadline)\nAgent: {student_id}"
+                logging.warning(err_msg)
+                await self._send_student_result(student_id, err_msg, project_id, "skipped")
+            return
+
+        waiter = await self._reattach_task(task_id, timeout) if task_id else None
+        if waiter is not None:
+            self._register_task(project_id, task_id, COMBINED_AGENT)
+        else:
+            logging.info(f"🚀 Delegating one combined task to {COMBINED_AGENT}...")
+            task_id = await self._delegate_task(
+                COMBINED_AGENT,
+                f"Generate travel advice for all four houses based on this weather:\n{weather_text}",
+                project_id,
+                timeout
+            )
+        if not task_id:
+            for student_id in students:
+                err_msg = f"Task Status: Failed (Delegation)\nAgent: {student_id}"
+                logging.error(err_msg)
+                await self._send_student_result(student_id, err_msg, project_id, "failed")
+            return
+
+        logging.info(f"⏳ [{COMBINED_AGENT}] Watching task {task_id} (timeout {timeout:.0f}s)...")
+        sections = {}
+        started = time.monotonic()
+        fresh = waiter is None
+        try:
+            with span("student.wait", agent=COMBINED_AGENT, task_id=task_id, reattached=not fresh):
+                event = await (waiter if waiter is not None else self._wait_for_task(task_id, timeout))
+            if event:
+                if fresh:
+                    self.timeouts.record(COMBINED_AGENT, time.monotonic() - started)
+                sections = split_combined_result(event.payload.get("result"))
+                logging.info(
+                    f"✅ [{COMBINED_AGENT}] Task {task_id} completed, "
+                    f"{len(sections)}/{len(STUDENT_AGENTS)} sections parsed."
+                )
+                failure = "Task Status: Failed (Parse)"
+            else:
+                failure = "Task Status: Failed (No Event)"
+        except asyncio.TimeoutError:
+            if fresh and timeout >= self.timeouts.timeout_for(COMBINED_AGENT):
+                self.timeouts.record_timeout(COMBINED_AGENT)
+            await self._revoke_timed_out_task(task_id, COMBINED_AGENT)
+            failure = f"Task Status: Failed (Timeout)\nTimeout: >{int(timeout)}s"
+        except Exception as e:
+            logging.error(f"❌ [{COMBINED_AGENT}] Error while waiting: {e}", exc_info=True)
+            failure = f"Task Status: Failed (Error)\nException: {e}"
+
+        self._release_task(project_id, task_id)
+
+        # 拆分为四条结果，保持与顺序模式相同的上传格式
+        for student_id in students:
+            if student_id in sections:
+                await self._send_student_result(student_id, f"Agent: {student_id}\n{sections[student_id]}", project_id)
+                logging.info(f"📤 [{student_id}] Result sent.")
+            else:
+                status_line, _, detail = failure.partition("\n")
+                err_msg = f"{status_line}\nAgent: {student_id}" + (f"\n{detail}" if detail else "")
+                logging.warning(err_msg)
+                await self._send_student_result(student_id, err_msg, project_id, "failed")
+
+    async def _run_student_task(self, student_id: str, weather_text: str, project_id: str,
+                                deadline_at: float = None, task_id: str = None):
+        """
+        在调度名额内委派单个学生任务并等待结果
+        task_id: 恢复工作流时重启前委派的任务，仍在执行或已完成时直接接管，不再重新委派
+        """
+        if not await self._wait_until_available(student_id, deadline_at):
+            err_msg = f"Task Status: Skipped (Unavailable)\nAgent: {student_id}"
+            logging.warning(err_msg)
+            await self._send_student_result(student_id, err_msg, project_id, "skipped")
+            return
+
+        timeout = self._task_timeout(student_id, deadline_at)
+        if timeout <= 0:
+            # 整体期限已用尽，跳过剩余学生
+            err_msg = f"Task Status: Skipped (Deadline)\nAgent: {student_id}"
+            logging.warning(err_msg)
+            await self._send_student_result(student_id, err_msg, project_id, "skipped")
+            return
+
+        waiter = await self._reattach_task(task_id, timeout) if task_id else None
+        if waiter is not None:
+            self._register_task(project_id, task_id, student_id)
+        else:
+            task_id = await self._delegate_task(
+                student_id,
+                f"Generate travel advice based on this weather:\n{weather_text}",
+                project_id,
+                timeout
+            )
+
+        if task_id:
+            # 这里使用 await，会一直卡在这里，直到 _wait_and_send_result 返回
+            # 也就是必须等这个学生处理完，才会去循环下一个
+            await self._wait_and_send_result(task_id, student_id, timeout, project_id, waiter)
+            self._release_task(project_id, task_id)
+        else:
+            # 委派失败，上传任务失败情况
+            err_msg = f"Task Status: Failed (Delegation)\nAgent: {student_id}"
+            logging.error(err_msg)
+            await self._send_student_result(student_id, err_msg, project_id, "failed")
 
     async def handle_http_request(self, request):
         """处理 HTTP POST /generate 请求"""
         try:
-            data = await request.json()
-            city = data.get("city")
-            date_val = data.get("date")
+            data = await request.json(loads=json_loads)
         except Exception:
-            return web.json_response({"status": "error", "message": "Invalid JSON"}, status=400)
+            return json_response({"status": "error", "message": "Invalid JSON"}, status=400)
 
-        if not city:
-            return web.json_response({"status": "error", "message": "Missing 'city'"}, status=400)
+        params, error = parse_generate_request(data, REQUEST_OPTIONS)
+        if error:
+            return json_response({"status": "error", "message": error}, status=400)
 
-        logging.info(f"🚀 Received HTTP request: {city}, date: {date_val}")
+        with span("http.receive", route="/generate") as receive_span:
+            job_id = await self.submit_job(params)
+            receive_span.set("project_id", job_id)
+        return json_response({"status": "ok", "message": "Request accepted, processing...", "job_id": job_id})
 
-        # 启动后台工作流 (不阻塞 HTTP 响应)
-        asyncio.create_task(self.run_workflow(city, date_val))
+    async def submit_job(self, params: dict, job_id: str = None) -> str:
+        """登记并启动一个工作流，返回 job_id"""
+        city, client_id = params["city"], params["client_id"]
+        logging.info(f"🚀 Received HTTP request: {city}, date: {params['date']}, mode: {params['mode']}, "
+                     f"deadline: {params['deadline']}, priority: {params['priority']}")
 
-        return web.json_response({"status": "ok", "message": "Request accepted, processing..."})
+        # 同一客户端重新提交时，旧任务的结果已无人关心，先取消
+        if client_id:
+            for old_job_id in self._match_jobs({"client_id": client_id}):
+                await self.cancel_job(old_job_id)
 
-    async def run_workflow(self, city: str, date_val: str):
-        """核心业务工作流 - 顺序执行版本"""
-        project_id = f"manual-{city}-{int(asyncio.get_event_loop().time())}"
+        # 启动后台工作流 (不阻塞 HTTP 响应)
+        job_id = job_id or new_job_id(city)
+        deadline_at = time.time() + params["deadline"] if params["deadline"] else None
+        # 记下接收请求的 span，恢复时工作流仍挂在同一条 trace 上
+        await self._checkpoint(job_id, "submitted", params=params, deadline_at=deadline_at,
+                               traceparent=current_traceparent())
+        task = asyncio.create_task(self.run_workflow(
+            city, params["date"], params["mode"], params["deadline"], job_id, params["priority"]
+        ))
+        self._track_job(job_id, task, client_id)
+        return job_id
+
+    async def resume_jobs(self):
+        """启动时按检查点日志恢复上次未结束的工作流：已完成的阶段不再重复，已委派的任务重新接管"""
+        if self.journal is None:
+            return
+        try:
+            unfinished = await asyncio.to_thread(self.journal.compact, JOURNAL_MAX_AGE)
+        except (OSError, ValueError) as e:
+            logging.error(f"❌ Failed to read workflow journal {WORKFLOW_JOURNAL}: {e}")
+            return
+
+        for job_id, checkpoint in unfinished.items():
+            params = checkpoint["params"]
+            logging.info(
+                f"♻️ Resuming workflow {job_id} ({params['city']}): "
+                f"weather {'sent' if checkpoint['weather'] is not None else 'pending'}, "
+                f"{len(checkpoint['results'])}/{len(STUDENT_AGENTS)} results sent, "
+                f"{sum(1 for a in checkpoint['tasks'] if a not in checkpoint['results'])} delegated task(s) to check"
+            )
+            task = asyncio.create_task(self.run_workflow(
+                params["city"], params["date"], params["mode"], params["deadline"], job_id, params["priority"],
+                checkpoint
+            ))
+            self._track_job(job_id, task, params.get("client_id"))
+        if unfinished:
+            logging.info(f"♻️ Resumed {len(unfinished)} unfinished workflow(s) from {WORKFLOW_JOURNAL}")
+
+    def _match_jobs(self, data: dict) -> list:
+        """按 /cancel 请求体选出要取消的 job_id"""
+        if data.get("all"):
+            return list(self.jobs)
+        if data.get("client_id"):
+            return [jid for jid, job in self.jobs.items() if job["client_id"] == data["client_id"]]
+        if data.get("job_id") in self.jobs:
+            return [data["job_id"]]
+        return []
+
+    async def handle_cancel(self, request):
+        """
+        处理 HTTP POST /cancel 请求
+        支持 {"job_id": ...}、{"client_id": ...} 或 {"all": true}
+        """
+        try:
+            data = await request.json(loads=json_loads)
+        except Exception:
+            return json_response({"status": "error", "message": "Invalid JSON"}, status=400)
+
+        data, error = parse_cancel_request(data)
+        if error:
+            return json_response({"status": "error", "message": error}, status=400)
+        job_ids = self._match_jobs(data)
+        if data.get("job_id") and not job_ids:
+            return json_response({"status": "error", "message": "Job not found or already finished"}, status=404)
+
+        cancelled = {job_id: await self.cancel_job(job_id) for job_id in job_ids}
+        return json_response({"status": "ok", "cancelled": cancelled})
+
+    async def handle_stats(self, request):
+        """处理 HTTP GET /stats 请求：各学生耗时分布、当前超时、各优先级排队情况与预报缓存、历史库命中率"""
+        return json_response({
+            "task_latency": self.timeouts.summary(),
+            "scheduler": self.scheduler.summary(),
+            "event_loop": self.loop_monitor.summary(),
+            "forecast_cache": forecast_cache_stats(),
+            "weather_history": weather_history_stats(),
+            "warmup": self.warmup_report,
+        })
+
+    async def handle_agents(self, request):
+        """处理 HTTP GET /agents 请求：正在重启的 Agent 与各 Agent 未结束的任务数"""
+        return json_response({
+            "unavailable": sorted(self.agent_ready),
+            "in_flight": dict(Counter(self.task_agents.values())),
+        })
+
+    async def handle_agent_state(self, request):
+        """处理 HTTP POST /agents/{agent_id}/available|unavailable 请求（仅限本机，供 launch.py 滚动重启使用）"""
+        if request.remote not in ("127.0.0.1", "::1"):
+            return json_response({"status": "error", "message": "Forbidden"}, status=403)
+        agent_id = request.match_info["agent_id"]
+        self.set_agent_available(agent_id, request.match_info["state"] == "available")
+        return json_response({
+            "status": "ok",
+            "agent_id": agent_id,
+            "available": self._is_available(agent_id),
+            "in_flight": sum(1 for a in self.task_agents.values() if a == agent_id),
+        })
+
+    async def run_workflow(self, city: str, date_val: str, mode: str = "separate", deadline: float = None,
+                           project_id: str = None, priority: str = DEFAULT_PRIORITY, checkpoint: dict = None):
+        """
+        核心业务工作流 - 顺序执行版本（mode="combined" 时改为单次合并生成）
+        deadline 为整体时间预算（秒），用尽后剩余学生直接跳过，只返回已完成的部分结果
+        priority 决定在学生繁忙时的排队顺序（interactive 优先于 batch）
+        checkpoint 为重启后从检查点日志恢复的状态：跳过已发送的天气与学生结果，接管已委派的任务
+        """
+        project_id = project_id or f"manual-{city}-{int(asyncio.get_event_loop().time())}"
+        # 工作流在独立的 asyncio 任务中运行，project_id 只作用于本任务内的日志与 span
+        set_project_id(project_id)
+        checkpoint = checkpoint or {}
+        with span("workflow", checkpoint.get("traceparent"), project_id=project_id, city=city,
+                  mode=mode, priority=priority, resumed=bool(checkpoint)):
+            await self._run_workflow(city, date_val, mode, deadline, project_id, priority, checkpoint)
+
+    async def _run_workflow(self, city: str, date_val: str, mode: str, deadline: float,
+                            project_id: str, priority: str, checkpoint: dict):
+        """run_workflow 的各个阶段"""
+        deadline_at = asyncio.get_running_loop().time() + deadline if deadline else None
+        if checkpoint.get("deadline_at"):
+            # 恢复时按提交时记录的绝对期限计算剩余时间
+            deadline_at = asyncio.get_running_loop().time() + checkpoint["deadline_at"] - time.time()
+        done = checkpoint.get("results", set())
+        delegated = checkpoint.get("tasks", {})
 
         try:
             # === Step 1: 获取天气 ===
-            logging.info("=== WORKFLOW STARTED ===")
-            logging.info(f"🌤️ Fetching weather for {city}...")
+            logging.info("=== WORKFLOW STARTED ===" if not checkpoint else "=== WORKFLOW RESUMED ===")
+            weather_text = checkpoint.get("weather")
+            if weather_text is None:
+                logging.info(f"🌤️ Fetching weather for {city}...")
 
-            weather_text = get_weather_report(city, date_val)
+                with span("weather.report", city=city, date=date_val):
+                    weather_text = await asyncio.to_thread(get_weather_report, city, date_val)
 
-            # 立即发送天气报告
-            send_result_to_server("weather-connector", f"{weather_text}")
-            logging.info("📤 Weather report sent.")
+                # 立即发送天气报告
+                await self._send_result(weather_text, project_id)
+                logging.info("📤 Weather report sent.")
+            else:
+                mode = checkpoint.get("mode") or mode
+                logging.info("♻️ Weather report was sent before the restart, skipping.")
+
+            if mode == "combined" and not self._is_available(COMBINED_AGENT):
+                logging.warning(f"⚠️ {COMBINED_AGENT} is restarting, falling back to separate mode.")
+                mode = "separate"
+            if checkpoint.get("weather") is None:
+                await self._checkpoint(project_id, "weather", text=weather_text, mode=mode)
+
+            if mode == "combined":
+                students = [s for s in STUDENT_AGENTS if s not in done]
+                if students:
+                    await self._run_combined(weather_text, project_id, deadline_at, priority,
+                                             students, delegated.get(COMBINED_AGENT))
+                await self._checkpoint(project_id, "finished")
+                logging.info("🏁 Workflow finished (Combined mode).")
+                return
 
             # === Step 2: 顺序委派任务 ===
             logging.info("🚀 Delegating tasks to students sequentially (One by One)...")
 
-            for student_id in STUDENT_AGENTS:
+            pending = deque(s for s in STUDENT_AGENTS if s not in done)
+            deferred = set()
+            while pending:
+                student_id = pending.popleft()
+                # 正在重启的学生让到最后，先处理其他学生
+                if not self._is_available(student_id) and student_id not in deferred and pending:
+                    deferred.add(student_id)
+                    pending.append(student_id)
+                    logging.info(f"⏭️ {student_id} is restarting, deferring it to the end.")
+                    continue
+
                 logging.info(f"🔄 Current turn: {student_id}")
 
                 # --- 修改点：在每一个任务下发之前加1秒延时 ---
-                await asyncio.sleep(1)
-                logging.info(f"⏱️  Waited 1s before delegating to {student_id}...")
+                await asyncio.sleep(DELEGATION_INTERVAL_SECONDS)
+                logging.info(f"⏱️  Waited {DELEGATION_INTERVAL_SECONDS:g}s before delegating to {student_id}...")
                 # --------------------------------------------
 
-                task_id = await self._delegate_task(
-                    student_id,
-                    f"Generate travel advice based on this weather:\n{weather_text}",
-                    project_id
-                )
-
-                if task_id:
-                    # 这里使用 await，会一直卡在这里，直到 _wait_and_send_result 返回
-                    # 也就是必须等这个学生处理完，才会去循环下一个
-                    await self._wait_and_send_result(task_id, student_id)
-                else:
-                    # 委派失败，上传任务失败情况
-                    err_msg = f"Task Status: Failed (Delegation)\nAgent: {student_id}"
-                    logging.error(err_msg)
-                    send_result_to_server("weather-connector", err_msg)
+                async with self.scheduler.slot(student_id, priority):
+                    await self._run_student_task(student_id, weather_text, project_id, deadline_at,
+                                                 delegated.get(student_id))
 
+            await self._checkpoint(project_id, "finished")
             logging.info("🏁 Workflow finished (All students processed in order).")
 
+        except asyncio.CancelledError:
+            # 协调器停止时的取消不写 finished，重启后继续；/cancel 的取消由 cancel_job 记录
+            logging.info(f"🛑 Workflow {project_id} cancelled.")
+            raise
         except Exception as e:
             logging.error(f"💥 Workflow crashed: {e}", exc_info=True)
-            send_result_to_server("weather-connector", f"System Error: {e}")
+            record_error(f"{type(e).__name__}: {e}")
+            await self._send_result(f"System Error: {e}", project_id)
+            await self._checkpoint(project_id, "finished", error=str(e))
 
 
 async def main():
     """启动 Agent"""
     logging.basicConfig(
         level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        format="%(asctime)s - %(name)s - %(levelname)s - [%(project_id)s] %(message)s"
     )
+    install_log_context()
+    init_tracer("weather-connector")
+    log_fastpath()
 
     # 实例化 Agent
     agent = WeatherCoordinatorAgent()
+    mark_startup("agent created")
 
     try:
         # 启动 Agent
@@ -212,8 +927,8 @@ async def main():
         )
 
         print("Weather Coordinator Agent (WorkerAgent) running...")
-        print("Mode: Sequential (One by One)")
-        print("HTTP Interface: http://0.0.0.0:8888/generate")
+        print(f"Mode: Sequential (One by One), default workflow: {DEFAULT_WORKFLOW_MODE}")
+        print(f"HTTP Interface: http://0.0.0.0:{HTTP_PORT}/generate")
         print("Press Ctrl+C to stop.")
 
         # 保持 Agent 运行
@@ -227,4 +942,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
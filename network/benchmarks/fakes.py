@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+benchmarks/fakes.py
+基准测试使用的本地模拟服务：
+- FakeOpenMeteo: 地理编码与天气预报接口
+- 日志接收端: /log
+- FakeStudentNetwork: 模拟学生 Agent 的委派与完成事件
+"""
+import asyncio
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+from aiohttp import web
+
+FAKE_CITIES = {
+    "Beijing": (39.9075, 116.39723),
+    "Shanghai": (31.22222, 121.45806),
+    "Chengdu": (30.66667, 104.06667),
+}
+
+
+def make_forecast_payload(date_str: str, days: int = 1) -> dict:
+    """构造与 Open-Meteo /v1/forecast 结构一致的 daily 响应"""
+    return {
+        "latitude": 39.9,
+        "longitude": 116.4,
+        "timezone": "Asia/Shanghai",
+        "daily_units": {"time": "iso8601", "temperature_2m_max": "°C"},
+        "daily": {
+            "time": [date_str] * days,
+            "temperature_2m_max": [12.3] * days,
+            "temperature_2m_min": [1.4] * days,
+            "weather_code": [3] * days,
+            "precipitation_sum": [0.2] * days,
+            "wind_speed_10m_max": [14.8] * days,
+        },
+    }
+
+
+class FakeOpenMeteo:
+    """模拟 Open-Meteo 地理编码与预报接口"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+
+    async def handle_search(self, request):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        name = request.query.get("name", "")
+        if name not in FAKE_CITIES:
+            return web.json_response({"generationtime_ms": 0.1})
+        lat, lon = FAKE_CITIES[name]
+        return web.json_response({"results": [{"name": name, "latitude": lat, "longitude": lon}]})
+
+    async def handle_forecast(self, request):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        date_str = request.query.get("start_date") or datetime.now().strftime("%Y-%m-%d")
+        return web.json_response(make_forecast_payload(date_str))
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/v1/search", self.handle_search)
+        app.router.add_get("/v1/forecast", self.handle_forecast)
+        return app
+
+
+class FakeLogSink:
+    """模拟日志服务器，只计数"""
+
+    def __init__(self):
+        self.messages = 0
+
+    async def handle_log(self, request):
+        await request.read()
+        self.messages += 1
+        return web.json_response({"status": "success", "message": "Logged"})
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/log", self.handle_log)
+        return app
+
+
+class BackgroundServers:
+    """
+    在独立线程的事件循环中运行模拟服务。
+    被测代码使用同步 requests，若与模拟服务共用一个事件循环会互相阻塞。
+    """
+
+    def __init__(self, apps: dict):
+        self.apps = apps
+        self.ports: dict[str, int] = {}
+        self.loop = asyncio.new_event_loop()
+        self.runners = []
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._start())
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _start(self):
+        for name, app in self.apps.items():
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            self.ports[name] = runner.addresses[0][1]
+            self.runners.append(runner)
+
+    def url(self, name: str, path: str = "") -> str:
+        return f"http://127.0.0.1:{self.ports[name]}{path}"
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait(timeout=10)
+        return self
+
+    def __exit__(self, *exc):
+        async def _cleanup():
+            for runner in self.runners:
+                await runner.cleanup()
+        asyncio.run_coroutine_threadsafe(_cleanup(), self.loop).result(timeout=10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=10)
+
+
+class FakeStudentNetwork:
+    """
+    同时扮演协调器的 client 与 delegation_adapter：
+    委派后经过 latency 秒产生 task.notification.completed 事件。
+    """
+
+    def __init__(self, latency: float = 0.01):
+        self.latency = latency
+        self.waiters = []
+        self.counter = 0
+
+    # --- delegation_adapter 接口 ---
+    async def delegate_task(self, assignee_id, description, payload=None, timeout_seconds=300):
+        self.counter += 1
+        task_id = f"fake-task-{self.counter}"
+        event = SimpleNamespace(
+            event_name="task.notification.completed",
+            payload={"task_id": task_id, "result": {"value": f"{assignee_id} 的旅行建议\n{description[-40:]}"}},
+        )
+        asyncio.get_running_loop().call_later(self.latency, self.emit, event)
+        return {"success": True, "data": {"task_id": task_id}}
+
+    async def cancel_task(self, task_id):
+        return {"success": True}
+
+    # --- client 接口 ---
+    async def wait_event(self, condition=None, timeout=30.0):
+        fut = asyncio.get_running_loop().create_future()
+        entry = (condition, fut)
+        self.waiters.append(entry)
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.waiters.remove(entry)
+
+    def emit(self, event):
+        for condition, fut in list(self.waiters):
+            if not fut.done() and (condition is None or condition(event)):
+                fut.set_result(event)
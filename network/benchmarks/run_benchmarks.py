@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+benchmarks/run_benchmarks.py
+天气工具与协调器工作流的基准测试
+
+微基准: WeatherService.format_weather_text、parse_daily_forecast（预报 JSON 解析）
+宏基准: get_weather_report、完整 run_workflow（本地模拟 Open-Meteo 与学生 Agent）
+
+用法:
+  python benchmarks/run_benchmarks.py                       # 运行全部并打印结果
+  python benchmarks/run_benchmarks.py --save baselines/main.json
+  python benchmarks/run_benchmarks.py --compare baselines/main.json --threshold 0.2
+
+对比时只有中位数与最小值都变慢超过阈值、且中位数的变化超出两次运行各自的波动（四分位距）时才判为退化，
+避免单次运行的噪声被误报。
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent.resolve()
+NETWORK_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(NETWORK_DIR))
+sys.path.insert(0, str(NETWORK_DIR / "agents"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from fakes import BackgroundServers, FakeLogSink, FakeOpenMeteo, FakeStudentNetwork, make_forecast_payload
+
+SAMPLE_WEATHER_JSON = json.dumps({
+    "city": "北京", "date": "2026-01-31", "temp_max": 12.3, "temp_min": 1.4,
+    "weather_code": 3, "precipitation": 0.2, "wind_max": 14.8,
+}, ensure_ascii=False)
+SAMPLE_FORECAST_BYTES = json.dumps(make_forecast_payload("2026-01-31", days=16)).encode("utf-8")
+
+
+# 未指定 number 时，自动加倍每轮的执行次数，直到一轮至少耗时 ROUND_MIN_TIME 秒（同 timeit.autorange）
+ROUND_MIN_TIME = 0.05
+
+
+# --- 计时工具 ---
+def _summarize(samples: list, number: int) -> dict:
+    per_op = [s / number for s in samples]
+    q1, _, q3 = statistics.quantiles(per_op, n=4, method="inclusive")
+    return {
+        "median_s": statistics.median(per_op),
+        "min_s": min(per_op),
+        "mean_s": statistics.fmean(per_op),
+        "q1_s": q1,
+        "q3_s": q3,
+        "rounds": len(per_op),
+        "number": number,
+    }
+
+
+def _calibrate(fn) -> int:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= ROUND_MIN_TIME:
+            return number
+        number *= 2
+
+
+def bench(fn, number: int = None, repeat: int = 15, warmup: int = 1) -> dict:
+    """同步基准：每轮执行 number 次（未指定时自动校准），共 repeat 轮，返回单次耗时统计"""
+    for _ in range(warmup):
+        fn()
+    if number is None:
+        number = _calibrate(fn)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append(time.perf_counter() - start)
+    return _summarize(samples, number)
+
+
+def abench(coro_fn, repeat: int = 20, warmup: int = 1) -> dict:
+    """异步基准：每轮执行一次协程"""
+    async def _run():
+        for _ in range(warmup):
+            await coro_fn()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await coro_fn()
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    return _summarize(asyncio.run(_run()), 1)
+
+
+# --- 微基准 ---
+def run_micro() -> dict:
+    from tools.weather import WeatherService, parse_daily_forecast
+
+    return {
+        "micro.format_weather_text": bench(lambda: WeatherService.format_weather_text(SAMPLE_WEATHER_JSON)),
+        # 与 fetch_daily_forecast 相同：解码响应 JSON 后取出当天数值
+        "micro.parse_forecast_json": bench(
+            lambda: parse_daily_forecast(json.loads(SAMPLE_FORECAST_BYTES), "2026-01-31")
+        ),
+    }
+
+
+# --- 宏基准 ---
+def point_to_fakes(servers: BackgroundServers):
+    """将被测模块指向本地模拟服务；必须在导入 tools / weather_connector 之前调用"""
+    os.environ["OPEN_METEO_GEOCODING_URL"] = servers.url("meteo", "/v1/search")
+    os.environ["OPEN_METEO_FORECAST_URL"] = servers.url("meteo", "/v1/forecast")
+    os.environ["LOG_SERVER_URL"] = servers.url("sink", "/log")
+    os.environ["DELEGATION_INTERVAL_SECONDS"] = "0"
+    # 基准测试不写检查点日志，避免测得的是磁盘 fsync 耗时
+    os.environ["WORKFLOW_JOURNAL"] = ""
+    # 关闭预报网格缓存，宏基准测的是每次都请求预报的完整路径
+    os.environ["WEATHER_GRID_DEG"] = "0"
+    # 不读本地历史库，结果不受本机是否回填过历史数据影响
+    os.environ["WEATHER_HISTORY_DIR"] = ""
+
+
+def run_macro(student_latency: float) -> dict:
+    from tools.weather import get_weather_report
+    import weather_connector
+
+    class BenchCoordinator(weather_connector.WeatherCoordinatorAgent):
+        """用模拟学生网络替换真实连接"""
+
+        @property
+        def client(self):
+            return self.__dict__.get("_bench_client") or super().client
+
+    students = FakeStudentNetwork(latency=student_latency)
+    coordinator = BenchCoordinator()
+    coordinator._bench_client = students
+    coordinator.delegation_adapter = students
+
+    results = {
+        "macro.get_weather_report": bench(lambda: get_weather_report("Beijing", "0"), number=1, repeat=30),
+    }
+    # 工作流会打印大量日志与发送结果提示，基准期间静默
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["macro.run_workflow"] = abench(
+            lambda: coordinator.run_workflow("Beijing", "0"))
+    return results
+
+
+# --- 基线对比 ---
+def _noise(result: dict) -> float:
+    """一次运行的相对波动：四分位距 / 中位数（旧基线没有四分位数时为 0）"""
+    if "q1_s" not in result:
+        return 0.0
+    return (result["q3_s"] - result["q1_s"]) / result["median_s"]
+
+
+def judge(current: dict, base: dict, threshold: float) -> tuple:
+    """
+    返回 (中位数变化, 最小值变化, 容差, 结论)，结论为 "regression" / "faster" / ""。
+    容差 = 阈值 + 两次运行中较大的相对波动；中位数超出容差且最小值也慢了超过阈值才算退化。
+    """
+    change = current["median_s"] / base["median_s"] - 1
+    min_change = current["min_s"] / base["min_s"] - 1
+    tolerance = threshold + max(_noise(current), _noise(base))
+    if change > tolerance and min_change > threshold:
+        return change, min_change, tolerance, "regression"
+    if change < -tolerance and min_change < -threshold:
+        return change, min_change, tolerance, "faster"
+    return change, min_change, tolerance, ""
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """打印与基线的对比，返回是否存在超过阈值的退化"""
+    regressed = False
+    print(f"\n{'benchmark':<30} {'baseline':>12} {'current':>12} {'change':>9} {'min Δ':>9} {'tolerance':>10}")
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:<30} {'-':>12} {_fmt(current['median_s']):>12} {'new':>9}")
+            continue
+        change, min_change, tolerance, verdict = judge(current, base, threshold)
+        flag = ""
+        if verdict == "regression":
+            flag, regressed = "  ⚠️ REGRESSION", True
+        elif verdict == "faster":
+            flag = "  ✅ faster"
+        print(f"{name:<30} {_fmt(base['median_s']):>12} {_fmt(current['median_s']):>12} "
+              f"{change:>+8.1%} {min_change:>+8.1%} {tolerance:>9.0%}{flag}")
+    return regressed
+
+
+def _fmt(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Travel Guide Network 基准测试")
+    parser.add_argument("--only", choices=["micro", "macro"], help="只运行某一类基准")
+    parser.add_argument("--save", type=Path, help="将结果保存为 JSON 基线")
+    parser.add_argument("--compare", type=Path, help="与已有 JSON 基线对比")
+    parser.add_argument("--threshold", type=float, default=0.2, help="退化阈值（相对中位数与最小值，另加运行波动作为容差；默认 0.2 即 20%%）")
+    parser.add_argument("--student-latency", type=float, default=0.01, help="模拟学生的响应延迟（秒）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = {}
+    apps = {"meteo": FakeOpenMeteo().build_app(), "sink": FakeLogSink().build_app()}
+    with BackgroundServers(apps) as servers:
+        point_to_fakes(servers)
+        if args.only in (None, "micro"):
+            results.update(run_micro())
+        if args.only in (None, "macro"):
+            results.update(run_macro(args.student_latency))
+
+    print(f"{'benchmark':<30} {'median':>12} {'min':>12} {'mean':>12}")
+    for name, r in results.items():
+        print(f"{name:<30} {_fmt(r['median_s']):>12} {_fmt(r['min_s']):>12} {_fmt(r['mean_s']):>12}")
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            },
+            "results": results,
+        }, indent=2), encoding="utf-8")
+        print(f"\n💾 Baseline saved to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if compare(results, baseline, args.threshold):
+            print(f"\n❌ Regression beyond {args.threshold:.0%} detected.")
+            sys.exit(1)
+        print(f"\n✅ No regression beyond {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
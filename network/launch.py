@@ -6,18 +6,29 @@ Copyright (c) 2026 starttown
 Permission is hereby granted, free of charge, to any person obtaining a copy
 """
 
+import time
+
+# 启动计时起点（--profile-startup）
+_LAUNCH_STARTED_AT = time.time()
+
 import sys
-import psutil
 import os
+import argparse
+import hashlib
 import subprocess
 import signal
 import json
 import shutil
-import time
+import socket
 import platform
+import urllib.request
 from pathlib import Path
 from datetime import datetime
 
+from tools.startup_timeline import ORIGIN_ENV, PROFILE_DIR_ENV, StartupTimeline, load_timeline
+
+_IMPORTS_DONE_AT = time.time()
+
 # ================= UTF-8 强制设置 =================
 # 设置环境变量以确保子进程输出中文不乱码
 if hasattr(sys.stdout, "reconfigure"):
@@ -28,6 +39,10 @@ if hasattr(sys.stderr, "reconfigure"):
 ENV = os.environ.copy()
 ENV["PYTHONIOENCODING"] = "utf-8"
 ENV["PYTHONUTF8"] = "1"
+# 子进程（network 加载的 workspace 工具、学生、协调器、网关）通过 PYTHONPATH 导入 tools 包
+ENV["PYTHONPATH"] = os.pathsep.join(
+    p for p in (os.path.dirname(os.path.abspath(__file__)), os.environ.get("PYTHONPATH")) if p
+)
 
 
 # ================= LLM 配置加载逻辑 =================
@@ -92,12 +107,18 @@ def load_llm_config_and_set_env():
     print("🔧 [Config] ----------------------------------------")
     print("🔧 [Config] 配置加载完成，已写入环境变量。")
     print("=" * 60 + "\n")
+    return final_config
 
 
 
 # ================= 平台检测 =================
 IS_WINDOWS = platform.system() == "Windows"
 
+# 停止服务：先发送 STOP_SIGNAL，STOP_TIMEOUT 秒后仍未退出的进程组强制结束
+STOP_TIMEOUT = float(os.environ.get("STOP_TIMEOUT", "5"))
+STOP_SIGNAL = signal.CTRL_BREAK_EVENT if IS_WINDOWS else signal.SIGTERM
+SIGKILL = getattr(signal, "SIGKILL", None)
+
 # ================= 路径解析核心逻辑 =================
 def resolve_openagents_path():
     """
@@ -113,18 +134,115 @@ def resolve_openagents_path():
         "请确认 openagents 是否已通过 pip 安装并添加到环境变量中。"
     )
 
-# ================= 全局路径设置 =================
-try:
-    OPENAGENTS_EXE = resolve_openagents_path()
-except Exception as e:
-    print(f"Error: {e}", file=sys.stderr)
-    sys.exit(1)
+_openagents_exe = None
+
+
+def openagents_exe() -> str:
+    """首次启动子进程时才解析 openagents 路径，之后复用结果"""
+    global _openagents_exe
+    if _openagents_exe is None:
+        _openagents_exe = resolve_openagents_path()
+    return _openagents_exe
 
+
+# ================= 全局路径设置 =================
 NETWORK_DIR = Path(__file__).parent.resolve()
 SCRIPT_DIR = NETWORK_DIR / "agents"
+TOOLS_DIR = NETWORK_DIR / "tools"
 LOG_DIR = NETWORK_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 
+GATEWAY_PORT = 8710
+GATEWAY_URL = f"http://127.0.0.1:{GATEWAY_PORT}/v1"
+
+NETWORK_HEALTH_URL = "http://localhost:8700/api/health"
+COORDINATOR_PORT = 8888
+# --frontend-workers 模式下协调器自身的接口改在本地管理端口
+COORDINATOR_ADMIN_PORT = 8889
+NETWORK_READY_TIMEOUT = 30
+PROFILE_READY_TIMEOUT = 180
+# --warmup：协调器预热的最长时间（同时传给协调器），启动器在此基础上多等一会儿
+WARMUP_TIMEOUT = float(os.environ.get("WARMUP_TIMEOUT", "180"))
+
+# --watch：热重载 llm_config.json 与 Agent YAML
+LLM_CONFIG_FILE = NETWORK_DIR / "llm_config.json"
+WATCH_INTERVAL = 1.0
+# 文件最后一次修改后需静置的秒数，避免读到编辑器写了一半的文件
+WATCH_SETTLE = 0.5
+# 滚动重启：等待 Agent 手上的任务完成的最长时间，以及重新注册的最长时间
+RELOAD_DRAIN_TIMEOUT = float(os.environ.get("RELOAD_DRAIN_TIMEOUT", "60"))
+AGENT_READY_TIMEOUT = 60
+GATEWAY_READY_TIMEOUT = 30
+# 只修改这些键时，经由网关的 Agent 无需重启，重启网关即可
+GATEWAY_ONLY_KEYS = {"DEFAULT_LLM_BASE_URL", "DEFAULT_LLM_API_KEY"}
+
+# --profile-startup 时记录启动各阶段
+TIMELINE: StartupTimeline | None = None
+
+
+def mark(phase: str):
+    if TIMELINE:
+        TIMELINE.mark(phase)
+
+
+# ================= 就绪检测 =================
+def network_status():
+    """
+    查询网络的 /api/health。
+    返回已注册的 Agent（agent_id -> 信息，含 last_seen）；网络尚未就绪时返回 None。
+    """
+    try:
+        with urllib.request.urlopen(NETWORK_HEALTH_URL, timeout=1) as resp:
+            data = json.load(resp).get("data") or {}
+    except (OSError, ValueError):
+        return None
+    if not data.get("is_running"):
+        return None
+    return data.get("agents") or {}
+
+
+def port_open(port: int, host: str = "127.0.0.1") -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def coordinator_request(method: str, path: str, admin_port: int = COORDINATOR_PORT):
+    """调用协调器的 HTTP 接口，失败时返回 None"""
+    request = urllib.request.Request(f"http://127.0.0.1:{admin_port}{path}", method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=2) as resp:
+            return json.load(resp)
+    except (OSError, ValueError):
+        return None
+
+
+def gateway_pid():
+    """应答网关端口的进程 PID（滚动重启时新旧网关共用端口），失败时返回 None"""
+    return (coordinator_request("GET", "/stats", GATEWAY_PORT) or {}).get("pid")
+
+
+def wait_until(check, timeout: float, interval: float = 0.1) -> bool:
+    """轮询 check() 直到为真或超时"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if check():
+            return True
+        time.sleep(interval)
+    return False
+
+
+def enable_gateway_env():
+    """
+    将 Agent 的 LLM 地址指向本地网关，原地址与 API Key 交给网关作为上游。
+    """
+    ENV["GATEWAY_UPSTREAM_URL"] = ENV["DEFAULT_LLM_BASE_URL"]
+    ENV["GATEWAY_UPSTREAM_API_KEY"] = ENV["DEFAULT_LLM_API_KEY"]
+    ENV["DEFAULT_LLM_BASE_URL"] = GATEWAY_URL
+    print(f"🔀 [Gateway] Agents -> {GATEWAY_URL} -> {ENV['GATEWAY_UPSTREAM_URL']}")
+
 
 # ================= 进程管理类 =================
 class ProcessManager:
@@ -133,13 +251,15 @@ class ProcessManager:
     def __init__(self):
         self.processes: dict[str, subprocess.Popen] = {}
         self.info: list[dict] = []
+        # --cohost：在 student_host 进程中一起运行的 Agent YAML
+        self.cohosted: list[str] = []
 
     def _get_log_path(self, name: str) -> Path:
         """生成带时间戳的日志文件路径"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         return LOG_DIR / f"{name}_{timestamp}.log"
 
-    def _popen_to_log(self, cmd: list[str], cwd: str, log_path: Path) -> subprocess.Popen:
+    def _popen_to_log(self, cmd: list[str], cwd: str, log_path: Path, env: dict = None) -> subprocess.Popen:
         """启动子进程并重定向输出到日志文件"""
         log_file = open(log_path, "w", encoding="utf-8")
         
@@ -148,7 +268,7 @@ class ProcessManager:
             "cwd": cwd,
             "stdout": log_file,
             "stderr": subprocess.STDOUT,
-            "env": ENV,
+            "env": env or ENV,
         }
 
         if IS_WINDOWS:
@@ -165,7 +285,7 @@ class ProcessManager:
         if not NETWORK_DIR.exists():
             raise ValueError(f"网络目录不存在: {NETWORK_DIR}")
 
-        cmd = [OPENAGENTS_EXE, "network", "start", str(NETWORK_DIR)]
+        cmd = [openagents_exe(), "network", "start", str(NETWORK_DIR)]
         log_file = self._get_log_path("network")
         proc = self._popen_to_log(cmd, cwd=str(NETWORK_DIR), log_path=log_file)
 
@@ -183,12 +303,17 @@ class ProcessManager:
         if not yaml_file.exists():
             raise ValueError(f"Agent 配置不存在: {yaml_file}")
 
-        cmd = [OPENAGENTS_EXE, "agent", "start", str(yaml_file)]
+        cmd = [openagents_exe(), "agent", "start", str(yaml_file)]
         
         # === 修复点：使用 yaml_file.stem 而不是 yaml_name.stem ===
         log_file = self._get_log_path(f"agent_{yaml_file.stem}")
-        
-        proc = self._popen_to_log(cmd, cwd=str(SCRIPT_DIR), log_path=log_file)
+
+        env = None
+        if ENV.get("DEFAULT_LLM_BASE_URL") == GATEWAY_URL:
+            # 经由网关时，每个 Agent 使用独立的 key，网关据此进行公平排队
+            env = {**ENV, "DEFAULT_LLM_API_KEY": yaml_file.stem}
+
+        proc = self._popen_to_log(cmd, cwd=str(SCRIPT_DIR), log_path=log_file, env=env)
 
         self.processes[f"agent_{yaml_file.stem}"] = proc
         self.info.append({
@@ -196,6 +321,42 @@ class ProcessManager:
             "cwd": str(SCRIPT_DIR), "status": "running"
         })
 
+    def start_student_host(self, yaml_names: list[str]):
+        """在同一个进程中启动多个 Agent（agents/student_host.py）"""
+        for yaml_name in yaml_names:
+            if not (SCRIPT_DIR / yaml_name).exists():
+                raise ValueError(f"Agent 配置不存在: {SCRIPT_DIR / yaml_name}")
+
+        cmd = [sys.executable, str(SCRIPT_DIR / "student_host.py"), *yaml_names]
+        log_file = self._get_log_path("student_host")
+
+        env = None
+        if ENV.get("DEFAULT_LLM_BASE_URL") == GATEWAY_URL:
+            # 与单独启动时一样，同一进程内的每个 Agent 以自己的 agent_id 作为 key，网关按 Agent 公平排队
+            env = {**ENV, "DEFAULT_LLM_API_KEY": "student-host", "LLM_KEY_PER_AGENT": "1"}
+
+        proc = self._popen_to_log(cmd, cwd=str(SCRIPT_DIR), log_path=log_file, env=env)
+
+        self.cohosted = list(yaml_names)
+        self.processes["student_host"] = proc
+        self.info.append({
+            "type": "student_host", "pid": proc.pid, "log": str(log_file),
+            "cwd": str(SCRIPT_DIR), "agents": [Path(y).stem for y in yaml_names], "status": "running"
+        })
+
+    def start_gateway(self):
+        """启动本地 LLM 网关"""
+        gateway_script = TOOLS_DIR / "llm_gateway.py"
+        cmd = [sys.executable, str(gateway_script), "--port", str(GATEWAY_PORT)]
+        log_file = self._get_log_path("gateway")
+        proc = self._popen_to_log(cmd, cwd=str(NETWORK_DIR), log_path=log_file)
+
+        self.processes["gateway"] = proc
+        self.info.append({
+            "type": "gateway", "pid": proc.pid, "log": str(log_file),
+            "cwd": str(NETWORK_DIR), "status": "running"
+        })
+
     def start_script(self, script_name: str):
         """运行本地 Python 脚本"""
         target_script = SCRIPT_DIR / script_name
@@ -212,46 +373,150 @@ class ProcessManager:
             "cwd": str(SCRIPT_DIR), "status": "running"
         })
 
-    def stop_all(self):
-        """停止所有子进程并清理残留"""
-        print("[ProcessManager] 正在停止所有服务...")
-
-        # 1. 优先级最高：Windows 下向进程组发送 CTRL_BREAK_EVENT
-        # 这会杀死整个进程树，非常高效
+    def _signal_group(self, proc: subprocess.Popen, sig) -> bool:
+        """向子进程所在的整个进程组发送信号，进程组已不存在时返回 False"""
+        try:
+            if IS_WINDOWS:
+                if sig == SIGKILL:
+                    # /T 结束整个进程树
+                    subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                else:
+                    proc.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                # 子进程通过 os.setsid 成为组长，进程组 ID 即其 PID
+                os.killpg(proc.pid, sig)
+            return True
+        except (ProcessLookupError, OSError):
+            return False
+
+    def _group_alive(self, proc: subprocess.Popen) -> bool:
+        """进程组内是否还有存活的进程"""
+        proc.poll()  # 回收已退出的组长，避免僵尸进程被视为存活
         if IS_WINDOWS:
+            return proc.returncode is None
+        try:
+            os.killpg(proc.pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+    def _stop(self, names: list[str], timeout: float) -> list[str]:
+        """
+        同时向 names 对应的进程组发送终止信号，在同一个期限内并发等待，
+        期限过后仍未退出的进程组逐个强制结束。返回被强制结束的名称。
+        """
+        started = time.monotonic()
+        procs = {name: self.processes[name] for name in names if name in self.processes}
+
+        # 1. 同时通知所有进程组
+        pending = {name: proc for name, proc in procs.items() if self._signal_group(proc, STOP_SIGNAL)}
+
+        # 2. 共用一个期限等待全部退出
+        deadline = started + timeout
+        while pending and time.monotonic() < deadline:
+            pending = {name: proc for name, proc in pending.items() if self._group_alive(proc)}
+            if pending:
+                time.sleep(0.05)
+
+        # 3. 仍未退出的进程组强制结束
+        for name, proc in pending.items():
+            print(f"[ProcessManager] ⚠️ {name} (PID {proc.pid}) 未在 {timeout:g}s 内退出，强制结束")
+            self._signal_group(proc, SIGKILL)
+        for proc in pending.values():
             try:
-                os.kill(os.getpid(), signal.CTRL_BREAK_EVENT)
-                time.sleep(0.5) # 给系统一点时间处理信号
-            except Exception:
+                proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
                 pass
 
-        # 2. 正常停止记录在案的进程
-        for name, proc in self.processes.items():
-            try:
-                if proc.poll() is None: # 如果进程还在运行
-                    proc.terminate()
-                    try:
-                        proc.wait(timeout=2)
-                    except subprocess.TimeoutExpired:
-                        proc.kill()
-            except Exception:
-                pass
+        for name, proc in procs.items():
+            del self.processes[name]
+            self.info = [entry for entry in self.info if entry["pid"] != proc.pid]
+        return list(pending)
 
-        # 3. 防御性清理：遍历所有进程杀死特定的孤儿进程
-        targets = ['weather_connector.py', 'travel_coordinator.py']
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                cmdline = ' '.join(proc.info['cmdline'] or [])
-                for target in targets:
-                    if target in cmdline:
-                        print(f"[ProcessManager] 清理残留进程 {proc.info['pid']} ({target})")
-                        proc.kill()
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                pass
+    def stop_all(self, timeout: float = STOP_TIMEOUT):
+        """停止所有子进程，只处理本启动器创建的进程组"""
+        started = time.monotonic()
+        print("[ProcessManager] 正在停止所有服务...")
+        count = len(self.processes)
+        killed = self._stop(list(self.processes), timeout)
+
+        elapsed = time.monotonic() - started
+        summary = f"[ProcessManager] 已停止 {count} 个服务，用时 {elapsed:.2f}s"
+        if killed:
+            summary += f"（其中 {len(killed)} 个被强制结束）"
+        print(summary)
 
         self.processes.clear()
         self.info.clear()
 
+    def restart_gateway(self) -> bool:
+        """
+        重启 LLM 网关（上游地址或 API Key 变化后）。
+        网关只有一个实例：支持 SO_REUSEPORT 时先启动新网关与旧网关共用端口，确认新网关已在应答后再停止旧网关；
+        旧网关收到停止信号后不再接受连接，处理完进行中的请求（最多 RELOAD_DRAIN_TIMEOUT 秒）再退出。
+        新网关未能就绪时保留旧网关。不支持 SO_REUSEPORT（Windows）时只能先停后启，期间 Agent 的 LLM 请求会失败。
+        """
+        if not hasattr(socket, "SO_REUSEPORT"):
+            self._stop(["gateway"], STOP_TIMEOUT)
+            self.start_gateway()
+            return wait_until(lambda: port_open(GATEWAY_PORT), GATEWAY_READY_TIMEOUT)
+
+        self.processes["gateway_old"] = self.processes.pop("gateway")
+        self.start_gateway()
+        new_pid = self.processes["gateway"].pid
+        # 新旧网关同时监听时连接会分到两边，直到某次请求由新网关应答
+        if not wait_until(lambda: gateway_pid() == new_pid, GATEWAY_READY_TIMEOUT):
+            print(f"⚠️  [Reload] 新网关未在 {GATEWAY_READY_TIMEOUT}s 内就绪，继续使用旧网关")
+            self._stop(["gateway"], STOP_TIMEOUT)
+            self.processes["gateway"] = self.processes.pop("gateway_old")
+            return False
+        self._stop(["gateway_old"], RELOAD_DRAIN_TIMEOUT)
+        return True
+
+    def restart_agent(self, yaml_name: str, admin_port: int = COORDINATOR_PORT) -> bool:
+        """
+        滚动重启单个 Agent：
+        通知协调器暂停向其委派 -> 等待手上的任务完成 -> 停止 -> 启动 -> 等待重新注册 -> 通知协调器恢复
+        共同托管（--cohost）的 Agent 位于同一进程，整个 student_host 进程一起重启。
+        """
+        if yaml_name in self.cohosted:
+            yaml_names = list(self.cohosted)
+            return self._rolling_restart([Path(y).stem for y in yaml_names], "student_host",
+                                         lambda: self.start_student_host(yaml_names), admin_port)
+        agent_id = Path(yaml_name).stem
+        return self._rolling_restart([agent_id], f"agent_{agent_id}",
+                                     lambda: self.start_agent(yaml_name), admin_port)
+
+    def _rolling_restart(self, agent_ids: list[str], name: str, start, admin_port: int) -> bool:
+        for agent_id in agent_ids:
+            if coordinator_request("POST", f"/agents/{agent_id}/unavailable", admin_port) is None:
+                print(f"⚠️  [Reload] 无法通知协调器，直接重启 {agent_id}")
+
+        def drained():
+            state = coordinator_request("GET", "/agents", admin_port)
+            return state is None or not any(state["in_flight"].get(agent_id) for agent_id in agent_ids)
+
+        if not wait_until(drained, RELOAD_DRAIN_TIMEOUT, interval=0.5):
+            print(f"⚠️  [Reload] {', '.join(agent_ids)} 的任务未在 {RELOAD_DRAIN_TIMEOUT:g}s 内完成，仍继续重启")
+
+        self._stop([name], STOP_TIMEOUT)
+        stopped_at = time.time()
+        start()
+
+        # 旧进程的注册信息可能仍留在网络中，以 last_seen 晚于停止时间判断新进程已注册
+        def is_registered():
+            agents = network_status() or {}
+            return all(agents.get(agent_id, {}).get("last_seen", 0) > stopped_at for agent_id in agent_ids)
+
+        ok = wait_until(is_registered, AGENT_READY_TIMEOUT, interval=0.2)
+
+        for agent_id in agent_ids:
+            coordinator_request("POST", f"/agents/{agent_id}/available", admin_port)
+        return ok
+
     def get_status_json(self) -> str:
         """获取进程状态 JSON"""
         return json.dumps(self.info, ensure_ascii=False, indent=2)
@@ -260,8 +525,106 @@ class ProcessManager:
 manager = ProcessManager()
 
 
+# ================= 热重载 =================
+class ConfigWatcher:
+    """轮询文件修改时间；内容确实变化、且已静置 WATCH_SETTLE 秒后才报告"""
+
+    def __init__(self, paths: list[Path]):
+        self.state = {path: self._snapshot(path) for path in paths}
+
+    @staticmethod
+    def _snapshot(path: Path):
+        try:
+            return path.stat().st_mtime, hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            return None, None
+
+    def changed(self) -> list[Path]:
+        changed = []
+        for path, (mtime, digest) in self.state.items():
+            try:
+                current_mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            if current_mtime == mtime or time.time() - current_mtime < WATCH_SETTLE:
+                continue
+            self.state[path] = self._snapshot(path)
+            if self.state[path][1] != digest:
+                changed.append(path)
+        return changed
+
+
+def validate_config(path: Path):
+    """重启前先校验文件，返回错误信息；无误时返回 None"""
+    try:
+        text = path.read_text(encoding="utf-8")
+        if path.suffix == ".json":
+            json.loads(text)
+        else:
+            import yaml  # openagents 的依赖，仅热重载时需要
+            yaml.safe_load(text)
+    except Exception as e:
+        return str(e)
+    return None
+
+
+def reload_configs(changed: list[Path], args, llm_config: dict) -> dict:
+    """
+    根据变化的文件决定重启范围并逐个滚动重启，网络与协调器保持运行。
+    返回最新的 LLM 配置。
+    """
+    admin_port = COORDINATOR_ADMIN_PORT if args.frontend_workers > 0 else COORDINATOR_PORT
+    restart = []
+    for path in changed:
+        error = validate_config(path)
+        if error:
+            print(f"⚠️  [Reload] {path.name} 无效，保持当前配置: {error}")
+            continue
+        print(f"🔄 [Reload] 检测到 {path.name} 已修改")
+
+        if path == LLM_CONFIG_FILE:
+            new_config = load_llm_config_and_set_env()
+            changed_keys = {k for k in new_config.keys() | llm_config.keys() if new_config.get(k) != llm_config.get(k)}
+            llm_config = new_config
+            if args.gateway:
+                enable_gateway_env()
+                if changed_keys & GATEWAY_ONLY_KEYS:
+                    print("🔄 [Reload] 重启 LLM 网关...")
+                    if manager.restart_gateway():
+                        print("✅ [Reload] LLM 网关已切换")
+                # 经由网关的 Agent 只连接网关，上游地址与 Key 变化不影响它们
+                changed_keys -= GATEWAY_ONLY_KEYS
+            if changed_keys:
+                restart += [f"{name[len('agent_'):]}.yaml" for name in manager.processes if name.startswith("agent_")]
+                restart += manager.cohosted[:1]
+        else:
+            restart.append(path.name)
+
+    # 共同托管的 Agent 同在一个进程中，无论改了几个 YAML 都只重启一次
+    cohosted = [y for y in restart if y in manager.cohosted]
+    restart = [y for y in restart if y not in manager.cohosted] + cohosted[:1]
+
+    for yaml_name in dict.fromkeys(restart):
+        label = "student_host" if yaml_name in manager.cohosted else Path(yaml_name).stem
+        print(f"🔄 [Reload] 滚动重启 {label}...")
+        started = time.monotonic()
+        if manager.restart_agent(yaml_name, admin_port):
+            print(f"✅ [Reload] {label} 已重新注册，用时 {time.monotonic() - started:.1f}s")
+        else:
+            print(f"⚠️  [Reload] {label} 未在 {AGENT_READY_TIMEOUT}s 内重新注册")
+    return llm_config
+
+
 # ================= 退出信号处理 =================
+_stopping = False
+
+
 def cleanup(signum=None, frame=None):
+    global _stopping
+    if _stopping:
+        # 停止过程中再次收到信号（如连按 Ctrl+C）时不重复清理
+        return
+    _stopping = True
     print("\n[Manager] 收到退出信号，正在清理...")
     manager.stop_all()
     print("[Manager] 已停止。")
@@ -276,7 +639,7 @@ if hasattr(signal, "SIGINT"):
 
 # ================= 主入口 =================
 def _print_banner():
-    print(f"[Info] OpenAgents: {OPENAGENTS_EXE}")
+    print(f"[Info] OpenAgents: {openagents_exe()}")
     print(f"[Info] Network Dir: {NETWORK_DIR}")
     print(f"[Info] Log Dir: {LOG_DIR}")
 
@@ -297,15 +660,128 @@ def _print_usage_example():
     print("=" * 60)
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python launcher.py <all>")
-        sys.exit(1)
+def profile_readiness(agent_ids: list[str]):
+    """--profile-startup：等待所有 Agent 注册、8888 开始监听，然后输出时间线"""
+    pending = set(agent_ids)
+    http_ready = False
+    deadline = time.monotonic() + PROFILE_READY_TIMEOUT
+    while (pending or not http_ready) and time.monotonic() < deadline:
+        registered = network_status() or {}
+        for agent_id in sorted(pending & registered.keys()):
+            mark(f"registered: {agent_id}")
+            pending.discard(agent_id)
+        if not http_ready and port_open(COORDINATOR_PORT):
+            mark(f"HTTP listening on :{COORDINATOR_PORT}")
+            http_ready = True
+        time.sleep(0.1)
+
+    for agent_id in sorted(pending):
+        print(f"⚠️  [Profile] {agent_id} 在 {PROFILE_READY_TIMEOUT}s 内未注册")
+    if not http_ready:
+        print(f"⚠️  [Profile] {COORDINATOR_PORT} 端口在 {PROFILE_READY_TIMEOUT}s 内未开始监听")
+
+    # 协调器在开始监听后写出自己的时间线，稍等片刻再读取
+    wait_until(lambda: load_timeline(LOG_DIR, "weather-connector") is not None, timeout=2)
+    coordinator = load_timeline(LOG_DIR, "weather-connector")
+    if coordinator:
+        TIMELINE.merge(coordinator)
+
+    print("\n" + TIMELINE.report())
+    print(f"💾 [Profile] 已保存到 {TIMELINE.save(LOG_DIR)}")
+
+
+def report_warmup(admin_port: int):
+    """--warmup：协调器预热完成后才开始监听 8888，等到端口可用再输出各项耗时"""
+    print("\n🔥 [Warm-up] 等待协调器预热...")
+    started = time.monotonic()
+    if not wait_until(lambda: port_open(COORDINATOR_PORT), WARMUP_TIMEOUT + NETWORK_READY_TIMEOUT, interval=0.2):
+        print(f"⚠️  [Warm-up] 协调器未在 {WARMUP_TIMEOUT + NETWORK_READY_TIMEOUT:g}s 内就绪")
+        return
+    mark("warm-up done")
+
+    report = (coordinator_request("GET", "/stats", admin_port) or {}).get("warmup")
+    if not report:
+        print(f"✅ [Warm-up] 协调器已就绪，用时 {time.monotonic() - started:.1f}s")
+        return
+    for name, result in [*report["agents"].items(), *report["cities"].items()]:
+        icon = "✅" if result["status"] == "ok" else "⚠️"
+        print(f"  {icon} {name:<22} {result['seconds']:>7.2f}s  {result['status']}")
+    print(f"🔥 [Warm-up] 完成，预热用时 {report['total_s']:.1f}s")
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Travel Guide Network 启动器")
+    parser.add_argument("command", help="启动命令，目前支持 'all'")
+    parser.add_argument(
+        "--combined", action="store_true",
+        help="启动 combined-student，并让协调器默认使用单次合并生成模式"
+    )
+    parser.add_argument(
+        "--gateway", action="store_true",
+        help="启动本地 LLM 网关（并发限制、公平排队、响应缓存），所有 Agent 经由网关访问 LLM"
+    )
+    parser.add_argument(
+        "--frontend-workers", type=int, default=0, metavar="N",
+        help="用 N 个前端进程通过 SO_REUSEPORT 共享 8888 端口（仅 Linux/macOS）"
+    )
+    parser.add_argument(
+        "--cohost", action="store_true",
+        help="在同一个进程中运行所有学院 Agent（共用事件循环与 LLM 客户端），减少内存占用与启动时间"
+    )
+    parser.add_argument(
+        "--warmup", action="store_true",
+        help="就绪前预热：等学院 Agents 注册后，由协调器向每个学生发送一个小任务并等待完成"
+    )
+    parser.add_argument(
+        "--warmup-cities", default="", metavar="CITY,CITY",
+        help="预热时一并预取这些城市今天的天气（逗号分隔，需配合 --warmup）"
+    )
+    parser.add_argument(
+        "--trace", choices=("jsonl", "otlp"), metavar="jsonl|otlp",
+        help="按 project_id 导出每个请求的分布式追踪：jsonl 写 logs/traces.jsonl，otlp 发往本地 collector"
+    )
+    parser.add_argument(
+        "--trace-sample", type=float, default=1.0, metavar="RATE",
+        help="追踪采样率 0~1（按请求采样，默认 1）"
+    )
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="记录启动时间线（导入、配置、网络就绪、各 Agent 注册、HTTP 监听），保存到 logs/"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="监视 llm_config.json 与 Agent YAML，修改后只滚动重启受影响的 Agent"
+    )
+    return parser.parse_args()
 
-    cmd_type = sys.argv[1]
 
-    load_llm_config_and_set_env()
-    
+def main():
+    global TIMELINE
+    args = _parse_args()
+    cmd_type = args.command
+
+    if args.profile_startup:
+        TIMELINE = StartupTimeline("launch", origin=_LAUNCH_STARTED_AT)
+        TIMELINE.mark("imports done", at=_IMPORTS_DONE_AT)
+        # 子进程使用同一起点，并把各自的时间线写到 logs/
+        ENV[ORIGIN_ENV] = repr(_LAUNCH_STARTED_AT)
+        ENV[PROFILE_DIR_ENV] = str(LOG_DIR)
+        (LOG_DIR / "startup_weather-connector.json").unlink(missing_ok=True)
+
+    llm_config = load_llm_config_and_set_env()
+    if args.combined:
+        ENV["WORKFLOW_MODE"] = "combined"
+    if args.gateway:
+        enable_gateway_env()
+    if args.frontend_workers > 0:
+        ENV["FRONTEND_WORKERS"] = str(args.frontend_workers)
+    if args.trace:
+        ENV["TRACE_EXPORTER"] = args.trace
+        ENV["TRACE_SAMPLE_RATE"] = str(args.trace_sample)
+        if not args.cohost:
+            print("ℹ️  [Trace] 学生端 span 需配合 --cohost，当前只导出协调器的 span")
+    mark("config loaded")
+
     _print_banner()
 
     if cmd_type == "all":
@@ -313,34 +789,65 @@ def main():
         print("🚀 启动完整系统")
         print("=" * 60)
 
-        # 1. 启动网络
+        # 1. 启动网络，等到 /api/health 可用再继续
         print("\n📡 [1/3] 启动网络...")
         manager.start_network()
-        time.sleep(1)  # 间隔1秒
-
-        # 2. 启动四个学院学生
-        print("\n🏰 [2/3] 启动学院 Agents...")
-        
-        print("  🦁 启动 Gryffindor...")
-        manager.start_agent("gryffindor-student.yaml")
-        time.sleep(1)
+        mark("network process spawned")
+        if wait_until(lambda: network_status() is not None, NETWORK_READY_TIMEOUT):
+            mark("network up")
+        else:
+            print(f"⚠️  网络在 {NETWORK_READY_TIMEOUT}s 内未就绪，继续启动 Agents...")
 
-        print("  🐍 启动 Slytherin...")
-        manager.start_agent("slytherin-student.yaml")
-        time.sleep(1)
+        if args.gateway:
+            print("\n🔀 启动 LLM 网关...")
+            manager.start_gateway()
 
-        print("  🦅 启动 Ravenclaw...")
-        manager.start_agent("ravenclaw-student.yaml")
-        time.sleep(1)
+        # 2. 启动学院学生：各自独立连接网络，无需逐个等待
+        print("\n🏰 [2/3] 启动学院 Agents...")
+        students = [
+            ("🦁", "Gryffindor", "gryffindor-student.yaml"),
+            ("🐍", "Slytherin", "slytherin-student.yaml"),
+            ("🦅", "Ravenclaw", "ravenclaw-student.yaml"),
+            ("🦡", "Hufflepuff", "hufflepuff-student.yaml"),
+        ]
+        if args.combined:
+            students.append(("🏰", "Combined (四学院合并)", "combined-student.yaml"))
+        if args.cohost:
+            print(f"  🏰 在同一进程中启动 {', '.join(label for _, label, _ in students)}...")
+            manager.start_student_host([yaml_name for _, _, yaml_name in students])
+        else:
+            for icon, label, yaml_name in students:
+                print(f"  {icon} 启动 {label}...")
+                manager.start_agent(yaml_name)
+        mark("student agents spawned")
+
+        # 协调器一启动就接收请求，先等所有学生注册（最多 AGENT_READY_TIMEOUT 秒），
+        # 以免早到的请求委派给尚未上线的学生
+        student_ids = [Path(y).stem for _, _, y in students]
+        if wait_until(lambda: set(student_ids) <= (network_status() or {}).keys(), AGENT_READY_TIMEOUT):
+            mark("student agents registered")
+        else:
+            missing = sorted(set(student_ids) - (network_status() or {}).keys())
+            print(f"⚠️  学院 Agents 未在 {AGENT_READY_TIMEOUT}s 内全部注册（{', '.join(missing)}），"
+                  f"继续启动天气连接器{'，未注册的预热会失败' if args.warmup else ''}")
 
-        print("  🦡 启动 Hufflepuff...")
-        manager.start_agent("hufflepuff-student.yaml")
-        time.sleep(1)
+        if args.warmup:
+            # 在注册等待之上，协调器启动时再预热各学生与城市天气
+            ENV["WARMUP"] = "1"
+            ENV["WARMUP_AGENTS"] = ",".join(student_ids)
+            ENV["WARMUP_CITIES"] = args.warmup_cities
+            ENV["WARMUP_TIMEOUT"] = str(WARMUP_TIMEOUT)
 
         # 3. 启动天气连接器
         print("\n🌤️  [3/3] 启动天气连接器...")
         manager.start_script("weather_connector.py")
-        time.sleep(1)
+        mark("weather_connector spawned")
+
+        if TIMELINE:
+            profile_readiness([Path(y).stem for _, _, y in students] + ["weather-connector"])
+
+        if args.warmup:
+            report_warmup(COORDINATOR_ADMIN_PORT if args.frontend_workers > 0 else COORDINATOR_PORT)
 
         # Studio 启动选项（根据需求决定是否取消注释）
         # print("\n🖥️  [4/6] 启动 Studio...")
@@ -357,9 +864,18 @@ def main():
     print(manager.get_status_json())
     print("<<<END_INFO>>>")
 
+    watcher = None
+    if args.watch:
+        watcher = ConfigWatcher([LLM_CONFIG_FILE] + [SCRIPT_DIR / yaml_name for _, _, yaml_name in students])
+        print(f"👀 [Reload] 正在监视 {len(watcher.state)} 个配置文件")
+
     try:
         while True:
-            pass
+            time.sleep(WATCH_INTERVAL)
+            if watcher:
+                changed = watcher.changed()
+                if changed:
+                    llm_config = reload_configs(changed, args, llm_config)
     except KeyboardInterrupt:
         cleanup()
 
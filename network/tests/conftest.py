@@ -0,0 +1,16 @@
+"""
+pytest 公共设置
+让测试可以导入 tools / agents / benchmarks 下的模块，并关闭会写磁盘的功能（需在导入被测模块之前设置）。
+运行: python -m pytest -q tests   （在 network/ 目录下）
+"""
+import os
+import sys
+
+NETWORK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for sub in ("benchmarks", "agents", ""):
+    sys.path.insert(0, os.path.join(NETWORK_DIR, sub))
+
+os.environ["WORKFLOW_JOURNAL"] = ""
+os.environ["WEATHER_HISTORY_DIR"] = ""
+os.environ["DELEGATION_INTERVAL_SECONDS"] = "0"
+os.environ.pop("TRACE_EXPORTER", None)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+模拟的 OpenAI 兼容 LLM 上游，用于离线测试 tools/llm_gateway.py
+用法: python fake_llm_server.py [端口] [每次响应延迟秒数]
+"""
+import asyncio
+import json
+import sys
+import time
+from aiohttp import web
+
+request_count = 0
+
+
+def _reply_text(payload: dict) -> str:
+    messages = payload.get("messages") or [{}]
+    last = str(messages[-1].get("content", ""))
+    return f"[fake-llm] 收到 {len(messages)} 条消息，最后一条: {last[:40]}"
+
+
+async def handle_chat(request):
+    """处理 /v1/chat/completions，支持普通与流式响应"""
+    global request_count
+    request_count += 1
+    payload = await request.json()
+    await asyncio.sleep(request.app["delay"])
+
+    text = _reply_text(payload)
+    created = int(time.time())
+    model = payload.get("model", "fake-model")
+
+    if payload.get("stream"):
+        resp = web.StreamResponse()
+        resp.content_type = "text/event-stream"
+        await resp.prepare(request)
+        for piece in (text[:len(text) // 2], text[len(text) // 2:]):
+            chunk = {"id": f"chatcmpl-{request_count}", "object": "chat.completion.chunk", "created": created,
+                     "model": model, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            await resp.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+        return resp
+
+    return web.json_response({
+        "id": f"chatcmpl-{request_count}",
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+    })
+
+
+async def handle_models(request):
+    return web.json_response({"object": "list", "data": [{"id": "fake-model", "object": "model"}]})
+
+
+async def handle_stats(request):
+    return web.json_response({"requests": request_count})
+
+
+def build_app(delay: float) -> web.Application:
+    app = web.Application()
+    app["delay"] = delay
+    app.router.add_post("/v1/chat/completions", handle_chat)
+    app.router.add_get("/v1/models", handle_models)
+    app.router.add_get("/stats", handle_stats)
+    return app
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 11434
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+
+    app = build_app(delay)
+    print(f"🚀 模拟 LLM 已启动: http://127.0.0.1:{port}/v1 (延迟 {delay}s)")
+    web.run_app(app, host="127.0.0.1", port=port, print=None)
+
+
+if __name__ == "__main__":
+    main()
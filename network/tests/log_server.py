@@ -1,24 +1,66 @@
 #!/usr/bin/env python3
+"""
+日志服务器 / 压测计量端
+- POST /log        接收结果并打印（--quiet 时不打印）
+- GET  /jobs       按 job_id 汇总每个请求的天气报告与学生结果到达时间（启用追踪时附 trace_id）
+- GET  /jobs/{id}  单个请求的汇总
+- POST /reset      清空已记录的数据
+时间戳为 time.time()，与 weather_client.py 在同一主机上运行时可直接相减。
+"""
+import argparse
 import asyncio
+import re
+import time
 from aiohttp import web
 from datetime import datetime
 
+AGENT_LINE = re.compile(r"^Agent: (\S+)", re.MULTILINE)
+
+# job_id -> {"first_at", "weather_at", "results": {agent: t}, "failed": {agent: t}, "trace_id"?}
+jobs = {}
+unmatched = 0
+
+
+def record(job_id: str, content: str, received_at: float, traceparent: str = None):
+    """按内容识别消息类型：第一条无 Agent 行的为天气报告，带 Agent 行的为学生结果"""
+    job = jobs.setdefault(job_id, {"first_at": received_at, "weather_at": None, "results": {}, "failed": {}})
+    if traceparent and not job.get("trace_id"):
+        # traceparent: 00-<trace_id>-<span_id>-<flags>
+        job["trace_id"] = traceparent.split("-")[1] if traceparent.count("-") == 3 else traceparent
+    match = AGENT_LINE.search(content)
+    if match is None:
+        if job["weather_at"] is None:
+            job["weather_at"] = received_at
+        return
+    bucket = "failed" if content.startswith("Task Status:") else "results"
+    job[bucket].setdefault(match.group(1), received_at)
+
+
 async def handle_log(request):
     """处理 /log 路径的 POST 请求"""
+    global unmatched
+    received_at = time.time()
     try:
         # 1. 解析 JSON 数据
         data = await request.json()
-        
+
         agent_id = data.get('agent', 'Unknown')
         content = data.get('content', '')
+        job_id = data.get('job_id')
         timestamp = datetime.now().strftime('%H:%M:%S')
 
+        if job_id:
+            record(job_id, content, received_at, request.headers.get("traceparent"))
+        else:
+            unmatched += 1
+
         # 2. 格式化打印接收到的消息
-        print("\n" + "=" * 60)
-        print(f"📩 [{timestamp}] 收到来自 Agent: {agent_id} 的消息")
-        print("-" * 60)
-        print(content)
-        print("=" * 60 + "\n")
+        if not request.app["quiet"]:
+            print("\n" + "=" * 60)
+            print(f"📩 [{timestamp}] 收到来自 Agent: {agent_id} 的消息" + (f" (job: {job_id})" if job_id else ""))
+            print("-" * 60)
+            print(content)
+            print("=" * 60 + "\n")
 
         # 3. 返回成功响应给发送方
         return web.json_response({"status": "success", "message": "Logged"})
@@ -27,25 +69,49 @@ async def handle_log(request):
         print(f"❌ 处理请求时出错: {e}")
         return web.json_response({"status": "error", "message": str(e)}, status=400)
 
-async def start_server():
+
+async def handle_jobs(request):
+    return web.json_response({"jobs": jobs, "unmatched": unmatched})
+
+
+async def handle_job(request):
+    job = jobs.get(request.match_info["job_id"])
+    if job is None:
+        return web.json_response({"status": "error", "message": "Unknown job"}, status=404)
+    return web.json_response(job)
+
+
+async def handle_reset(request):
+    global unmatched
+    jobs.clear()
+    unmatched = 0
+    return web.json_response({"status": "success"})
+
+
+async def start_server(port: int = 9999, quiet: bool = False):
     """启动日志服务器"""
     app = web.Application()
+    app["quiet"] = quiet
     # 注册路由
     app.router.add_post('/log', handle_log)
+    app.router.add_get('/jobs', handle_jobs)
+    app.router.add_get('/jobs/{job_id}', handle_job)
+    app.router.add_post('/reset', handle_reset)
 
     runner = web.AppRunner(app)
     await runner.setup()
-    
+
     # 绑定到 0.0.0.0:9999
     # 注意：如果你的 weather_connector 和此服务端在同一台机器，可以使用 localhost
-    site = web.TCPSite(runner, '0.0.0.0', 9999)
+    site = web.TCPSite(runner, '0.0.0.0', port)
     await site.start()
 
     print("🚀 日志服务器已启动")
-    print("📍 监听地址: http://0.0.0.0:9999/log")
+    print(f"📍 监听地址: http://0.0.0.0:{port}/log")
+    print(f"📊 计量数据: http://0.0.0.0:{port}/jobs")
     print("📝 等待接收消息...")
     print("   (按 Ctrl+C 停止服务器)")
-    
+
     try:
         # 保持服务器运行
         while True:
@@ -56,4 +122,8 @@ async def start_server():
         await runner.cleanup()
 
 if __name__ == '__main__':
-    asyncio.run(start_server())
+    parser = argparse.ArgumentParser(description="日志服务器 / 压测计量端")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--quiet", action="store_true", help="不打印消息内容，仅记录时间（压测时使用）")
+    args = parser.parse_args()
+    asyncio.run(start_server(args.port, args.quiet))
@@ -0,0 +1,39 @@
+"""benchmarks/run_benchmarks.py：与基线对比时的噪声容差"""
+from run_benchmarks import bench, judge
+
+
+def result(median, low, q1=None, q3=None):
+    r = {"median_s": median, "min_s": low}
+    if q1 is not None:
+        r.update(q1_s=q1, q3_s=q3)
+    return r
+
+
+def test_stable_slowdown_is_regression():
+    base = result(1.0, 0.95, 0.98, 1.02)
+    assert judge(result(1.5, 1.4, 1.48, 1.52), base, 0.2)[3] == "regression"
+
+
+def test_median_within_spread_is_not_regression():
+    # 基线本身的四分位距有中位数的 40%，中位数慢 37% 属于噪声
+    base = result(1.0, 0.7, 0.8, 1.2)
+    change, _, tolerance, verdict = judge(result(1.37, 0.9, 1.3, 1.45), base, 0.2)
+    assert round(change, 2) == 0.37 and tolerance > change
+    assert verdict == ""
+
+
+def test_min_must_also_regress():
+    # 中位数受几轮慢样本拖累，但最快一轮并未变慢
+    base = result(1.0, 0.95, 0.98, 1.02)
+    assert judge(result(1.5, 0.96, 1.45, 1.55), base, 0.2)[3] == ""
+
+
+def test_old_baseline_without_quartiles():
+    assert judge(result(1.3, 1.3), result(1.0, 1.0), 0.2)[3] == "regression"
+    assert judge(result(0.7, 0.7), result(1.0, 1.0), 0.2)[3] == "faster"
+
+
+def test_bench_calibrates_number():
+    r = bench(lambda: None, repeat=3, warmup=0)
+    assert r["number"] > 1 and r["rounds"] == 3
+    assert r["min_s"] <= r["q1_s"] <= r["median_s"] <= r["q3_s"]
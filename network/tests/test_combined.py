@@ -0,0 +1,78 @@
+"""合并模式：combined-student 的结果拆分为四个学院"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import weather_connector
+from fakes import FakeStudentNetwork
+from weather_connector import STUDENT_AGENTS, split_combined_result
+
+ADVICE = {student_id: f"{student_id} 的建议\n第二行" for student_id in STUDENT_AGENTS}
+
+
+@pytest.mark.parametrize("result", [
+    ADVICE,
+    {"value": ADVICE},
+    {student_id: {"text": text} for student_id, text in ADVICE.items()},
+    json.dumps(ADVICE, ensure_ascii=False),
+    "以下是建议：\n" + json.dumps(ADVICE, ensure_ascii=False) + "\n祝旅途愉快",
+    {"value": json.dumps(ADVICE, ensure_ascii=False)},
+], ids=["dict", "value-dict", "per-house-dict", "json-string", "wrapped-string", "value-string"])
+def test_split_combined_result(result):
+    assert split_combined_result(result) == {k: v.strip() for k, v in ADVICE.items()}
+
+
+def test_split_combined_result_partial_and_invalid():
+    partial = {STUDENT_AGENTS[0]: "only one", STUDENT_AGENTS[1]: ""}
+    assert split_combined_result(partial) == {STUDENT_AGENTS[0]: "only one"}
+    assert split_combined_result("not json") == {}
+    assert split_combined_result("{broken") == {}
+    assert split_combined_result(None) == {}
+    assert split_combined_result(["a", "b"]) == {}
+
+
+def test_extract_result_text_never_returns_repr():
+    event = SimpleNamespace(payload={"result": {"advice": "晴天'出游'"}})
+    assert json.loads(weather_connector.WeatherCoordinatorAgent._extract_result_text(event)) == {"advice": "晴天'出游'"}
+
+
+class CombinedNetwork(FakeStudentNetwork):
+    """combined-student 以给定的结果完成任务"""
+
+    def __init__(self, result):
+        super().__init__(latency=0.01)
+        self.result = result
+
+    async def delegate_task(self, assignee_id, description, payload=None, timeout_seconds=300):
+        self.counter += 1
+        task_id = f"combined-{self.counter}"
+        event = SimpleNamespace(event_name="task.notification.completed",
+                                payload={"task_id": task_id, "result": self.result})
+        asyncio.get_running_loop().call_later(self.latency, self.emit, event)
+        return {"success": True, "data": {"task_id": task_id}}
+
+
+class RecordingCoordinator(weather_connector.WeatherCoordinatorAgent):
+    @property
+    def client(self):
+        return self.__dict__.get("_test_client") or super().client
+
+    async def _send_student_result(self, student_id, content, project_id, status="ok"):
+        self.sent.append((student_id, status, content))
+
+
+@pytest.mark.parametrize("result", [ADVICE, json.dumps(ADVICE, ensure_ascii=False)], ids=["dict", "string"])
+def test_combined_path_uploads_four_results(result):
+    network = CombinedNetwork(result)
+    coordinator = RecordingCoordinator()
+    coordinator._test_client = network
+    coordinator.delegation_adapter = network
+    coordinator.sent = []
+
+    asyncio.run(coordinator._run_combined_task("【Beijing 天气报告】", "job-1"))
+
+    assert [(s, status) for s, status, _ in coordinator.sent] == [(s, "ok") for s in STUDENT_AGENTS]
+    for student_id, _, content in coordinator.sent:
+        assert content == f"Agent: {student_id}\n{ADVICE[student_id].strip()}"
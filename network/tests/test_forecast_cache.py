@@ -0,0 +1,123 @@
+"""tools/weather.py：预报解析与网格缓存"""
+import threading
+
+import pytest
+
+from tools import weather
+from tools.weather import ForecastGridCache, parse_daily_forecast
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(weather.time, "monotonic", clock)
+    return clock
+
+
+class Fetcher:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, latitude, longitude, date_str):
+        self.calls.append((latitude, longitude, date_str))
+        return {"temp_max": len(self.calls)}
+
+
+def test_parse_daily_forecast_picks_requested_day():
+    payload = {"daily": {
+        "time": ["2026-01-30", "2026-01-31"],
+        "temperature_2m_max": [10.0, 12.3],
+        "temperature_2m_min": [0.5, 1.4],
+        "weather_code": [1, 3],
+        "precipitation_sum": [0.0, 0.2],
+        "wind_speed_10m_max": [9.1, 14.8],
+    }}
+    assert parse_daily_forecast(payload, "2026-01-31") == {
+        "temp_max": 12.3, "temp_min": 1.4, "weather_code": 3, "precipitation": 0.2, "wind_max": 14.8,
+    }
+    with pytest.raises(ValueError):
+        parse_daily_forecast(payload, "2026-02-01")
+
+
+def test_same_cell_shares_one_forecast_fetched_at_center(clock):
+    cache, fetch = ForecastGridCache(0.1, ttl=60, max_entries=10), Fetcher()
+    first = cache.get_or_fetch(39.904, 116.407, "2026-01-31", fetch)
+    second = cache.get_or_fetch(39.951, 116.432, "2026-01-31", fetch)
+    assert first is second
+    assert fetch.calls == [(39.95, 116.45, "2026-01-31")]
+    assert cache.summary() == {"grid_deg": 0.1, "entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_other_cell_or_date_is_fetched_separately(clock):
+    cache, fetch = ForecastGridCache(0.1, ttl=60, max_entries=10), Fetcher()
+    cache.get_or_fetch(39.904, 116.407, "2026-01-31", fetch)
+    cache.get_or_fetch(39.904, 116.507, "2026-01-31", fetch)
+    cache.get_or_fetch(39.904, 116.407, "2026-02-01", fetch)
+    # 负坐标向下取整，不会与 0 附近的网格合并
+    cache.get_or_fetch(-0.05, -0.05, "2026-01-31", fetch)
+    assert [c[:2] for c in fetch.calls] == [(39.95, 116.45), (39.95, 116.55), (39.95, 116.45), (-0.05, -0.05)]
+
+
+def test_entries_expire_after_ttl(clock):
+    cache, fetch = ForecastGridCache(0.1, ttl=60, max_entries=10), Fetcher()
+    cache.get_or_fetch(39.9, 116.4, "2026-01-31", fetch)
+    clock.now += 59
+    cache.get_or_fetch(39.9, 116.4, "2026-01-31", fetch)
+    clock.now += 2
+    assert cache.get_or_fetch(39.9, 116.4, "2026-01-31", fetch) == {"temp_max": 2}
+
+
+def test_full_cache_evicts_expired_then_oldest(clock):
+    cache, fetch = ForecastGridCache(1.0, ttl=60, max_entries=2), Fetcher()
+    cache.get_or_fetch(0.5, 0.5, "d", fetch)
+    clock.now += 30
+    cache.get_or_fetch(1.5, 1.5, "d", fetch)
+    clock.now += 31  # 第一项已过期
+    cache.get_or_fetch(2.5, 2.5, "d", fetch)
+    assert set(cache.entries) == {((1, 1), "d"), ((2, 2), "d")}
+    cache.get_or_fetch(3.5, 3.5, "d", fetch)  # 都未过期：淘汰最早写入的一项
+    assert set(cache.entries) == {((2, 2), "d"), ((3, 3), "d")}
+
+
+def test_concurrent_lookups_send_one_request():
+    cache = ForecastGridCache(0.1, ttl=60, max_entries=10)
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def slow_fetch(latitude, longitude, date_str):
+        calls.append(date_str)
+        started.set()
+        release.wait(5)
+        return {"temp_max": 1}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch(39.9, 116.4, "d", slow_fetch)))
+               for _ in range(5)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == ["d"] and len(results) == 5
+    assert cache.hits == 4 and cache.misses == 1
+
+
+def test_failed_fetch_is_not_cached_and_next_lookup_retries(clock):
+    cache = ForecastGridCache(0.1, ttl=60, max_entries=10)
+
+    def failing(*args):
+        raise OSError("upstream down")
+
+    with pytest.raises(OSError):
+        cache.get_or_fetch(39.9, 116.4, "d", failing)
+    assert cache.entries == {} and cache._inflight == {}
+    assert cache.get_or_fetch(39.9, 116.4, "d", Fetcher()) == {"temp_max": 1}
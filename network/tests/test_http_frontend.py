@@ -0,0 +1,102 @@
+"""tools/http_request.py 与 tools/http_frontend.py：请求校验、worker 转交 /generate 与转发 /cancel"""
+import asyncio
+import json
+import socket
+import sys
+
+import pytest
+from aiohttp import ClientSession, web
+
+from tools.http_frontend import start_frontend_workers, start_queue_reader
+from tools.http_request import parse_cancel_request, parse_generate_request
+
+OPTIONS = {
+    "modes": ("separate", "combined"),
+    "default_mode": "separate",
+    "priorities": ("interactive", "batch"),
+    "default_priority": "interactive",
+}
+
+
+def test_generate_defaults():
+    params, error = parse_generate_request({"city": "Beijing"}, OPTIONS)
+    assert error is None
+    assert params == {"city": "Beijing", "date": None, "mode": "separate", "deadline": None,
+                      "client_id": None, "priority": "interactive"}
+
+
+@pytest.mark.parametrize("data, message", [
+    ([], "Invalid JSON"),
+    ({}, "Missing 'city'"),
+    ({"city": "Beijing", "mode": "fast"}, "Invalid 'mode': fast"),
+    ({"city": "Beijing", "deadline": 0}, "'deadline' must be a positive number of seconds"),
+    ({"city": "Beijing", "deadline": True}, "'deadline' must be a positive number of seconds"),
+    ({"city": "Beijing", "deadline": "30"}, "'deadline' must be a positive number of seconds"),
+    ({"city": "Beijing", "priority": "urgent"}, "Invalid 'priority': urgent"),
+])
+def test_generate_rejects(data, message):
+    assert parse_generate_request(data, OPTIONS) == (None, message)
+
+
+def test_cancel_requires_target():
+    assert parse_cancel_request({"all": True}) == ({"all": True}, None)
+    assert parse_cancel_request({"job_id": "j1"})[1] is None
+    assert parse_cancel_request({}) == (None, "Missing 'job_id'")
+    assert parse_cancel_request("j1") == (None, "Missing 'job_id'")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="SO_REUSEPORT")
+def test_worker_hands_off_generate_and_relays_cancel_status():
+    async def run():
+        dispatched = asyncio.Queue()
+
+        async def dispatch(kind, job_id, data):
+            await dispatched.put((kind, job_id, data))
+
+        async def cancel(request):
+            if (await request.json()).get("job_id") == "missing":
+                return web.json_response({"status": "error", "message": "Job not found or already finished"},
+                                         status=404)
+            return web.json_response({"status": "ok", "cancelled": {"j1": True}})
+
+        admin = web.Application()
+        admin.router.add_post("/cancel", cancel)
+        runner = web.AppRunner(admin)
+        await runner.setup()
+        admin_port, port = _free_port(), _free_port()
+        await web.TCPSite(runner, "127.0.0.1", admin_port).start()
+
+        listener, workers = start_frontend_workers(1, "127.0.0.1", port, OPTIONS, f"http://127.0.0.1:{admin_port}")
+        start_queue_reader(listener, asyncio.get_running_loop(), dispatch)
+        try:
+            async with ClientSession() as session:
+                for _ in range(200):
+                    try:
+                        async with session.post(f"http://127.0.0.1:{port}/generate", json={"city": "Beijing"}) as r:
+                            accepted = await r.json()
+                        break
+                    except OSError:
+                        await asyncio.sleep(0.05)
+                kind, job_id, params = await asyncio.wait_for(dispatched.get(), 5)
+                assert (kind, job_id, params["city"]) == ("generate", accepted["job_id"], "Beijing")
+
+                async with session.post(f"http://127.0.0.1:{port}/cancel", json={"job_id": "missing"}) as r:
+                    assert r.status == 404
+                async with session.post(f"http://127.0.0.1:{port}/cancel", json={"job_id": "j1"}) as r:
+                    assert (r.status, await r.json()) == (200, {"status": "ok", "cancelled": {"j1": True}})
+                async with session.post(f"http://127.0.0.1:{port}/cancel", data=json.dumps({})) as r:
+                    assert r.status == 400
+        finally:
+            listener.close()
+            for proc in workers:
+                proc.terminate()
+                proc.wait(5)
+            await runner.cleanup()
+
+    asyncio.run(run())
@@ -0,0 +1,132 @@
+"""tools/journal.py：重放、压缩、定期压缩与 fsync 组提交"""
+import json
+import os
+import threading
+import time
+
+from tools import journal as journal_module
+from tools.journal import WorkflowJournal
+
+
+def submit(journal, job_id, **params):
+    journal.record(job_id, "submitted", params={"city": "Beijing", **params}, deadline_at=None)
+
+
+def lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_replay_returns_unfinished_state(tmp_path):
+    journal = WorkflowJournal(str(tmp_path / "j.jsonl"), fsync=False)
+    submit(journal, "a")
+    journal.record("a", "weather", text="晴", mode="separate")
+    journal.record("a", "delegated", agent="gryffindor-student", task_id="t1")
+    journal.record("a", "result", student="gryffindor-student")
+    journal.record("a", "delegated", agent="slytherin-student", task_id="t2")
+    submit(journal, "b")
+    journal.record("b", "cancelled")
+    submit(journal, "c")
+    journal.record("c", "finished")
+
+    unfinished = journal.replay()
+    assert list(unfinished) == ["a"]
+    state = unfinished["a"]
+    assert state["weather"] == "晴" and state["mode"] == "separate"
+    assert state["tasks"] == {"gryffindor-student": "t1", "slytherin-student": "t2"}
+    assert state["results"] == {"gryffindor-student"}
+
+
+def test_replay_orders_by_submission_and_skips_unrecoverable(tmp_path):
+    path = tmp_path / "j.jsonl"
+    journal = WorkflowJournal(str(path), fsync=False)
+    submit(journal, "first")
+    submit(journal, "second")
+    journal.record("orphan", "delegated", agent="x", task_id="t")  # submitted 已被压缩掉
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"t": 1, "job_id": "torn", "ev')  # 崩溃时写了一半的行
+
+    assert list(journal.replay()) == ["first", "second"]
+
+
+def test_compact_keeps_only_unfinished_records(tmp_path):
+    path = tmp_path / "j.jsonl"
+    journal = WorkflowJournal(str(path), fsync=False)
+    submit(journal, "done")
+    journal.record("done", "finished")
+    submit(journal, "open")
+    journal.record("open", "weather", text="雨", mode="separate")
+
+    assert list(journal.compact()) == ["open"]
+    assert [(r["job_id"], r["event"]) for r in lines(path)] == [("open", "submitted"), ("open", "weather")]
+    # 压缩后继续追加
+    journal.record("open", "finished")
+    assert journal.replay() == {}
+
+
+def test_compact_drops_stale_jobs(tmp_path):
+    path = tmp_path / "j.jsonl"
+    journal = WorkflowJournal(str(path), fsync=False)
+    submit(journal, "old")
+    journal.close()
+    records = lines(path)
+    records[0]["t"] = time.time() - 7200
+    path.write_text(json.dumps(records[0]) + "\n", encoding="utf-8")
+    submit(journal, "new")
+
+    assert list(journal.compact(max_age=3600)) == ["new"]
+    assert {r["job_id"] for r in lines(path)} == {"new"}
+
+
+def test_periodic_compaction_bounds_file(tmp_path):
+    path = tmp_path / "j.jsonl"
+    journal = WorkflowJournal(str(path), fsync=False, compact_every=3)
+    submit(journal, "long-running")
+    for i in range(7):
+        submit(journal, f"job{i}")
+        journal.record(f"job{i}", "finished")
+    # 第 6 个工作流结束时压缩过一次，之后只追加了 job6 的两条
+    assert [(r["job_id"], r["event"]) for r in lines(path)] == [
+        ("long-running", "submitted"), ("job6", "submitted"), ("job6", "finished"),
+    ]
+    assert list(journal.replay()) == ["long-running"]
+
+
+def test_concurrent_records_share_one_fsync(tmp_path, monkeypatch):
+    calls = []
+    first_started, release = threading.Event(), threading.Event()
+
+    def slow_fsync(fd):
+        calls.append(fd)
+        if len(calls) == 1:
+            first_started.set()
+            release.wait(5)
+
+    monkeypatch.setattr(journal_module.os, "fsync", slow_fsync)
+    journal = WorkflowJournal(str(tmp_path / "j.jsonl"))
+
+    writers = [threading.Thread(target=submit, args=(journal, "j0"))]
+    writers[0].start()
+    assert first_started.wait(5)
+    # 第一次 fsync 进行中时另有 5 条记录写入，它们应由下一次 fsync 一起落盘
+    for i in range(1, 6):
+        writers.append(threading.Thread(target=submit, args=(journal, f"j{i}")))
+        writers[-1].start()
+    deadline = time.monotonic() + 5
+    while journal._written < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in writers:
+        thread.join(5)
+
+    assert len(calls) == 2
+    assert len(journal.replay()) == 6
+
+
+def test_fsync_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_module.os, "fsync", lambda fd: (_ for _ in ()).throw(AssertionError("fsync")))
+    journal = WorkflowJournal(str(tmp_path / "j.jsonl"), fsync=False)
+    submit(journal, "a")
+    journal.close()
+    assert os.path.getsize(tmp_path / "j.jsonl") > 0
@@ -0,0 +1,141 @@
+"""tools/llm_gateway.py：按客户端轮询排队、响应缓存、合并相同请求"""
+import asyncio
+import socket
+
+import pytest
+from aiohttp import ClientSession, web
+
+import fake_llm_server
+from tools import llm_gateway
+from tools.llm_gateway import FairQueue, LLMGateway, ResponseCache
+
+
+def test_fair_queue_round_robins_between_clients():
+    async def run():
+        queue, order = FairQueue(1), []
+        await queue.acquire("busy")
+
+        async def worker(client, label):
+            await queue.acquire(client)
+            order.append(label)
+            queue.release()
+
+        tasks = []
+        for client, label in (("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1"), ("c", "c1")):
+            tasks.append(asyncio.create_task(worker(client, label)))
+            await asyncio.sleep(0)
+        assert queue.waiting == 5
+        queue.release()
+        await asyncio.gather(*tasks)
+        assert queue.active == 0
+        return order
+
+    # 客户端 a 先排了 3 个请求，也只能与 b、c 轮流放行
+    assert asyncio.run(run()) == ["a1", "b1", "c1", "a2", "a3"]
+
+
+def test_fair_queue_cancelled_waiter_is_removed():
+    async def run():
+        queue = FairQueue(1)
+        await queue.acquire("busy")
+        kept = asyncio.create_task(queue.acquire("a"))
+        dropped = asyncio.create_task(queue.acquire("b"))
+        await asyncio.sleep(0)
+        dropped.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await dropped
+        assert list(queue.waiters) == ["a"] and queue.waiting == 1
+        queue.release()
+        await kept
+        queue.release()
+        assert (queue.active, queue.waiting) == (0, 0)
+
+    asyncio.run(run())
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_gateway.time, "monotonic", clock)
+    return clock
+
+
+def test_cache_entries_expire_after_ttl(clock):
+    cache = ResponseCache(max_size=10, ttl=60)
+    key = ResponseCache.make_key("chat/completions", {"model": "m", "messages": []})
+    cache.put(key, (200, b"{}", "application/json"))
+    clock.now += 59
+    assert cache.get(key) == (200, b"{}", "application/json")
+    clock.now += 2
+    assert cache.get(key) is None and key not in cache.entries
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_least_recently_used(clock):
+    cache = ResponseCache(max_size=2, ttl=60)
+    cache.put("k1", (200, b"1", "application/json"))
+    cache.put("k2", (200, b"2", "application/json"))
+    cache.get("k1")  # k1 变为最近使用
+    cache.put("k3", (200, b"3", "application/json"))
+    assert list(cache.entries) == ["k1", "k3"]
+
+
+def test_cache_key_ignores_field_order():
+    assert ResponseCache.make_key("p", {"a": 1, "b": 2}) == ResponseCache.make_key("p", {"b": 2, "a": 1})
+    assert ResponseCache.make_key("p", {"a": 1}) != ResponseCache.make_key("q", {"a": 1})
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _serve(app) -> tuple:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    port = _free_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner, port
+
+
+def test_identical_concurrent_requests_share_one_upstream_call():
+    async def run():
+        upstream, upstream_port = await _serve(fake_llm_server.build_app(delay=0.3))
+        gateway = LLMGateway(f"http://127.0.0.1:{upstream_port}/v1", max_concurrency=2)
+        runner, port = await _serve(gateway.build_app())
+        payload = {"model": "fake-model", "messages": [{"role": "user", "content": "北京天气"}]}
+        try:
+            async with ClientSession() as session:
+                async def ask(key):
+                    async with session.post(f"http://127.0.0.1:{port}/v1/chat/completions", json=payload,
+                                            headers={"Authorization": f"Bearer {key}"}) as r:
+                        return r.status, await r.json()
+
+                async def upstream_requests():
+                    async with session.get(f"http://127.0.0.1:{upstream_port}/stats") as r:
+                        return (await r.json())["requests"]
+
+                before = await upstream_requests()
+                (status1, body1), (status2, body2) = await asyncio.gather(ask("student-a"), ask("student-b"))
+                assert (status1, status2) == (200, 200) and body1 == body2
+                assert await upstream_requests() - before == 1
+                assert gateway.coalesced == 1
+
+                # 之后相同的请求直接命中缓存
+                assert (await ask("student-c"))[1] == body1
+                assert await upstream_requests() - before == 1
+                assert gateway.cache.hits == 1
+        finally:
+            await runner.cleanup()
+            await upstream.cleanup()
+
+    asyncio.run(run())
@@ -0,0 +1,90 @@
+"""tools/scheduler.py：按优先级加权放行、等待超时、取消"""
+import asyncio
+
+import pytest
+
+from tools.scheduler import PriorityScheduler
+
+
+async def admit_order(scheduler, requests):
+    """先占满名额，再让 requests 依次排队；归还名额后返回实际放行顺序"""
+    order = []
+    await scheduler.acquire("house", "batch")
+
+    async def worker(label, priority):
+        async with scheduler.slot("house", priority):
+            order.append(label)
+
+    tasks = []
+    for label, priority in requests:
+        tasks.append(asyncio.create_task(worker(label, priority)))
+        await asyncio.sleep(0)
+    scheduler.release("house")
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_free_slot_is_taken_immediately():
+    async def run():
+        scheduler = PriorityScheduler(capacity=2)
+        await scheduler.acquire("house", "interactive")
+        await scheduler.acquire("house", "batch")
+        assert scheduler.resources["house"].active == 2
+        scheduler.release("house")
+        scheduler.release("house")
+        assert scheduler.resources["house"].active == 0
+
+    asyncio.run(run())
+
+
+def test_unknown_priority_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(PriorityScheduler().acquire("house", "urgent"))
+
+
+def test_weighted_admission():
+    requests = [(f"b{i}", "batch") for i in range(4)] + [(f"i{i}", "interactive") for i in range(8)]
+    order = asyncio.run(admit_order(PriorityScheduler(), requests))
+    # 权重 4:1：放行 10 次中交互式 8 次、批量 2 次，且同类别内保持先来先放行
+    assert [label[0] for label in order[:10]].count("b") == 2
+    assert [label for label in order if label[0] == "i"] == [f"i{i}" for i in range(8)]
+    assert sorted(order) == sorted(label for label, _ in requests)
+
+
+def test_idle_class_rejoins_at_current_virtual_time():
+    async def run():
+        scheduler = PriorityScheduler()
+        # 只有交互式流量时推进虚拟时间，批量类别一直空闲
+        await admit_order(scheduler, [(f"w{i}", "interactive") for i in range(200)])
+        requests = [(f"b{i}", "batch") for i in range(4)] + [(f"i{i}", "interactive") for i in range(8)]
+        return await admit_order(scheduler, requests)
+
+    order = asyncio.run(run())
+    # 批量请求不能凭借空闲期间停留的低 pass 值连续插队
+    assert order[0] == "i0"
+    assert [label[0] for label in order[:10]].count("b") == 2
+    assert "bb" not in "".join(label[0] for label in order[:10])
+
+
+def test_max_wait_prevents_starvation():
+    weights = {"interactive": 100, "batch": 1}
+    requests = [("b0", "batch")] + [(f"i{i}", "interactive") for i in range(6)]
+    assert asyncio.run(admit_order(PriorityScheduler(weights, max_wait=60), requests))[0] == "i0"
+    # max_wait=0 时按等待时间先来先放行，最早排队的批量请求不会被饿死
+    assert asyncio.run(admit_order(PriorityScheduler(weights, max_wait=0), requests))[0] == "b0"
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def run():
+        scheduler = PriorityScheduler()
+        await scheduler.acquire("house", "batch")
+        waiter = asyncio.create_task(scheduler.acquire("house", "interactive"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.summary()["waiting"]["interactive"] == 0
+        scheduler.release("house")
+        assert scheduler.resources["house"].active == 0
+
+    asyncio.run(run())
@@ -0,0 +1,95 @@
+"""tools/stats.py：百分位与自适应超时"""
+from tools.stats import AdaptiveTimeouts, LatencyWindow, percentile
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 99) == 0.0
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile(range(1, 101), 99) == 99
+    assert percentile([5], 1) == 5
+
+
+def test_latency_window_keeps_last_samples():
+    window = LatencyWindow(size=3)
+    for seconds in (1, 2, 3, 4):
+        window.add(seconds)
+    assert list(window.samples) == [2, 3, 4]
+    assert window.count == 4
+    assert window.summary()["max_ms"] == 4000
+
+
+def make(**kwargs):
+    options = dict(default=120, factor=2.0, floor=20, ceiling=300, min_samples=5)
+    options.update(kwargs)
+    return AdaptiveTimeouts(**options)
+
+
+def test_default_until_enough_samples():
+    timeouts = make()
+    for _ in range(4):
+        timeouts.record("a", 10)
+    assert timeouts.timeout_for("a") == 120
+    timeouts.record("a", 10)
+    assert timeouts.timeout_for("a") == 20  # p99 10s × 2 = 20s
+
+
+def test_clamped_to_floor_and_ceiling():
+    fast, slow = make(), make()
+    for _ in range(5):
+        fast.record("a", 1)
+        slow.record("a", 500)
+    assert fast.timeout_for("a") == 20
+    assert slow.timeout_for("a") == 300
+
+
+def test_timeouts_do_not_ratchet_deadline_up():
+    timeouts = make()
+    for _ in range(5):
+        timeouts.record("a", 30)
+    assert timeouts.timeout_for("a") == 60
+    for _ in range(50):
+        timeouts.record_timeout("a")
+        assert timeouts.timeout_for("a") <= 60
+    assert list(timeouts.windows["a"].samples) == [30] * 5
+
+
+def test_timeouts_never_shrink_below_p99_deadline():
+    timeouts = make()
+    for _ in range(5):
+        timeouts.record("a", 50)
+    for _ in range(10):
+        timeouts.record_timeout("a")
+        assert timeouts.timeout_for("a") == 100
+    summary = timeouts.summary()["a"]
+    assert summary["timeouts"] == 10 and summary["consecutive_timeouts"] == 10
+    timeouts.record("a", 50)
+    assert timeouts.summary()["a"]["consecutive_timeouts"] == 0
+
+
+def test_wedged_agent_without_samples_fails_fast():
+    timeouts = make()
+    timeouts.record_timeout("b")
+    assert timeouts.timeout_for("b") == 60
+    timeouts.record_timeout("b")
+    assert timeouts.timeout_for("b") == 30
+    timeouts.record_timeout("b")
+    assert timeouts.timeout_for("b") == 20  # floor
+    assert timeouts.summary()["b"]["count"] == 0
+
+
+def test_slow_model_recovers_after_timeouts():
+    timeouts = make(probe_every=4)
+    # 前 3 个任务模型卡住，之后恢复但每次需要 45s，比 floor 慢
+    latencies = [float("inf")] * 3 + [45] * 8
+    deadlines = []
+    for seconds in latencies:
+        deadline = timeouts.timeout_for("c")
+        deadlines.append(deadline)
+        if seconds <= deadline:
+            timeouts.record("c", seconds)
+        else:
+            timeouts.record_timeout("c")
+    # 连续 4 次超时后按完整默认期限探测；探测成功后计数清零，不会被锁死在 floor
+    assert deadlines[:6] == [120, 60, 30, 20, 120, 120]
+    assert timeouts.consecutive_timeouts["c"] == 0
+    assert timeouts.timeout_for("c") == 90  # 样本足够后按 p99 45s × 2
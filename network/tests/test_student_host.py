@@ -0,0 +1,46 @@
+"""agents/student_host.py：共享 LLM 客户端，经由网关时按 Agent 区分 key"""
+import asyncio
+
+import pytest
+from openagents.agents import orchestrator, runner
+from openagents.config import llm_configs
+
+import student_host
+
+
+@pytest.fixture
+def created(monkeypatch):
+    """记录实际创建的 provider；测试结束后恢复被替换的 OpenAgents 函数"""
+    calls = []
+
+    async def fake_orchestrate_agent(*args, agent_id=None, **kwargs):
+        await asyncio.sleep(0)  # 让并发的调用交错执行
+        return orchestrator.create_model_provider("openai", "m", api_base="http://gw/v1", api_key="student-host")
+
+    monkeypatch.setattr(llm_configs, "create_model_provider",
+                        lambda provider, model_name, **kwargs: calls.append(kwargs["api_key"]) or object())
+    monkeypatch.setattr(runner, "orchestrate_agent", fake_orchestrate_agent)
+    for module, name in ((orchestrator, "create_model_provider"), (runner, "create_model_provider"),
+                         (runner.AgentRunner, "get_llm")):
+        monkeypatch.setattr(module, name, getattr(module, name))
+    return calls
+
+
+def run_agents(*agent_ids):
+    async def run():
+        return await asyncio.gather(*(runner.orchestrate_agent(agent_id=a) for a in agent_ids))
+    return asyncio.run(run())
+
+
+def test_providers_shared_across_agents(created):
+    student_host.share_model_providers()
+    first, second = run_agents("gryffindor-student", "slytherin-student")
+    assert first is second and created == ["student-host"]
+
+
+def test_key_per_agent(created):
+    student_host.share_model_providers(key_per_agent=True)
+    providers = run_agents("gryffindor-student", "slytherin-student", "gryffindor-student")
+    assert created == ["gryffindor-student", "slytherin-student"]
+    assert providers[0] is providers[2] and providers[0] is not providers[1]
+    assert student_host.current_agent.get() is None
@@ -0,0 +1,149 @@
+"""tools/tracing.py：上下文传递、traceparent、采样与导出"""
+import asyncio
+import contextvars
+import json
+import logging
+import time
+
+import pytest
+
+from tools.tracing import SpanExporter, TraceContextFilter, Tracer, parse_traceparent, set_project_id, to_otlp
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def submit(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def tracer():
+    return Tracer("test", ListExporter())
+
+
+def in_fresh_context(fn):
+    """每个用例在独立的上下文中运行，project_id 等不会泄漏到其他用例"""
+    return contextvars.Context().run(fn)
+
+
+@pytest.mark.parametrize("value", [
+    None, "", "00-abc-def-01", "00-" + "g" * 32 + "-" + "0" * 16 + "-01", "00-" + "0" * 32 + "-" + "0" * 16,
+])
+def test_parse_traceparent_rejects_malformed(value):
+    assert parse_traceparent(value) is None
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(f"00-{'a' * 32}-{'b' * 16}-01") == ("a" * 32, "b" * 16, True)
+    assert parse_traceparent(f"00-{'a' * 32}-{'b' * 16}-00")[2] is False
+
+
+def test_child_spans_follow_context(tracer):
+    with tracer.span("root") as root:
+        with tracer.span("child") as child:
+            pass
+    assert child.trace_id == root.trace_id and child.parent_id == root.span_id
+    assert root.parent_id is None
+    assert [s.name for s in tracer.exporter.spans] == ["child", "root"]
+
+
+def test_context_crosses_tasks_and_threads(tracer):
+    async def run():
+        with tracer.span("workflow") as root:
+            def in_thread():
+                with tracer.span("weather.report") as span:
+                    return span
+
+            async def in_task():
+                with tracer.span("delegate") as span:
+                    return span
+
+            thread_span = await asyncio.to_thread(in_thread)
+            task_span = await asyncio.create_task(in_task())
+        return root, thread_span, task_span
+
+    root, thread_span, task_span = asyncio.run(run())
+    assert thread_span.parent_id == root.span_id and task_span.parent_id == root.span_id
+    assert {thread_span.trace_id, task_span.trace_id} == {root.trace_id}
+
+
+def test_remote_parent_from_traceparent(tracer):
+    with tracer.span("root") as root:
+        header = root.traceparent
+    # 学生进程：没有本地上下文，只有 payload 中的 traceparent
+    student = Tracer("student", ListExporter())
+    span = student.start_span("student.task", header)
+    student.end_span(span)
+    assert (span.trace_id, span.parent_id, span.sampled) == (root.trace_id, root.span_id, True)
+
+
+def test_unsampled_trace_is_not_exported_downstream():
+    tracer = Tracer("test", ListExporter(), sample_rate=0.0)
+    with tracer.span("root") as root:
+        with tracer.span("child"):
+            pass
+    assert tracer.exporter.spans == []
+    assert root.traceparent.endswith("-00")
+    student = Tracer("student", ListExporter(), sample_rate=1.0)
+    student.end_span(student.start_span("student.task", root.traceparent))
+    assert student.exporter.spans == []
+
+
+def test_exception_marks_span_failed(tracer):
+    with pytest.raises(ValueError):
+        with tracer.span("root"):
+            raise ValueError("bad city")
+    assert tracer.exporter.spans[0].to_dict()["status"] == "error"
+    assert tracer.exporter.spans[0].error == "ValueError: bad city"
+
+
+def test_disabled_tracer_is_noop():
+    with Tracer("test").span("root") as span:
+        span.set("k", "v")
+        assert span.traceparent is None
+
+
+def test_project_id_on_spans_and_logs(tracer):
+    def run():
+        set_project_id("manual-Beijing-1")
+        with tracer.span("workflow") as span:
+            record = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", None, None)
+            TraceContextFilter().filter(record)
+        return span, record
+
+    span, record = in_fresh_context(run)
+    assert span.attributes["project_id"] == "manual-Beijing-1"
+    assert (record.project_id, record.trace_id) == ("manual-Beijing-1", span.trace_id)
+
+
+def test_jsonl_export(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = SpanExporter("jsonl", path=str(path))
+    tracer = Tracer("coordinator", exporter)
+    with tracer.span("workflow", city="北京"):
+        pass
+    exporter.flush()
+    # 后台线程可能已取走这批 span，等它写完
+    deadline = time.monotonic() + 5
+    while not (path.exists() and path.read_text(encoding="utf-8")) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    spans = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [(s["name"], s["service"], s["attributes"]["city"]) for s in spans] == [("workflow", "coordinator", "北京")]
+
+
+def test_otlp_payload_groups_by_service():
+    coordinator, student = Tracer("coordinator", ListExporter()), Tracer("student", ListExporter())
+    with coordinator.span("workflow", attempts=2) as root:
+        pass
+    student.end_span(student.start_span("student.task", root.traceparent), error="timeout")
+    payload = to_otlp(coordinator.exporter.spans + student.exporter.spans)
+
+    services = {r["resource"]["attributes"][0]["value"]["stringValue"]: r["scopeSpans"][0]["spans"]
+                for r in payload["resourceSpans"]}
+    assert set(services) == {"coordinator", "student"}
+    workflow, task = services["coordinator"][0], services["student"][0]
+    assert workflow["attributes"] == [{"key": "attempts", "value": {"intValue": "2"}}]
+    assert task["parentSpanId"] == workflow["spanId"] and task["traceId"] == workflow["traceId"]
+    assert task["status"] == {"code": 2, "message": "timeout"}
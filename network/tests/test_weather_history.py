@@ -0,0 +1,178 @@
+"""tools/weather_history.py 与 tools/weather.py 的历史日期路径"""
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from tools import weather
+from tools.weather_history import HistorySeries, WeatherHistoryStore, parse_archive, write_series
+
+BEIJING = (39.9075, 116.3972)
+
+
+def day_values(temp_max, precipitation=0.0, code=3):
+    return {"temp_max": temp_max, "temp_min": temp_max - 10, "weather_code": code,
+            "precipitation": precipitation, "wind_max": 12.5}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return WeatherHistoryStore(str(tmp_path), grid_deg=0.1)
+
+
+def test_series_round_trip_with_gaps(tmp_path):
+    path = str(tmp_path / "s.wxh")
+    write_series(path, *BEIJING, {
+        "2024-07-01": day_values(31.2, 0.4, code=61),
+        "2024-07-04": {"temp_max": 29.0},
+    })
+    series = HistorySeries(path)
+    assert (series.n_days, round(series.latitude, 4)) == (4, 39.9075)
+    assert series.day(date(2024, 7, 1)) == {"temp_max": 31.2, "temp_min": 21.2, "weather_code": 61,
+                                            "precipitation": 0.4, "wind_max": 12.5}
+    assert series.day(date(2024, 7, 2)) is None  # 缺测
+    assert series.day(date(2024, 7, 4))["temp_min"] is None
+    assert series.day(date(2024, 6, 30)) is None and series.day(date(2024, 7, 5)) is None
+    assert list(series.read_all()) == ["2024-07-01", "2024-07-02", "2024-07-03", "2024-07-04"]
+
+
+def test_rejects_foreign_or_truncated_files(tmp_path):
+    bogus = tmp_path / "bogus.wxh"
+    bogus.write_bytes(b"NOPE" + bytes(60))
+    with pytest.raises(ValueError):
+        HistorySeries(str(bogus))
+
+    path = tmp_path / "s.wxh"
+    write_series(str(path), *BEIJING, {"2024-07-01": day_values(30), "2024-07-10": day_values(30)})
+    path.write_bytes(path.read_bytes()[:-8])
+    with pytest.raises(ValueError):
+        HistorySeries(str(path))
+
+    # 头部都不完整
+    path.write_bytes(path.read_bytes()[:10])
+    with pytest.raises(ValueError):
+        HistorySeries(str(path))
+
+
+def test_get_day_counts_hits_and_misses(store):
+    store.merge(*BEIJING, {"2024-07-01": day_values(31)})
+    assert store.get_day(39.95, 116.35, "2024-07-01")["temp_max"] == 31  # 同一网格
+    assert store.get_day(*BEIJING, "2024-07-02") is None
+    assert store.get_day(31.23, 121.47, "2024-07-01") is None  # 没有回填的网格
+    assert store.summary() == {"locations": 1, "hits": 1, "misses": 2, "hit_rate": 0.333}
+
+
+def test_merge_overwrites_and_is_picked_up_by_open_series(store):
+    store.merge(*BEIJING, {"2024-07-01": day_values(31), "2024-07-02": day_values(32)})
+    assert store.get_day(*BEIJING, "2024-07-02")["temp_max"] == 32
+    assert store.merge(*BEIJING, {"2024-07-02": {"temp_max": 28}, "2024-07-03": day_values(33)}) == 3
+    # 文件被原子替换后重新映射；只覆盖提供了的字段
+    assert store.get_day(*BEIJING, "2024-07-02") == {**day_values(32), "temp_max": 28}
+    assert store.get_day(*BEIJING, "2024-07-03")["temp_max"] == 33
+
+
+def test_climatology_uses_previous_years_only(store):
+    days = {}
+    for year, temp, rain in ((2021, 30, 0.0), (2022, 32, 5.0), (2023, 34, 0.0), (2024, 40, 9.0)):
+        for offset in range(-3, 4):
+            days[(date(year, 7, 1) + timedelta(days=offset)).isoformat()] = day_values(temp, rain)
+    store.merge(*BEIJING, days)
+
+    climate = store.climatology(*BEIJING, "2024-07-01")
+    assert climate["years"] == 3
+    assert climate["temp_max"] == 32.0 and climate["temp_min"] == 22.0
+    assert climate["rain_days"] == 0.33
+    assert climate["last_year"]["temp_max"] == 34
+    assert store.climatology(*BEIJING, "2021-07-01") is None
+    assert store.climatology(31.23, 121.47, "2024-07-01") is None
+
+
+def test_climatology_for_leap_day(store):
+    store.merge(*BEIJING, {"2023-02-28": day_values(5), "2024-02-29": day_values(9)})
+    assert store.climatology(*BEIJING, "2024-02-29", window=0)["last_year"]["temp_max"] == 5
+
+
+def test_city_index_is_case_insensitive(store):
+    assert store.lookup_city("Beijing") is None
+    store.add_city(" Beijing ", "北京", *BEIJING)
+    assert store.lookup_city("beijing") == {"name": "北京", "latitude": BEIJING[0], "longitude": BEIJING[1]}
+
+
+def test_parse_archive():
+    data = {"daily": {
+        "time": ["2024-07-01", "2024-07-02"],
+        "temperature_2m_max": [31.2, None],
+        "temperature_2m_min": [21.0, 20.5],
+        "weather_code": [61, 3],
+        "precipitation_sum": [0.4],
+    }}
+    days = parse_archive(data)
+    assert days["2024-07-01"] == {"temp_max": 31.2, "temp_min": 21.0, "weather_code": 61,
+                                  "precipitation": 0.4, "wind_max": None}
+    assert days["2024-07-02"]["temp_max"] is None and days["2024-07-02"]["precipitation"] is None
+
+
+# --- tools/weather.py：过去的日期走历史库 ---
+@pytest.fixture
+def offline_weather(store, monkeypatch):
+    """历史库指向临时目录，任何联网请求都视为失败"""
+    def no_network(*args, **kwargs):
+        raise AssertionError("network request")
+
+    monkeypatch.setattr(weather, "HISTORY_STORE", store)
+    monkeypatch.setattr(weather, "FORECAST_CACHE", None)
+    monkeypatch.setattr(weather.requests, "get", no_network)
+    return store
+
+
+def test_past_date_served_from_history_without_network(offline_weather):
+    past = date.today() - timedelta(days=3)
+    offline_weather.add_city("Beijing", "北京", *BEIJING)
+    offline_weather.merge(*BEIJING, {past.isoformat(): day_values(31)})
+
+    # 紧凑格式按字符串比较会被误判为未来日期
+    for date_input in ("-3", past.isoformat(), past.strftime("%Y%m%d")):
+        data = json.loads(weather.WeatherService.get_weather_data("Beijing", date_input))
+        assert data["city"] == "北京" and data["date"] == past.isoformat() and data["temp_max"] == 31
+
+
+def test_truncated_history_file_falls_back_to_forecast(offline_weather, monkeypatch, tmp_path):
+    past = (date.today() - timedelta(days=3)).isoformat()
+    offline_weather.add_city("Beijing", "北京", *BEIJING)
+    offline_weather.merge(*BEIJING, {past: day_values(31)})
+    for path in tmp_path.glob("**/*.wxh"):
+        path.write_bytes(path.read_bytes()[:10])
+
+    calls = []
+    monkeypatch.setattr(weather, "fetch_daily_forecast", lambda lat, lon, d: calls.append(d) or day_values(20))
+    data = json.loads(weather.WeatherService.get_weather_data("Beijing", past))
+    assert data["temp_max"] == 20 and calls == [past]
+
+
+def test_future_date_uses_forecast(offline_weather, monkeypatch):
+    class GeoResponse:
+        def json(self):
+            return {"results": [{"name": "北京", "latitude": BEIJING[0], "longitude": BEIJING[1]}]}
+
+    calls = []
+    monkeypatch.setattr(weather.requests, "get", lambda *args, **kwargs: GeoResponse())
+    monkeypatch.setattr(weather, "fetch_daily_forecast", lambda lat, lon, d: calls.append(d) or day_values(20))
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    offline_weather.merge(*BEIJING, {tomorrow: day_values(99)})
+
+    data = json.loads(weather.WeatherService.get_weather_data("Beijing", "1"))
+    assert data["temp_max"] == 20 and calls == [tomorrow]
+
+
+def test_parse_date_input_formats():
+    today = date(2024, 7, 10)
+    assert weather.parse_date_input("2024-07-01", today) == date(2024, 7, 1)
+    assert weather.parse_date_input("20240701", today) == date(2024, 7, 1)  # 不依赖 Python 3.11 的 fromisoformat
+    assert weather.parse_date_input("-9", today) == date(2024, 7, 1)
+    assert weather.parse_date_input("0", today) == today
+
+
+@pytest.mark.parametrize("date_input", ["2024-13-01", "yesterday", "2024/07/01", "2024-7-1", "2024W271", "20241301", "99999999999"])
+def test_invalid_date_is_reported(offline_weather, date_input):
+    data = json.loads(weather.WeatherService.get_weather_data("Beijing", date_input))
+    assert data["error"].startswith(f"Invalid date: {date_input}")
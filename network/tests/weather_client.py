@@ -1,58 +1,222 @@
-import requests
+#!/usr/bin/env python3
+"""
+weather_connector 测试客户端 / 异步压测工具
+
+单次请求:
+  python weather_client.py Beijing 1
+压测（需同时运行 log_server.py 作为计量端）:
+  python weather_client.py --mode open --rate 2 --duration 30      # 开环：固定到达速率
+  python weather_client.py --mode closed --users 4 --requests 20   # 闭环：N 个并发用户
+"""
+import argparse
+import asyncio
 import json
+import os
+import random
 import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.stats import percentile
+
+# 配置 weather_connector 的地址
+# 注意：如果是局域网使用，请替换为实际的服务器IP地址
+CONNECTOR_URL = "http://localhost:8888/generate"
+SINK_URL = "http://localhost:9999"
 
-def send_weather_request(server_url, city, date=None):
+
+async def send_weather_request(session, server_url, city, date=None, **extra):
     """
-    发送天气请求到 weather_connector
-    
+    发送天气请求到 weather_connector，返回 (HTTP 状态码, 响应 JSON)
+
     Args:
         server_url: weather_connector 的地址 (例如: http://192.168.1.100:8888/generate)
         city: 城市名称
         date: 可选，日期偏移量(如 "0" 表示今天，"1" 表示明天)
     """
-    payload = {"city": city}
+    payload = {"city": city, **extra}
     if date is not None:
         payload["date"] = date
-    
+    async with session.post(server_url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+        return resp.status, await resp.json(content_type=None)
+
+
+async def run_single(server_url, city, date=None):
+    """单次请求并打印响应"""
+    print(f"正在发送请求到 {server_url}...")
+    print(f"参数: 城市={city}, 日期={date if date else '默认'}")
+    print("-" * 50)
     try:
-        print(f"正在发送请求到 {server_url}...")
-        print(f"参数: 城市={city}, 日期={date if date else '默认'}")
-        print("-" * 50)
-        
-        response = requests.post(server_url, json=payload, timeout=10)
-        
-        print(f"HTTP 状态码: {response.status_code}")
+        async with aiohttp.ClientSession() as session:
+            status, body = await send_weather_request(session, server_url, city, date)
+        print(f"HTTP 状态码: {status}")
         print("服务器响应:")
-        print(json.dumps(response.json(), indent=2, ensure_ascii=False))
-        
-    except requests.exceptions.ConnectionError:
+        print(json.dumps(body, indent=2, ensure_ascii=False))
+    except aiohttp.ClientConnectionError:
         print("❌ 连接失败：无法连接到 weather_connector 服务")
         print("   请确认：")
         print("   1. weather_connector 是否已启动")
         print("   2. 地址和端口是否正确")
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
         print("❌ 请求超时")
     except Exception as e:
         print(f"❌ 发生错误: {e}")
 
-if __name__ == "__main__":
-    # 配置 weather_connector 的地址
-    # 注意：如果是局域网使用，请替换为实际的服务器IP地址
-    CONNECTOR_URL = "http://localhost:8888/generate"
-    
-    # 示例用法
-    if len(sys.argv) > 1:
-        city = sys.argv[1]
-        date = sys.argv[2] if len(sys.argv) > 2 else None
-    else:
+
+class LoadGenerator:
+    """按城市/日期组合发送请求，并通过 log_server 的 /jobs 计量端到端耗时"""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.sent = {}          # job_id -> 发送时间
+        self.accepted = 0
+        self.rejected = 0
+        self.errors = 0
+        self.session = None
+
+    def _pick(self):
+        return self.rng.choice(self.args.cities), self.rng.choice(self.args.dates)
+
+    async def _fire(self):
+        city, date = self._pick()
+        sent_at = time.time()
+        try:
+            status, body = await send_weather_request(
+                self.session, self.args.url, city, date, priority=self.args.priority)
+        except Exception:
+            self.errors += 1
+            return None
+        if status == 200 and body.get("job_id"):
+            self.accepted += 1
+            self.sent[body["job_id"]] = sent_at
+            return body["job_id"]
+        self.rejected += 1
+        return None
+
+    async def _job_done(self, job_id) -> bool:
+        async with self.session.get(f"{self.args.sink}/jobs/{job_id}") as resp:
+            if resp.status != 200:
+                return False
+            job = await resp.json()
+        return len(job["results"]) + len(job["failed"]) >= self.args.expect
+
+    async def _wait_job(self, job_id, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if await self._job_done(job_id):
+                return
+            await asyncio.sleep(0.2)
+
+    async def run_open(self):
+        """开环：按固定速率发出请求，不等待完成"""
+        interval = 1.0 / self.args.rate
+        total = int(self.args.rate * self.args.duration)
+        start = time.monotonic()
+        tasks = []
+        for i in range(total):
+            await asyncio.sleep(max(0.0, start + i * interval - time.monotonic()))
+            tasks.append(asyncio.create_task(self._fire()))
+        job_ids = [j for j in await asyncio.gather(*tasks) if j]
+        await asyncio.gather(*(self._wait_job(j, self.args.drain) for j in job_ids))
+
+    async def run_closed(self):
+        """闭环：每个用户等上一个请求全部完成后再发下一个"""
+        remaining = [self.args.requests]
+
+        async def user():
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                job_id = await self._fire()
+                if job_id:
+                    await self._wait_job(job_id, self.args.drain)
+
+        await asyncio.gather(*(user() for _ in range(self.args.users)))
+
+    async def run(self):
+        async with aiohttp.ClientSession() as self.session:
+            await self.session.post(f"{self.args.sink}/reset")
+            started = time.time()
+            if self.args.mode == "open":
+                await self.run_open()
+            else:
+                await self.run_closed()
+            elapsed = time.time() - started
+            async with self.session.get(f"{self.args.sink}/jobs") as resp:
+                jobs = (await resp.json())["jobs"]
+        self.report(jobs, elapsed)
+
+    def report(self, jobs, elapsed):
+        to_weather, to_first, to_last = [], [], []
+        completed = failed_results = 0
+        for job_id, sent_at in self.sent.items():
+            job = jobs.get(job_id)
+            if not job:
+                continue
+            if job["weather_at"]:
+                to_weather.append(job["weather_at"] - sent_at)
+            arrivals = sorted(job["results"].values())
+            finished = arrivals + list(job["failed"].values())
+            failed_results += len(job["failed"])
+            if arrivals:
+                to_first.append(arrivals[0] - sent_at)
+            if len(finished) >= self.args.expect:
+                completed += 1
+                to_last.append(max(finished) - sent_at)
+
+        sent = self.accepted + self.rejected + self.errors
+        print("=" * 60)
+        print(f"模式: {self.args.mode}  耗时: {elapsed:.1f}s")
+        print(f"请求: 发送 {sent}, 接受 {self.accepted}, 拒绝 {self.rejected}, 连接错误 {self.errors}")
+        print(f"完成: {completed}/{self.accepted} 个请求, 失败结果 {failed_results} 条")
+        print(f"吞吐: {completed / elapsed:.3f} 请求/秒 (完成), {sent / elapsed:.3f} 请求/秒 (发送)")
+        print("-" * 60)
+        print(f"{'指标':<16}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for name, values in (("天气报告", to_weather), ("首个学生结果", to_first), ("全部学生结果", to_last)):
+            print(f"{name:<16}{len(values):>6}" + "".join(f"{percentile(values, q):>9.2f}s" for q in (50, 95, 99)))
+        print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="weather_connector 测试客户端 / 压测工具")
+    parser.add_argument("city", nargs="?", help="单次请求的城市名称")
+    parser.add_argument("date", nargs="?", help="单次请求的日期偏移量")
+    parser.add_argument("--url", default=CONNECTOR_URL)
+    parser.add_argument("--sink", default=SINK_URL, help="log_server 地址（计量端）")
+    parser.add_argument("--mode", choices=["open", "closed"], help="压测模式；不指定则发送单次请求")
+    parser.add_argument("--rate", type=float, default=1.0, help="开环：每秒请求数")
+    parser.add_argument("--duration", type=float, default=30.0, help="开环：持续秒数")
+    parser.add_argument("--users", type=int, default=4, help="闭环：并发用户数")
+    parser.add_argument("--requests", type=int, default=20, help="闭环：总请求数")
+    parser.add_argument("--cities", default="Beijing,Shanghai,Guangzhou,Chengdu,London,Paris")
+    parser.add_argument("--dates", default="0,1,2", help="日期偏移量列表")
+    parser.add_argument("--priority", default="interactive")
+    parser.add_argument("--expect", type=int, default=4, help="每个请求期望的学生结果数")
+    parser.add_argument("--drain", type=float, default=600.0, help="等待单个请求完成的最长秒数")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    args.cities = [c for c in args.cities.split(",") if c]
+    args.dates = [d for d in args.dates.split(",") if d]
+
+    if args.mode:
+        asyncio.run(LoadGenerator(args).run())
+        return
+
+    city, date = args.city, args.date
+    if not city:
         # 交互式输入
         city = input("请输入城市名称: ").strip()
         date_input = input("请输入日期偏移量（可选，直接回车跳过）: ").strip()
         date = date_input if date_input else None
-    
+
     if not city:
         print("城市名称不能为空")
         sys.exit(1)
-    
-    send_weather_request(CONNECTOR_URL, city, date)
+
+    asyncio.run(run_single(args.url, city, date))
+
+
+if __name__ == "__main__":
+    main()
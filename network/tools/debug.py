@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+tools/debug.py
+运行中进程的诊断接口
+- GET /debug/profile?seconds=10  采样 CPU 调用栈，返回 collapsed stacks（flamegraph.pl / speedscope 可直接读取）
+- GET /debug/tasks               列出所有未完成的 asyncio 任务及其 await 链
+仅在设置了 token 时注册路由，请求需携带 "Authorization: Bearer <token>"；
+采样线程只在 /debug/profile 请求期间存在，平时没有额外开销。
+"""
+import asyncio
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from aiohttp import web
+
+MAX_PROFILE_SECONDS = 60
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# 协程帧中这些局部变量会原样输出；名为 started 的 monotonic 时间戳会换算为已等待秒数
+FRAME_LOCALS = ("task_id", "student_id", "project_id", "timeout")
+
+
+# --- 调用栈格式化 ---
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def thread_stack(frame) -> list[str]:
+    """从最外层到当前帧的标签列表"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+# --- CPU 采样 ---
+class StackSampler:
+    """定时读取各线程的当前调用栈并按 collapsed 格式计数"""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+
+    def run(self, seconds: float):
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                name = names.get(ident) or f"thread-{ident}"
+                self.counts[";".join([name] + thread_stack(frame))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+# --- asyncio 任务快照 ---
+def _await_chain(task: asyncio.Task) -> list[dict]:
+    """沿 cr_await 向下展开挂起中的协程链（Task.get_stack 对挂起协程只返回最外层一帧）"""
+    chain = []
+    now = time.monotonic()
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            chain.append({"awaiting": repr(awaitable)[:200]})
+            break
+        entry = {"frame": frame_label(frame)}
+        for key in FRAME_LOCALS:
+            if key in frame.f_locals:
+                entry[key] = repr(frame.f_locals[key])
+        started = frame.f_locals.get("started")
+        if isinstance(started, float):
+            entry["elapsed_s"] = round(now - started, 3)
+        chain.append(entry)
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return chain
+
+
+def dump_tasks(labels: dict = None) -> list[dict]:
+    """
+    当前事件循环中所有未完成任务的快照。
+    labels: {task: 附加信息}，例如工作流对应的 job_id 与已运行时间。
+    """
+    labels = labels or {}
+    current = asyncio.current_task()
+    tasks = []
+    for task in asyncio.all_tasks():
+        if task is current or task.done():
+            continue
+        tasks.append({
+            "name": task.get_name(),
+            "coro": getattr(task.get_coro(), "__qualname__", repr(task.get_coro())),
+            **labels.get(task, {}),
+            "await_chain": _await_chain(task),
+        })
+    return sorted(tasks, key=lambda t: -t.get("age_s", 0))
+
+
+# --- 路由 ---
+def add_debug_routes(app: web.Application, token: str, task_labels=None):
+    """
+    在 app 上注册 /debug/* 路由。
+    task_labels: 可选的无参函数，返回传给 dump_tasks 的 labels。
+    """
+    expected = f"Bearer {token}".encode("utf-8")
+    profile_lock = asyncio.Lock()
+
+    def authorized(request) -> bool:
+        return hmac.compare_digest(request.headers.get("Authorization", "").encode("utf-8"), expected)
+
+    async def handle_profile(request):
+        if not authorized(request):
+            return web.json_response({"status": "error", "message": "Unauthorized"}, status=401)
+        try:
+            seconds = float(request.query.get("seconds", "10"))
+            interval = float(request.query.get("interval", str(DEFAULT_SAMPLE_INTERVAL)))
+        except ValueError:
+            return web.json_response({"status": "error", "message": "Invalid 'seconds' or 'interval'"}, status=400)
+        if not 0 < seconds <= MAX_PROFILE_SECONDS or not 0 < interval <= 1:
+            return web.json_response(
+                {"status": "error", "message": f"'seconds' must be in (0, {MAX_PROFILE_SECONDS}]"}, status=400)
+        if profile_lock.locked():
+            return web.json_response({"status": "error", "message": "A profile is already running"}, status=409)
+
+        async with profile_lock:
+            sampler = StackSampler(interval)
+            await asyncio.to_thread(sampler.run, seconds)
+
+        filename = f"coordinator-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+        return web.Response(
+            text=sampler.collapsed(),
+            content_type="text/plain",
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                "X-Profile-Samples": str(sampler.samples),
+            },
+        )
+
+    async def handle_tasks(request):
+        if not authorized(request):
+            return web.json_response({"status": "error", "message": "Unauthorized"}, status=401)
+        tasks = dump_tasks(task_labels() if task_labels else None)
+        return web.json_response({"count": len(tasks), "tasks": tasks},
+                                 dumps=lambda obj: json.dumps(obj, ensure_ascii=False, indent=2))
+
+    app.router.add_get("/debug/profile", handle_profile)
+    app.router.add_get("/debug/tasks", handle_tasks)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+tools/fastpath.py
+可选的性能加速组件
+- 安装了 uvloop 时使用其事件循环
+- 安装了 orjson 时使用其 JSON 编解码
+均未安装时回退到标准库，行为保持一致。
+"""
+import asyncio
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+def json_loads(data):
+    """解析 JSON（bytes 或 str）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj) -> str:
+    """序列化为 JSON 字符串，保留中文原文"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def install_uvloop() -> bool:
+    """若已安装 uvloop，则将其设为默认事件循环策略；需在创建事件循环前调用"""
+    if uvloop is None:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+def describe() -> str:
+    """用于启动日志的简要说明"""
+    return (f"event loop: {'uvloop' if uvloop is not None else 'asyncio'}, "
+            f"json: {'orjson' if orjson is not None else 'json'}")
+
+
+def log_fastpath():
+    logging.info(f"⚡ Fast path: {describe()}")
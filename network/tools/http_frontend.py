@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+tools/http_frontend.py
+多进程 HTTP 前端
+多个 worker 进程通过 SO_REUSEPORT 共享 8888 端口，负责 JSON 解析与参数校验：
+- /generate 经本地连接把任务交给协调器进程，任务委派仍集中在协调器一处
+- /cancel 转发到协调器的管理端口，原样返回协调器的状态码与结果
+worker 以 python -m tools.http_frontend 启动，只导入本模块、tools.http_request 与 aiohttp，不加载协调器。
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+from multiprocessing.connection import Client, Listener
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, web
+
+from tools.fastpath import install_uvloop, json_dumps, json_loads, log_fastpath
+from tools.http_request import new_job_id, parse_cancel_request, parse_generate_request
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# worker 连接协调器所用的认证密钥（十六进制），经环境变量传入，不出现在命令行里
+AUTHKEY_ENV = "FRONTEND_QUEUE_AUTHKEY"
+# 转发 /cancel 到协调器的超时（秒）
+CANCEL_FORWARD_TIMEOUT = 10
+
+
+def reuse_port_supported() -> bool:
+    """SO_REUSEPORT 仅在 Linux/macOS 等平台可用"""
+    return hasattr(socket, "SO_REUSEPORT")
+
+
+def _error(message: str, status: int = 400):
+    return web.json_response({"status": "error", "message": message}, status=status, dumps=json_dumps)
+
+
+def build_frontend_app(job_conn, options: dict, admin_url: str) -> web.Application:
+    """worker 进程内的轻量 HTTP 应用：/generate 只做解析与校验后交给协调器，/cancel 转发给协调器"""
+
+    async def handle_generate(request):
+        try:
+            data = json_loads(await request.read())
+        except ValueError:
+            return _error("Invalid JSON")
+        params, error = parse_generate_request(data, options)
+        if error:
+            return _error(error)
+
+        job_id = new_job_id(params["city"])
+        job_conn.send(("generate", job_id, params))
+        return web.json_response(
+            {"status": "ok", "message": "Request accepted, processing...", "job_id": job_id}, dumps=json_dumps
+        )
+
+    async def handle_cancel(request):
+        body = await request.read()
+        try:
+            data = json_loads(body)
+        except ValueError:
+            return _error("Invalid JSON")
+        _, error = parse_cancel_request(data)
+        if error:
+            return _error(error)
+
+        # 是否找到任务、取消了哪些只有协调器知道，转发后原样返回
+        try:
+            async with request.app["admin_session"].post(
+                f"{admin_url}/cancel", data=body, headers={"Content-Type": "application/json"}
+            ) as resp:
+                return web.Response(body=await resp.read(), status=resp.status, content_type="application/json")
+        except (ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"❌ Failed to forward /cancel to coordinator: {e}")
+            return _error("Coordinator unavailable", status=503)
+
+    async def open_session(app):
+        app["admin_session"] = ClientSession(timeout=ClientTimeout(total=CANCEL_FORWARD_TIMEOUT))
+
+    async def close_session(app):
+        await app["admin_session"].close()
+
+    app = web.Application()
+    app.router.add_post("/generate", handle_generate)
+    app.router.add_post("/cancel", handle_cancel)
+    app.on_startup.append(open_session)
+    app.on_cleanup.append(close_session)
+    return app
+
+
+def _exit_with_coordinator(job_conn):
+    """协调器从不向 worker 发消息；连接断开说明协调器已退出，worker 随之退出"""
+    try:
+        job_conn.recv()
+    except (EOFError, OSError):
+        pass
+    os._exit(0)
+
+
+def run_frontend_worker(worker_id: int, host: str, port: int, queue_port: int, admin_url: str, options: dict):
+    """worker 进程入口"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s - frontend-{worker_id} - %(levelname)s - %(message)s"
+    )
+    install_uvloop()
+    log_fastpath()
+    job_conn = Client(("127.0.0.1", queue_port), authkey=bytes.fromhex(os.environ[AUTHKEY_ENV]))
+    threading.Thread(target=_exit_with_coordinator, args=(job_conn,), name="coordinator-watch", daemon=True).start()
+    logging.info(f"🚀 Frontend worker {worker_id} listening on http://{host}:{port} (SO_REUSEPORT)")
+    web.run_app(build_frontend_app(job_conn, options, admin_url), host=host, port=port,
+                reuse_port=True, print=None, access_log=None)
+
+
+def start_frontend_workers(count: int, host: str, port: int, options: dict, admin_url: str):
+    """
+    启动 count 个 worker 进程，返回 (连接监听器, 进程列表)。
+    worker 作为独立的 python -m tools.http_frontend 进程启动，而不是 multiprocessing 的 spawn：
+    spawn 会在子进程里重新执行协调器脚本，把整个协调器的依赖都导入一遍。
+    """
+    authkey = os.urandom(16)
+    listener = Listener(("127.0.0.1", 0), authkey=authkey)
+    env = {
+        **os.environ,
+        AUTHKEY_ENV: authkey.hex(),
+        "PYTHONPATH": os.pathsep.join(p for p in (PROJECT_DIR, os.environ.get("PYTHONPATH")) if p),
+    }
+    workers = []
+    for worker_id in range(count):
+        cmd = [
+            sys.executable, "-m", "tools.http_frontend",
+            "--worker-id", str(worker_id), "--host", host, "--port", str(port),
+            "--queue-port", str(listener.address[1]), "--admin-url", admin_url,
+            "--options", json.dumps(options),
+        ]
+        workers.append(subprocess.Popen(cmd, cwd=PROJECT_DIR, env=env))
+    return listener, workers
+
+
+def start_queue_reader(listener, loop, dispatch) -> threading.Thread:
+    """
+    在协调器进程中启动守护线程接受 worker 连接，每个连接一个读取线程，
+    每条 (kind, job_id, data) 交给 loop 上的协程 dispatch 处理。
+    使用守护线程而非线程池，阻塞的 recv() 不会拖住进程退出。
+    """
+    def _read(conn):
+        while True:
+            try:
+                item = conn.recv()
+            except (EOFError, OSError):
+                return
+            asyncio.run_coroutine_threadsafe(dispatch(*item), loop)
+
+    def _accept():
+        while True:
+            try:
+                conn = listener.accept()
+            except OSError:
+                return
+            except Exception as e:
+                # 认证失败的连接直接丢弃
+                logging.warning(f"⚠️ Rejected frontend connection: {e}")
+                continue
+            threading.Thread(target=_read, args=(conn,), name="frontend-queue-reader", daemon=True).start()
+
+    thread = threading.Thread(target=_accept, name="frontend-queue-accept", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程 HTTP 前端 worker（由协调器启动）")
+    parser.add_argument("--worker-id", type=int, required=True)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--queue-port", type=int, required=True, help="协调器接收任务的本地端口")
+    parser.add_argument("--admin-url", required=True, help="协调器管理端口地址，/cancel 转发到这里")
+    parser.add_argument("--options", required=True, help="/generate 的可选值与默认值（JSON）")
+    args = parser.parse_args()
+    run_frontend_worker(args.worker_id, args.host, args.port, args.queue_port, args.admin_url,
+                        json.loads(args.options))
+
+
+if __name__ == "__main__":
+    main()
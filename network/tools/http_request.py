@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+tools/http_request.py
+/generate 与 /cancel 请求体的校验
+只依赖标准库，协调器与前端 worker 进程共用，worker 无需导入协调器的其他模块。
+"""
+import time
+import uuid
+
+
+def new_job_id(city: str) -> str:
+    return f"manual-{city}-{int(time.time())}-{uuid.uuid4().hex[:6]}"
+
+
+def parse_generate_request(data, options: dict):
+    """
+    校验 /generate 请求体。
+    options 提供 modes / priorities 可选值与 default_mode / default_priority 默认值。
+    返回 (params, None) 或 (None, 错误信息)。
+    """
+    if not isinstance(data, dict):
+        return None, "Invalid JSON"
+
+    params = {
+        "city": data.get("city"),
+        "date": data.get("date"),
+        "mode": data.get("mode", options["default_mode"]),
+        "deadline": data.get("deadline"),
+        "client_id": data.get("client_id"),
+        "priority": data.get("priority", options["default_priority"]),
+    }
+    deadline = params["deadline"]
+
+    if not params["city"]:
+        return None, "Missing 'city'"
+    if params["mode"] not in options["modes"]:
+        return None, f"Invalid 'mode': {params['mode']}"
+    if deadline is not None and (isinstance(deadline, bool) or not isinstance(deadline, (int, float))
+                                 or deadline <= 0):
+        return None, "'deadline' must be a positive number of seconds"
+    if params["priority"] not in options["priorities"]:
+        return None, f"Invalid 'priority': {params['priority']}"
+    return params, None
+
+
+def parse_cancel_request(data):
+    """
+    校验 /cancel 请求体：{"job_id": ...}、{"client_id": ...} 或 {"all": true}。
+    返回 (data, None) 或 (None, 错误信息)。
+    """
+    if not isinstance(data, dict) or not (data.get("all") or data.get("client_id") or data.get("job_id")):
+        return None, "Missing 'job_id'"
+    return data, None
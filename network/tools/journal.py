@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+tools/journal.py
+工作流检查点日志
+每个工作流的阶段变化以一行 JSON 追加写入本地文件并 fsync，协调器崩溃或重启后据此恢复：
+- submitted  请求参数（城市、日期、模式、期限、优先级、client_id），启用追踪时附 traceparent
+- weather    天气报告已发送（附天气文本与实际使用的模式）
+- delegated  任务已委派（agent 与 task_id）
+- result     某个学生的结果已发送（成功或失败都算，避免重复上传）
+- finished / cancelled  工作流结束，不再需要恢复
+fsync 按组提交：并发写入的记录等待同一次 fsync，而不是各自 fsync 一次。
+每结束 compact_every 个工作流压缩一次日志，文件大小只与进行中的工作流数量有关。
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+DONE_EVENTS = ("finished", "cancelled")
+
+
+def _new_state(job_id: str) -> dict:
+    return {"job_id": job_id, "params": None, "submitted_at": None, "deadline_at": None,
+            "traceparent": None, "weather": None, "mode": None, "tasks": {}, "results": set()}
+
+
+def _apply(state: dict, record: dict):
+    event = record.get("event")
+    if event == "submitted":
+        state["params"] = record.get("params")
+        state["submitted_at"] = record.get("t")
+        state["deadline_at"] = record.get("deadline_at")
+        state["traceparent"] = record.get("traceparent")
+    elif event == "weather":
+        state["weather"] = record.get("text")
+        state["mode"] = record.get("mode")
+    elif event == "delegated":
+        state["tasks"][record["agent"]] = record["task_id"]
+    elif event == "result":
+        state["results"].add(record["student"])
+
+
+class WorkflowJournal:
+    """追加写入的 JSONL 日志；record 可在线程池中调用，内部加锁保证整行写入"""
+
+    def __init__(self, path: str, fsync: bool = True, compact_every: int = 0):
+        self.path = path
+        self.fsync = fsync
+        self.compact_every = compact_every
+        # 加锁顺序：_sync_lock -> _lock。_lock 保护写入，_sync_lock 保证同一时间只有一次 fsync
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._file = None
+        self._written = 0
+        self._synced = 0
+        self._done_since_compact = 0
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def record(self, job_id: str, event: str, **fields):
+        """追加一条记录；启用 fsync 时返回前记录已落盘"""
+        line = json.dumps({"t": time.time(), "job_id": job_id, "event": event, **fields}, ensure_ascii=False)
+        with self._lock:
+            f = self._open()
+            f.write(line + "\n")
+            f.flush()
+            self._written += 1
+            seq = self._written
+            if event in DONE_EVENTS:
+                self._done_since_compact += 1
+            compact_due = self.compact_every and self._done_since_compact >= self.compact_every
+            if compact_due:
+                self._done_since_compact = 0
+        if self.fsync:
+            self._sync(seq)
+        if compact_due:
+            self.compact()
+
+    def _sync(self, seq: int):
+        """
+        组提交：等待前一次 fsync 期间写入的记录由下一次 fsync 一并落盘。
+        拿到 _sync_lock 时若已有 fsync 覆盖了第 seq 条记录，直接返回。
+        """
+        with self._sync_lock:
+            if self._synced >= seq:
+                return
+            with self._lock:
+                target = self._written
+                fd = self._file.fileno()
+            os.fsync(fd)
+            self._synced = target
+
+    def _read(self) -> list:
+        """读取全部记录；崩溃时可能留下不完整的最后一行，直接跳过"""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logging.warning(f"⚠️ Skipping corrupt journal line: {line[:80]!r}")
+        return records
+
+    def replay(self) -> dict:
+        """重放日志，返回未结束的工作流 {job_id: 状态}，按提交时间排序"""
+        states = {}
+        for record in self._read():
+            job_id = record.get("job_id")
+            if record.get("event") in DONE_EVENTS:
+                states.pop(job_id, None)
+                continue
+            _apply(states.setdefault(job_id, _new_state(job_id)), record)
+        # 缺少 submitted 记录（例如已被压缩掉）的工作流无法恢复
+        unfinished = [s for s in states.values() if s["params"] is not None]
+        return {s["job_id"]: s for s in sorted(unfinished, key=lambda s: s["submitted_at"])}
+
+    def compact(self, max_age: float = None) -> dict:
+        """
+        重放日志，丢弃已结束与超过 max_age 秒的工作流，只保留未结束工作流的记录并原子替换日志文件。
+        返回未结束的工作流。启动时传入 max_age 得到待恢复的工作流；
+        运行中由 record 定期调用，不传 max_age，以免丢掉仍在执行的长工作流。
+        """
+        with self._sync_lock, self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            unfinished = self.replay()
+            if max_age is not None:
+                cutoff = time.time() - max_age
+                for job_id in [j for j, s in unfinished.items() if s["submitted_at"] < cutoff]:
+                    logging.warning(f"⚠️ Dropping stale journal entry {job_id} (older than {max_age:.0f}s)")
+                    del unfinished[job_id]
+
+            kept = [r for r in self._read() if r.get("job_id") in unfinished]
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in kept:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            # 之前写入的记录要么已丢弃，要么随新文件一起落盘
+            self._synced = self._written
+        return unfinished
+
+    def close(self):
+        with self._sync_lock, self._lock:
+            if self._file is not None:
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+            self._synced = self._written
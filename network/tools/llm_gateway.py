@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+tools/llm_gateway.py
+本地 LLM 网关
+对外提供 OpenAI 兼容接口，所有学院 Agent 统一经由网关访问上游 LLM：
+- 全局并发限制 + 按客户端轮询的公平排队
+- 复用上游连接池
+- 相同请求的响应缓存（并合并同时到达的相同请求）
+- 延迟与排队时间统计（GET /stats）
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import time
+from collections import OrderedDict, deque
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, web
+
+from tools.stats import LatencyWindow
+
+# --- 配置常量 ---
+DEFAULT_PORT = int(os.environ.get("GATEWAY_PORT", "8710"))
+DEFAULT_UPSTREAM_URL = os.environ.get(
+    "GATEWAY_UPSTREAM_URL", os.environ.get("DEFAULT_LLM_BASE_URL", "http://localhost:11434/v1")
+)
+DEFAULT_UPSTREAM_API_KEY = os.environ.get("GATEWAY_UPSTREAM_API_KEY", "")
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("GATEWAY_MAX_CONCURRENCY", "1"))
+DEFAULT_CACHE_SIZE = int(os.environ.get("GATEWAY_CACHE_SIZE", "256"))
+DEFAULT_CACHE_TTL = float(os.environ.get("GATEWAY_CACHE_TTL", "600"))
+UPSTREAM_TIMEOUT_SECONDS = 300
+
+
+class FairQueue:
+    """全局并发限制；超出限制的请求按客户端分组排队，各客户端之间轮询放行"""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.active = 0
+        self.waiters: "OrderedDict[str, deque]" = OrderedDict()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(q) for q in self.waiters.values())
+
+    async def acquire(self, client: str):
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(client, deque()).append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 名额已经转交给本请求，取消时需要归还
+                self.release()
+            else:
+                queue = self.waiters.get(client)
+                if queue and fut in queue:
+                    queue.remove(fut)
+                    if not queue:
+                        del self.waiters[client]
+            raise
+
+    def release(self):
+        # 直接把名额转交给下一个客户端的队首请求，active 数保持不变
+        while self.waiters:
+            client, queue = next(iter(self.waiters.items()))
+            fut = queue.popleft()
+            del self.waiters[client]
+            if queue:
+                self.waiters[client] = queue  # 移到队尾，实现轮询
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+
+class ResponseCache:
+    """带过期时间的 LRU 响应缓存"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(path: str, payload: dict) -> str:
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(f"{path}\n{canonical}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, response: tuple):
+        if self.max_size <= 0:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+class LLMGateway:
+    """OpenAI 兼容的本地网关服务"""
+
+    def __init__(self, upstream_url: str, upstream_api_key: str = "",
+                 max_concurrency: int = 1, cache_size: int = 256, cache_ttl: float = 600):
+        self.upstream_url = upstream_url.rstrip("/")
+        self.upstream_api_key = upstream_api_key
+        self.queue = FairQueue(max_concurrency)
+        self.cache = ResponseCache(cache_size, cache_ttl)
+        self.inflight: dict[str, asyncio.Future] = {}
+        self.session = None
+
+        self.latency = LatencyWindow()
+        self.queue_time = LatencyWindow()
+        self.upstream_time = LatencyWindow()
+        self.coalesced = 0
+        self.errors = 0
+
+    # --- 生命周期 ---
+    async def on_startup(self, app):
+        self.session = ClientSession(
+            connector=TCPConnector(limit=self.queue.limit, keepalive_timeout=60),
+            timeout=ClientTimeout(total=UPSTREAM_TIMEOUT_SECONDS),
+        )
+
+    async def on_cleanup(self, app):
+        if self.session:
+            await self.session.close()
+
+    def build_app(self) -> web.Application:
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        app.router.add_get("/stats", self.handle_stats)
+        app.router.add_route("*", "/v1/{tail:.*}", self.handle_proxy)
+        app.on_startup.append(self.on_startup)
+        app.on_cleanup.append(self.on_cleanup)
+        return app
+
+    # --- 请求处理 ---
+    @staticmethod
+    def _client_id(request) -> str:
+        """按 Authorization 区分客户端（launch.py 为每个 Agent 分配独立的 key），否则使用来源地址"""
+        auth = request.headers.get("Authorization", "")
+        return auth.removeprefix("Bearer ").strip() or request.remote or "unknown"
+
+    def _upstream_headers(self) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if self.upstream_api_key:
+            headers["Authorization"] = f"Bearer {self.upstream_api_key}"
+        return headers
+
+    async def handle_proxy(self, request):
+        started = time.monotonic()
+        tail = request.match_info["tail"]
+        body = await request.read()
+
+        payload = None
+        if body:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = None
+        stream = isinstance(payload, dict) and bool(payload.get("stream"))
+
+        key = None
+        if request.method == "POST" and isinstance(payload, dict) and not stream:
+            key = ResponseCache.make_key(tail, payload)
+            cached = self.cache.get(key)
+            if cached:
+                self.latency.add(time.monotonic() - started)
+                return self._make_response(cached)
+            pending = self.inflight.get(key)
+            if pending:
+                # 相同请求正在处理中，直接等待其结果
+                self.coalesced += 1
+                response = await asyncio.shield(pending)
+                self.latency.add(time.monotonic() - started)
+                return self._make_response(response)
+            self.inflight[key] = asyncio.get_running_loop().create_future()
+
+        try:
+            queued_at = time.monotonic()
+            await self.queue.acquire(self._client_id(request))
+            self.queue_time.add(time.monotonic() - queued_at)
+            try:
+                upstream_started = time.monotonic()
+                if stream:
+                    return await self._forward_stream(request, tail, body)
+                response = await self._forward(request.method, tail, body, request.query)
+                self.upstream_time.add(time.monotonic() - upstream_started)
+            finally:
+                self.queue.release()
+        except asyncio.CancelledError:
+            # 发起方断开时，让合并等待的相同请求得到明确的错误而不是一直挂起
+            fut = self.inflight.pop(key, None) if key else None
+            if fut and not fut.done():
+                fut.set_result((503, b'{"error": {"message": "Request cancelled"}}', "application/json"))
+            raise
+        except Exception as e:
+            self.errors += 1
+            logging.error(f"❌ Upstream request failed: {e}")
+            response = (502, json.dumps({"error": {"message": f"Gateway upstream error: {e}"}}).encode(),
+                        "application/json")
+        finally:
+            self.latency.add(time.monotonic() - started)
+
+        if key:
+            if response[0] == 200:
+                self.cache.put(key, response)
+            fut = self.inflight.pop(key, None)
+            if fut and not fut.done():
+                fut.set_result(response)
+        return self._make_response(response)
+
+    async def _forward(self, method: str, tail: str, body: bytes, query) -> tuple:
+        async with self.session.request(
+            method, f"{self.upstream_url}/{tail}", data=body or None,
+            params=query, headers=self._upstream_headers(),
+        ) as resp:
+            data = await resp.read()
+            return resp.status, data, resp.content_type
+
+    async def _forward_stream(self, request, tail: str, body: bytes):
+        async with self.session.post(
+            f"{self.upstream_url}/{tail}", data=body, headers=self._upstream_headers()
+        ) as resp:
+            out = web.StreamResponse(status=resp.status)
+            out.content_type = resp.content_type
+            await out.prepare(request)
+            async for chunk in resp.content.iter_any():
+                await out.write(chunk)
+            await out.write_eof()
+            return out
+
+    @staticmethod
+    def _make_response(response: tuple) -> web.Response:
+        status, data, content_type = response
+        return web.Response(status=status, body=data, content_type=content_type)
+
+    async def handle_stats(self, request):
+        return web.json_response({
+            "pid": os.getpid(),
+            "upstream": self.upstream_url,
+            "max_concurrency": self.queue.limit,
+            "active": self.queue.active,
+            "waiting": self.queue.waiting,
+            "cache": {
+                "size": len(self.cache.entries),
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+                "coalesced": self.coalesced,
+            },
+            "errors": self.errors,
+            "latency": self.latency.summary(),
+            "queue_time": self.queue_time.summary(),
+            "upstream_time": self.upstream_time.summary(),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容 LLM 网关")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM_URL, help="上游 LLM 地址（含 /v1）")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="全局并发上限")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="缓存条目数，0 表示关闭")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL, help="缓存有效期（秒）")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+    gateway = LLMGateway(
+        args.upstream, DEFAULT_UPSTREAM_API_KEY,
+        max_concurrency=args.concurrency, cache_size=args.cache_size, cache_ttl=args.cache_ttl,
+    )
+    logging.info(f"🚀 LLM Gateway on http://127.0.0.1:{args.port}/v1 -> {gateway.upstream_url} "
+                 f"(concurrency={gateway.queue.limit}, cache={args.cache_size})")
+    # 允许滚动重启时新网关在旧网关退出前绑定同一端口；停止信号到来后 aiohttp 先关闭监听再等进行中的请求完成
+    web.run_app(gateway.build_app(), host="127.0.0.1", port=args.port, print=None,
+                reuse_port=hasattr(socket, "SO_REUSEPORT"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+tools/loop_monitor.py
+事件循环延迟监控
+- 心跳协程每隔 interval 秒醒来一次，实际醒来时间与预期之差即调度延迟，计入滚动窗口
+- 看门狗线程发现心跳停滞超过 threshold 秒时，抓取事件循环线程当前的调用栈，
+  记录一条指出阻塞调用位置的警告日志
+用于发现同步 I/O 等阻塞调用被重新放回事件循环的情况。
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+
+from tools.debug import frame_label, thread_stack
+from tools.stats import LatencyWindow
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STACK_DEPTH = 15
+
+
+def project_call_path(frame, depth: int = 3) -> str:
+    """调用栈中属于本项目的最内层几帧，由外到内以 → 连接，即阻塞调用的发起位置"""
+    labels = []
+    while frame is not None and len(labels) < depth:
+        if frame.f_code.co_filename.startswith(PROJECT_DIR) and frame.f_code.co_filename != __file__:
+            labels.append(frame_label(frame))
+        frame = frame.f_back
+    return " → ".join(reversed(labels)) or "unknown"
+
+
+class LoopLagMonitor:
+    """在事件循环所在线程中调用 start()"""
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, window: int = 1000):
+        self.threshold = threshold
+        self.interval = interval
+        self.lag = LatencyWindow(window)
+        self.stalls = 0
+        self.last_stall = None
+        self._beat = time.monotonic()
+        self._loop_thread = None
+        self._task = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-lag-monitor")
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+        logging.info(f"🐢 Event loop lag monitor started (threshold {self.threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag.add(max(0.0, loop.time() - expected))
+            self._beat = time.monotonic()
+
+    def _watch(self):
+        """看门狗：每次停滞只报告一次"""
+        reported_beat = None
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or beat == reported_beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            reported_beat = beat
+            self._report(frame, blocked)
+
+    def _report(self, frame, blocked: float):
+        call_path = project_call_path(frame)
+        stack = thread_stack(frame)[-STACK_DEPTH:]
+        self.stalls += 1
+        self.last_stall = {
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "blocked_ms": round(blocked * 1000, 1),
+            "call_site": call_path,
+            "stack": stack,
+        }
+        logging.warning(
+            f"🐢 Event loop blocked for {blocked * 1000:.0f}ms+ at {call_path} (in {stack[-1]})\n    "
+            + "\n    ".join(stack)
+        )
+
+    def summary(self) -> dict:
+        return {
+            "lag": self.lag.summary(),
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "stalls": self.stalls,
+            "last_stall": self.last_stall,
+        }
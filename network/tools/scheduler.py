@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+tools/scheduler.py
+优先级调度模块
+按资源（学生 Agent）限制并发，排队请求按优先级类别加权公平放行：
+- 权重越高的类别获得越多的放行机会（stride 调度）
+- 等待超过 max_wait 秒的请求优先放行，避免低优先级饿死
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from tools.stats import LatencyWindow
+
+# 默认类别与权重：交互式请求的放行机会是批量任务的 4 倍
+DEFAULT_WEIGHTS = {"interactive": 4, "batch": 1}
+
+
+class _Resource:
+    """单个资源的占用计数与各类别等待队列"""
+
+    def __init__(self, classes):
+        self.active = 0
+        self.queues = {name: deque() for name in classes}
+        self.passes = {name: 0.0 for name in classes}
+        # 虚拟时钟：最近一次放行时排队类别的最小 pass 值
+        self.vtime = 0.0
+
+
+class PriorityScheduler:
+    """按优先级类别加权公平分配每个资源的执行名额"""
+
+    def __init__(self, weights: dict = None, capacity: int = 1, max_wait: float = 60.0):
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.capacity = max(1, capacity)
+        self.max_wait = max_wait
+        self.resources: dict[str, _Resource] = {}
+        self.queue_wait = {name: LatencyWindow() for name in self.weights}
+
+    @property
+    def classes(self):
+        return tuple(self.weights)
+
+    def _resource(self, key: str) -> _Resource:
+        if key not in self.resources:
+            self.resources[key] = _Resource(self.weights)
+        return self.resources[key]
+
+    @asynccontextmanager
+    async def slot(self, resource: str, priority: str):
+        """占用 resource 的一个名额，退出时归还"""
+        await self.acquire(resource, priority)
+        try:
+            yield
+        finally:
+            self.release(resource)
+
+    async def acquire(self, resource: str, priority: str):
+        if priority not in self.weights:
+            raise ValueError(f"Unknown priority: {priority}")
+
+        res = self._resource(resource)
+        enqueued_at = time.monotonic()
+        if res.active < self.capacity and not any(res.queues.values()):
+            res.active += 1
+            self.queue_wait[priority].add(0.0)
+            return
+
+        if not res.queues[priority]:
+            # 类别由空闲变为排队：pass 从当前虚拟时间起算，空闲期间积累的落后值不能用来插队
+            waiting = [res.passes[name] for name, queue in res.queues.items() if queue]
+            res.passes[priority] = min(waiting) if waiting else res.vtime
+
+        fut = asyncio.get_running_loop().create_future()
+        entry = (enqueued_at, fut)
+        res.queues[priority].append(entry)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 名额已转交给本请求，取消时需要归还
+                self.release(resource)
+            elif entry in res.queues[priority]:
+                res.queues[priority].remove(entry)
+            raise
+        self.queue_wait[priority].add(time.monotonic() - enqueued_at)
+
+    def release(self, resource: str):
+        # 名额直接转交给下一个等待者，active 数保持不变
+        res = self._resource(resource)
+        while True:
+            name = self._pick(res)
+            if name is None:
+                res.active -= 1
+                return
+            _, fut = res.queues[name].popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+
+    def _pick(self, res: _Resource):
+        """选择下一个放行的类别：先处理等待超时的请求，再按 stride 加权轮转"""
+        waiting = [name for name, queue in res.queues.items() if queue]
+        if not waiting:
+            return None
+
+        now = time.monotonic()
+        oldest = min(waiting, key=lambda name: res.queues[name][0][0])
+        leader = min(waiting, key=lambda name: res.passes[name])
+        chosen = oldest if now - res.queues[oldest][0][0] >= self.max_wait else leader
+
+        res.vtime = max(res.vtime, res.passes[leader])
+        res.passes[chosen] += 1.0 / self.weights[chosen]
+        return chosen
+
+    def summary(self) -> dict:
+        return {
+            "waiting": {
+                name: sum(len(res.queues[name]) for res in self.resources.values())
+                for name in self.weights
+            },
+            "queue_wait": {name: window.summary() for name, window in self.queue_wait.items()},
+        }
@@ -1,28 +1,39 @@
+import os
 import requests
 import json
 
-def send_result_to_server(agent_id: str, content: str) -> str:
+from tools.tracing import current_traceparent
+
+LOG_SERVER_URL = os.environ.get("LOG_SERVER_URL", "http://localhost:9999/log")
+
+def send_result_to_server(agent_id: str, content: str, job_id: str = None) -> str:
     """
     将 Agent 的建议通过 HTTP POST 发送到日志服务器。
     
     Args:
         agent_id: 发送者的 ID (e.g., "gryffindor-student")
         content: 要发送的建议文本内容
+        job_id: 可选，所属工作流的 job_id，便于日志服务器关联同一请求的结果
     
     Returns:
         操作结果字符串
     """
-    server_url = "http://localhost:9999/log"
+    server_url = LOG_SERVER_URL
     
     payload = {
         "agent": agent_id,
         "content": content,
         "timestamp": "" # 可选，由服务器处理
     }
+    if job_id:
+        payload["job_id"] = job_id
+    # 启用追踪时附带 W3C traceparent 头，日志服务器可据此关联到同一条 trace
+    traceparent = current_traceparent()
+    headers = {"traceparent": traceparent} if traceparent else None
 
     try:
         # 设置超时，防止长时间阻塞
-        resp = requests.post(server_url, json=payload, timeout=5)
+        resp = requests.post(server_url, json=payload, headers=headers, timeout=5)
         
         if resp.status_code == 200:
             print(f"✅ [{agent_id}] 成功发送建议到服务器")
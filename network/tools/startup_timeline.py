@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+tools/startup_timeline.py
+启动耗时时间线（launch.py --profile-startup）
+各阶段以墙钟时间记录，起点可由环境变量 STARTUP_ORIGIN 传入，
+这样启动器与子进程（如 weather_connector）的时间点位于同一时间轴上。
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+# 由 launch.py 设置：子进程据此判断是否记录时间线，以及结果写到哪个目录
+PROFILE_DIR_ENV = "PROFILE_STARTUP_DIR"
+ORIGIN_ENV = "STARTUP_ORIGIN"
+
+
+class StartupTimeline:
+    """按顺序记录 (阶段, 相对起点秒数)"""
+
+    def __init__(self, name: str, origin: float = None):
+        self.name = name
+        if origin is None:
+            origin = float(os.environ.get(ORIGIN_ENV, time.time()))
+        self.origin = origin
+        self.phases: list[tuple[str, float]] = []
+
+    def mark(self, phase: str, at: float = None) -> float:
+        """记录一个阶段完成的时间点，返回相对起点的秒数"""
+        offset = (at if at is not None else time.time()) - self.origin
+        self.phases.append((phase, offset))
+        return offset
+
+    def merge(self, other: dict):
+        """并入另一进程写出的时间线（to_dict 的结果），阶段名加上来源前缀"""
+        shift = other["origin"] - self.origin
+        for phase, offset in other["phases"]:
+            self.phases.append((f"{other['name']}: {phase}", offset + shift))
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "origin": self.origin, "phases": self.phases}
+
+    def report(self) -> str:
+        """按时间排序的文本报告，含每一步相对上一步的增量"""
+        lines = [f"⏱️  Startup timeline ({self.name})", f"{'t (s)':>8} {'Δ (s)':>8}  phase"]
+        previous = 0.0
+        for phase, offset in sorted(self.phases, key=lambda p: p[1]):
+            lines.append(f"{offset:>8.3f} {offset - previous:>8.3f}  {phase}")
+            previous = offset
+        return "\n".join(lines)
+
+    def save(self, directory) -> Path:
+        path = Path(directory) / f"startup_{self.name}.json"
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        return path
+
+
+def load_timeline(directory, name: str):
+    """读取子进程写出的时间线，不存在时返回 None"""
+    path = Path(directory) / f"startup_{name}.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
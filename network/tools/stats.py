@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+tools/stats.py
+统计工具模块
+提供滚动窗口的延迟采样与百分位计算
+"""
+import math
+from collections import deque
+
+
+def percentile(values, q: float) -> float:
+    """计算百分位数（最近秩法），q 取 0~100；空序列返回 0.0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LatencyWindow:
+    """保存最近 N 个耗时样本（秒），用于输出 p50/p95/p99 等统计"""
+
+    def __init__(self, size: int = 1000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, q: float) -> float:
+        return percentile(self.samples, q)
+
+    def summary(self) -> dict:
+        """返回可直接 JSON 序列化的统计摘要（毫秒）"""
+        return {
+            "count": self.count,
+            "p50_ms": round(self.percentile(50) * 1000, 1),
+            "p95_ms": round(self.percentile(95) * 1000, 1),
+            "p99_ms": round(self.percentile(99) * 1000, 1),
+            "max_ms": round(max(self.samples, default=0.0) * 1000, 1),
+        }
+
+
+class AdaptiveTimeouts:
+    """
+    按 Agent 记录任务耗时，并据此推导超时：p99 × factor，限制在 [floor, ceiling] 内。
+    样本不足时使用默认超时。
+    超时的任务没有真实耗时，不计入样本（否则 p99 × factor 只会越来越大，卡死的 Agent 会把期限推到上限）；
+    改为单独计数。样本不足时，每连续超时一次默认期限乘以 backoff（不低于 floor），没有回应的 Agent 更快失败；
+    每第 probe_every 次连续超时用完整的默认期限探测一次，慢但正常的模型仍有机会完成并恢复。
+    已有足够样本时超时不再缩短期限，不会低于 p99 推导出的值。任务成功完成后计数清零。
+    """
+
+    def __init__(self, default: float, factor: float = 2.0, floor: float = 20.0,
+                 ceiling: float = 300.0, min_samples: int = 5, window: int = 200, backoff: float = 0.5,
+                 probe_every: int = 4):
+        self.default = default
+        self.factor = factor
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self.window = window
+        self.backoff = backoff
+        self.probe_every = max(1, probe_every)
+        self.windows: dict[str, LatencyWindow] = {}
+        self.consecutive_timeouts: dict[str, int] = {}
+        self.total_timeouts: dict[str, int] = {}
+
+    def record(self, key: str, seconds: float):
+        """记录一次成功完成的耗时，并清零连续超时计数"""
+        self.windows.setdefault(key, LatencyWindow(self.window)).add(seconds)
+        self.consecutive_timeouts[key] = 0
+
+    def record_timeout(self, key: str):
+        """记录一次超时（删失样本，不进入耗时窗口）"""
+        self.consecutive_timeouts[key] = self.consecutive_timeouts.get(key, 0) + 1
+        self.total_timeouts[key] = self.total_timeouts.get(key, 0) + 1
+
+    def timeout_for(self, key: str) -> float:
+        window = self.windows.get(key)
+        if window is not None and len(window.samples) >= self.min_samples:
+            return min(self.ceiling, max(self.floor, window.percentile(99) * self.factor))
+        misses = self.consecutive_timeouts.get(key, 0)
+        if misses % self.probe_every == 0:
+            return self.default
+        return max(min(self.floor, self.default), self.default * self.backoff ** misses)
+
+    def summary(self) -> dict:
+        keys = list(self.windows) + [k for k in self.total_timeouts if k not in self.windows]
+        return {
+            key: {
+                **(self.windows[key].summary() if key in self.windows else LatencyWindow().summary()),
+                "timeouts": self.total_timeouts.get(key, 0),
+                "consecutive_timeouts": self.consecutive_timeouts.get(key, 0),
+                "timeout_s": round(self.timeout_for(key), 1),
+            }
+            for key in keys
+        }
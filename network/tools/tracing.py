@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+tools/tracing.py
+轻量的分布式追踪
+- span 通过 contextvars 传递：asyncio 任务与 asyncio.to_thread 中的调用自动成为当前 span 的子 span
+- 跨进程使用 W3C traceparent（00-<trace_id>-<span_id>-<flags>），随委派任务的 payload 传给学生
+- 导出到本地 JSONL 文件，或以 OTLP/HTTP JSON 发往本地 collector；导出在后台线程批量进行
+- 采样在根 span 决定，子 span 与下游进程沿用同一决定
+同时提供日志过滤器，为每条日志附加当前的 project_id 与 trace_id。
+
+环境变量:
+  TRACE_EXPORTER       未设置/none: 关闭；jsonl: 写 TRACE_FILE；otlp: 发往 TRACE_OTLP_ENDPOINT
+  TRACE_FILE           默认 logs/traces.jsonl
+  TRACE_OTLP_ENDPOINT  默认 http://localhost:4318/v1/traces
+  TRACE_SAMPLE_RATE    根 span 的采样率，0~1，默认 1
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "").lower()
+TRACE_FILE = os.environ.get("TRACE_FILE", os.path.join(PROJECT_DIR, "logs", "traces.jsonl"))
+TRACE_OTLP_ENDPOINT = os.environ.get("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "1"))
+
+EXPORT_BATCH_SIZE = 256
+EXPORT_INTERVAL = 1.0
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_project_id = contextvars.ContextVar("project_id", default=None)
+
+
+# --- traceparent ---
+def parse_traceparent(value) -> tuple:
+    """解析 W3C traceparent，返回 (trace_id, span_id, sampled)；格式不对时返回 None"""
+    if not isinstance(value, str):
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def _new_id(nbytes: int) -> str:
+    return f"{random.getrandbits(nbytes * 8):0{nbytes * 2}x}"
+
+
+# --- Span ---
+class Span:
+    __slots__ = ("name", "service", "trace_id", "span_id", "parent_id", "sampled",
+                 "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, service: str, trace_id: str, parent_id: str, sampled: bool, attributes: dict):
+        self.name = name
+        self.service = service
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_error(self, message: str):
+        self.error = message
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "service": self.service,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """追踪关闭时使用的空 span，调用方无需判断是否启用"""
+    traceparent = None
+
+    def set(self, key: str, value):
+        pass
+
+    def set_error(self, message: str):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+# --- 导出 ---
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: list) -> dict:
+    """按 OTLP/HTTP JSON 格式组织（每个 service 一个 resourceSpans）"""
+    by_service = {}
+    for span in spans:
+        by_service.setdefault(span.service, []).append({
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id or "",
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items() if v is not None],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        })
+    return {"resourceSpans": [
+        {
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+            "scopeSpans": [{"scope": {"name": "travel-guide-network"}, "spans": items}],
+        }
+        for service, items in by_service.items()
+    ]}
+
+
+class SpanExporter:
+    """后台线程批量导出已结束的 span；队列满时丢弃，不阻塞业务"""
+
+    def __init__(self, kind: str, path: str = TRACE_FILE, endpoint: str = TRACE_OTLP_ENDPOINT):
+        self.kind = kind
+        self.path = path
+        self.endpoint = endpoint
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=10000)
+        # 退出时的 flush 可能与后台线程同时导出，串行化以免 JSONL 行交错
+        self._export_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, first=None) -> list:
+        batch = [first] if first is not None else []
+        while len(batch) < EXPORT_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=EXPORT_INTERVAL)
+            except queue.Empty:
+                continue
+            self._export(self._drain(first))
+
+    def flush(self):
+        """进程退出前导出剩余的 span"""
+        batch = self._drain()
+        while batch:
+            self._export(batch)
+            batch = self._drain()
+
+    def _export(self, spans: list):
+        with self._export_lock:
+            self._export_batch(spans)
+
+    def _export_batch(self, spans: list):
+        try:
+            if self.kind == "otlp":
+                request = urllib.request.Request(
+                    self.endpoint, data=json.dumps(to_otlp(spans)).encode("utf-8"),
+                    headers={"Content-Type": "application/json"}, method="POST",
+                )
+                with urllib.request.urlopen(request, timeout=5):
+                    pass
+            else:
+                # 协调器与学生进程可能写同一个文件，整批一次写入（追加模式下不会与其他进程的行交错）
+                lines = "".join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n" for span in spans)
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+        except Exception as e:
+            self.dropped += len(spans)
+            logging.warning(f"⚠️ Failed to export {len(spans)} spans ({self.kind}): {e}")
+
+
+# --- Tracer ---
+class Tracer:
+    def __init__(self, service: str, exporter: SpanExporter = None, sample_rate: float = 1.0):
+        self.service = service
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, traceparent: str = None, **attributes):
+        """
+        开始一个 span，父 span 取 traceparent（跨进程传入）或当前上下文中的 span。
+        需与 end_span 配对；开始与结束不在同一段代码时使用（如学生端的任务）。关闭时返回 None。
+        """
+        if not self.enabled:
+            return None
+        remote = parse_traceparent(traceparent)
+        parent = _current_span.get()
+        if remote:
+            trace_id, parent_id, sampled = remote
+        elif parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        else:
+            trace_id, parent_id, sampled = _new_id(16), None, random.random() < self.sample_rate
+        if _project_id.get() and "project_id" not in attributes:
+            attributes["project_id"] = _project_id.get()
+        return Span(name, self.service, trace_id, parent_id, sampled, attributes)
+
+    def end_span(self, span: Span, error: str = None):
+        if span is None:
+            return
+        span.end_ns = time.time_ns()
+        if error:
+            span.error = error
+        if span.sampled:
+            self.exporter.submit(span)
+
+    @contextmanager
+    def span(self, name: str, traceparent: str = None, **attributes):
+        """with tracer.span("weather.forecast", city=city) as span: ...  关闭时 span 为 NOOP_SPAN"""
+        span = self.start_span(name, traceparent, **attributes)
+        if span is None:
+            yield NOOP_SPAN
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = span.error or f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+
+def tracer_from_env(service: str) -> Tracer:
+    """按 TRACE_* 环境变量创建 Tracer；未启用时所有 span 都是空操作"""
+    if TRACE_EXPORTER in ("jsonl", "otlp"):
+        exporter = SpanExporter(TRACE_EXPORTER)
+        target = TRACE_FILE if TRACE_EXPORTER == "jsonl" else TRACE_OTLP_ENDPOINT
+        logging.info(f"🧵 Tracing enabled: {TRACE_EXPORTER} -> {target} (sample rate {TRACE_SAMPLE_RATE:g})")
+        return Tracer(service, exporter, TRACE_SAMPLE_RATE)
+    return Tracer(service)
+
+
+# 进程内共用的 tracer，由入口脚本调用 init_tracer 设置服务名；工具模块通过 span() 使用
+TRACER = Tracer("travel-guide")
+
+
+def init_tracer(service: str) -> Tracer:
+    global TRACER
+    TRACER = tracer_from_env(service)
+    return TRACER
+
+
+def span(name: str, traceparent: str = None, **attributes):
+    return TRACER.span(name, traceparent, **attributes)
+
+
+def current_traceparent():
+    current = _current_span.get()
+    return current.traceparent if current is not None else None
+
+
+def record_error(message: str):
+    """把当前 span 标记为失败（用于捕获后不再抛出的异常）"""
+    current = _current_span.get()
+    if current is not None:
+        current.set_error(message)
+
+
+# --- 日志关联 ---
+def set_project_id(project_id: str):
+    """设置当前上下文（工作流任务）的 project_id，之后的日志与 span 都会带上它"""
+    _project_id.set(project_id)
+
+
+class TraceContextFilter(logging.Filter):
+    """为日志记录附加 project_id 与 trace_id 字段（无上下文时为 "-"）"""
+
+    def filter(self, record):
+        current = _current_span.get()
+        record.project_id = _project_id.get() or "-"
+        record.trace_id = current.trace_id if current is not None else "-"
+        return True
+
+
+def install_log_context():
+    """在根 logger 的所有 handler 上安装 TraceContextFilter（需在 logging.basicConfig 之后调用）"""
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(TraceContextFilter())
@@ -6,12 +6,156 @@ tools/weather.py
 """
 import logging
 import json
+import math
+import os
+import threading
+import time
 import requests
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+from tools.tracing import span
+from tools.weather_history import HISTORY_STORE
 
 # --- 配置常量 ---
-WEATHER_API_URL = "https://api.open-meteo.com/v1/forecast"
-GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+# 可通过环境变量指向本地模拟服务（基准测试使用）
+WEATHER_API_URL = os.environ.get("OPEN_METEO_FORECAST_URL", "https://api.open-meteo.com/v1/forecast")
+GEOCODING_URL = os.environ.get("OPEN_METEO_GEOCODING_URL", "https://geocoding-api.open-meteo.com/v1/search")
+DAILY_FIELDS = "temperature_2m_max,temperature_2m_min,weather_code,precipitation_sum,wind_speed_10m_max"
+
+# 预报网格缓存：坐标按 WEATHER_GRID_DEG 度吸附到网格，同一网格、同一日期的地点共用一份预报（以网格中心取数）
+# WEATHER_GRID_DEG=0 时关闭，按原始坐标逐次请求
+WEATHER_GRID_DEG = float(os.environ.get("WEATHER_GRID_DEG", "0.1"))
+FORECAST_CACHE_TTL = float(os.environ.get("FORECAST_CACHE_TTL", "1800"))
+FORECAST_CACHE_SIZE = int(os.environ.get("FORECAST_CACHE_SIZE", "4096"))
+
+
+class ForecastGridCache:
+    """
+    (网格, 日期) -> 当日预报 的内存索引，带过期时间。
+    get_or_fetch 对同一键的并发请求只发出一次预报请求，其余线程等待其结果。
+    """
+
+    def __init__(self, grid_deg: float, ttl: float, max_entries: int):
+        self.grid_deg = grid_deg
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: dict[tuple, tuple[float, dict]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._inflight: dict[tuple, threading.Event] = {}
+
+    def cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self.grid_deg), math.floor(longitude / self.grid_deg)
+
+    def center(self, cell: tuple[int, int]) -> tuple[float, float]:
+        """网格中心坐标：同一网格内无论哪个地点先请求，取到的都是同一份预报"""
+        return tuple(round((i + 0.5) * self.grid_deg, 4) for i in cell)
+
+    def get_or_fetch(self, latitude: float, longitude: float, date_str: str, fetch) -> dict:
+        """命中则返回缓存的预报，否则以网格中心坐标调用 fetch(lat, lon, date_str) 并写入缓存"""
+        key = (self.cell(latitude, longitude), date_str)
+        while True:
+            with self._lock:
+                entry = self.entries.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    self.hits += 1
+                    return entry[1]
+                pending = self._inflight.get(key)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._inflight[key] = threading.Event()
+                    break
+            # 同一网格的预报正在请求中，等待后重新查缓存（请求失败时由下一个线程重试）
+            pending.wait()
+
+        try:
+            forecast = fetch(*self.center(key[0]), date_str)
+            with self._lock:
+                self._store(key, forecast)
+            return forecast
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set()
+
+    def _store(self, key: tuple, forecast: dict):
+        now = time.monotonic()
+        if len(self.entries) >= self.max_entries:
+            for stale in [k for k, (expires, _) in self.entries.items() if expires <= now]:
+                del self.entries[stale]
+            if len(self.entries) >= self.max_entries:
+                # 仍然满：淘汰最早写入的一项
+                del self.entries[next(iter(self.entries))]
+        self.entries[key] = (now + self.ttl, forecast)
+
+    def summary(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "grid_deg": self.grid_deg,
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+FORECAST_CACHE = (ForecastGridCache(WEATHER_GRID_DEG, FORECAST_CACHE_TTL, FORECAST_CACHE_SIZE)
+                  if WEATHER_GRID_DEG > 0 else None)
+
+
+def fetch_daily_forecast(latitude: float, longitude: float, date_str: str) -> dict:
+    """请求某坐标某一天的预报，返回当日各项数值"""
+    with span("weather.forecast", latitude=latitude, longitude=longitude, date=date_str):
+        weather_resp = requests.get(
+            WEATHER_API_URL,
+            params={
+                "latitude": latitude,
+                "longitude": longitude,
+                "daily": DAILY_FIELDS,
+                "timezone": "auto",
+                "start_date": date_str,
+                "end_date": date_str,
+            },
+            timeout=5,
+        )
+    return parse_daily_forecast(weather_resp.json(), date_str)
+
+
+def parse_daily_forecast(payload: dict, date_str: str) -> dict:
+    """从 /v1/forecast 的响应中取出某一天的各项数值"""
+    data = payload["daily"]
+    idx = data["time"].index(date_str)
+    return {
+        "temp_max": data["temperature_2m_max"][idx],
+        "temp_min": data["temperature_2m_min"][idx],
+        "weather_code": data["weather_code"][idx],
+        "precipitation": data["precipitation_sum"][idx],
+        "wind_max": data["wind_speed_10m_max"][idx],
+    }
+
+
+def parse_date_input(date_input: str, today: date) -> date:
+    """
+    解析请求中的日期：YYYY-MM-DD、YYYYMMDD，或相对 today 的天数。
+    紧凑格式显式解析（date.fromisoformat 在 Python 3.11 之前不接受），且优先于天数偏移。
+    无法解析时抛出 ValueError 或 OverflowError
+    """
+    if len(date_input) == 8 and date_input.isdigit():
+        return datetime.strptime(date_input, "%Y%m%d").date()
+    if len(date_input) == 10 and date_input[4] == date_input[7] == "-":
+        return date.fromisoformat(date_input)
+    return today + timedelta(days=int(date_input))
+
+
+def forecast_cache_stats() -> dict:
+    """预报网格缓存的命中统计（供 /stats 输出）"""
+    return FORECAST_CACHE.summary() if FORECAST_CACHE is not None else {"grid_deg": 0}
+
+
+def weather_history_stats() -> dict:
+    """本地历史库的命中统计（供 /stats 输出）"""
+    return HISTORY_STORE.summary() if HISTORY_STORE is not None else {"enabled": False}
 
 
 class WeatherService:
@@ -26,51 +170,54 @@ class WeatherService:
         :return: JSON 字符串
         """
         try:
-            # 1. 地理编码
-            geo_resp = requests.get(
-                GEOCODING_URL,
-                params={"name": city, "count": 1, "language": "zh", "format": "json"},
-                timeout=5,
-            )
-            city_info = geo_resp.json().get("results", [{}])[0]
+            # 1. 日期处理：YYYY-MM-DD、YYYYMMDD，或相对今天的天数；按日期对象比较是否为过去的日期
+            today = date.today()
+            day = today
+            if date_input:
+                try:
+                    day = parse_date_input(date_input, today)
+                except (ValueError, OverflowError):
+                    message = f"Invalid date: {date_input} (expected YYYY-MM-DD, YYYYMMDD or a day offset)"
+                    return json.dumps({"error": message}, ensure_ascii=False)
+            date_str = day.isoformat()
+            past = day < today
+
+            # 2. 地理编码（过去的日期且城市已回填到历史库时，直接使用库中的坐标）
+            city_info = HISTORY_STORE.lookup_city(city) if past and HISTORY_STORE is not None else None
+            if city_info is None:
+                with span("weather.geocode", city=city) as geo_span:
+                    geo_resp = requests.get(
+                        GEOCODING_URL,
+                        params={"name": city, "count": 1, "language": "zh", "format": "json"},
+                        timeout=5,
+                    )
+                    city_info = geo_resp.json().get("results", [{}])[0]
+                    geo_span.set("found", bool(city_info))
             if not city_info:
                 return json.dumps({"error": "City not found"})
 
-            # 2. 日期处理
-            if date_input:
-                try:
-                    offset = int(date_input)
-                    date_str = (datetime.now() + timedelta(days=offset)).strftime("%Y-%m-%d")
-                except ValueError:
-                    date_str = date_input
-            else:
-                date_str = datetime.now().strftime("%Y-%m-%d")
-
-            # 3. 请求天气数据
-            weather_resp = requests.get(
-                WEATHER_API_URL,
-                params={
-                    "latitude": city_info["latitude"],
-                    "longitude": city_info["longitude"],
-                    "daily": "temperature_2m_max,temperature_2m_min,weather_code,precipitation_sum,wind_speed_10m_max",
-                    "timezone": "auto",
-                    "start_date": date_str,
-                    "end_date": date_str,
-                },
-                timeout=5,
-            )
-            data = weather_resp.json()["daily"]
-            idx = data["time"].index(date_str)
-
-            return json.dumps({
-                "city": city_info.get("name"),
-                "date": date_str,
-                "temp_max": data["temperature_2m_max"][idx],
-                "temp_min": data["temperature_2m_min"][idx],
-                "weather_code": data["weather_code"][idx],
-                "precipitation": data["precipitation_sum"][idx],
-                "wind_max": data["wind_speed_10m_max"][idx],
-            }, ensure_ascii=False)
+            # 3. 天气数据：过去的日期先查本地历史库，否则请求预报（同一网格、同一日期的地点共用缓存的预报）
+            latitude, longitude = city_info["latitude"], city_info["longitude"]
+            forecast, climate = None, None
+            if HISTORY_STORE is not None:
+                with span("weather.history", date=date_str) as history_span:
+                    try:
+                        forecast = HISTORY_STORE.get_day(latitude, longitude, date_str) if past else None
+                        climate = HISTORY_STORE.climatology(latitude, longitude, date_str)
+                    except (OSError, ValueError) as e:
+                        # 历史库损坏或日期无法解析时照常请求预报
+                        logging.warning(f"⚠️ Weather history lookup failed for {city} {date_str}: {e}")
+                    history_span.set("hit", forecast is not None)
+            if forecast is None:
+                if FORECAST_CACHE is not None:
+                    forecast = FORECAST_CACHE.get_or_fetch(latitude, longitude, date_str, fetch_daily_forecast)
+                else:
+                    forecast = fetch_daily_forecast(latitude, longitude, date_str)
+
+            data = {"city": city_info.get("name"), "date": date_str, **forecast}
+            if climate is not None:
+                data["climate"] = climate
+            return json.dumps(data, ensure_ascii=False)
 
         except Exception as e:
             logging.error(f"Weather Service Error: {e}")
@@ -126,7 +273,7 @@ class WeatherService:
             code = str(data.get("weather_code", 0))
             desc = weather_map.get(code, f"未知天气(code:{code})")
 
-            return (
+            text = (
                 f"【{data['city']} 天气报告】\n"
                 f"日期: {data['date']}\n"
                 f"天气: {desc}\n"
@@ -134,6 +281,19 @@ class WeatherService:
                 f"降水: {data['precipitation']}mm\n"
                 f"风速: {data['wind_max']}km/h"
             )
+            climate = data.get("climate")
+            if climate:
+                # 往年同期（历史库中有该地点时附加）
+                text += (
+                    f"\n历史同期: 近{climate['years']}年平均 {climate['temp_min']}°C ~ {climate['temp_max']}°C，"
+                    f"日均降水 {climate['precipitation']}mm"
+                )
+                if climate.get("rain_days") is not None:
+                    text += f"，降水日占 {climate['rain_days']:.0%}"
+                last_year = climate.get("last_year")
+                if last_year and last_year.get("temp_max") is not None:
+                    text += f"\n去年同日: {last_year['temp_min']}°C ~ {last_year['temp_max']}°C，降水 {last_year['precipitation']}mm"
+            return text
         except Exception as e:
             return "Failed to parse weather data"
 
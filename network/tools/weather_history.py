@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+tools/weather_history.py
+本地历史天气库
+每个地点（按 HISTORY_GRID_DEG 度吸附到网格）一个文件，逐日数值按列存放，读取时 mmap 映射：
+  头部  magic "WXH1" | 版本 | 字段数 | 首日（距 1970-01-01 的天数）| 天数 | 纬度 | 经度
+  数据  每个字段一列 float32（小端），缺测为 NaN；第 d 天第 f 个字段位于 头部 + (f * 天数 + d) * 4
+按日期取值只需一次减法定位行号，不扫描文件。
+cities.json 记录已回填城市的名称与坐标，历史日期的查询连地理编码也不必联网。
+
+回填:
+  python tools/weather_history.py backfill --cities Beijing,Shanghai --start 2015-01-01 --end 2025-12-31
+  python tools/weather_history.py import archive.json --cities Beijing      # Open-Meteo archive 接口的 JSON 导出
+  python tools/weather_history.py show Beijing 2024-07-01
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from datetime import date, datetime, timedelta
+
+import requests
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WEATHER_HISTORY_DIR = os.environ.get("WEATHER_HISTORY_DIR", os.path.join(PROJECT_DIR, "data", "weather_history"))
+HISTORY_GRID_DEG = float(os.environ.get("HISTORY_GRID_DEG", "0.1"))
+ARCHIVE_URL = os.environ.get("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+GEOCODING_URL = os.environ.get("OPEN_METEO_GEOCODING_URL", "https://geocoding-api.open-meteo.com/v1/search")
+# 历史同期统计取目标日期前后各 CLIMATE_WINDOW_DAYS 天
+CLIMATE_WINDOW_DAYS = int(os.environ.get("CLIMATE_WINDOW_DAYS", "3"))
+
+# 字段顺序即文件中的列顺序；键与 weather.fetch_daily_forecast 的返回值一致
+FIELDS = ("temp_max", "temp_min", "weather_code", "precipitation", "wind_max")
+ARCHIVE_FIELDS = {
+    "temp_max": "temperature_2m_max",
+    "temp_min": "temperature_2m_min",
+    "weather_code": "weather_code",
+    "precipitation": "precipitation_sum",
+    "wind_max": "wind_speed_10m_max",
+}
+
+MAGIC = b"WXH1"
+VERSION = 1
+HEADER = struct.Struct("<4sHHiidd")
+EPOCH = date(1970, 1, 1)
+
+
+def _day_number(day: date) -> int:
+    return (day - EPOCH).days
+
+
+def _clean(value: float):
+    """NaN（缺测）转为 None；float32 存储的数值按两位小数还原（源数据为一位小数）"""
+    return None if math.isnan(value) else round(value, 2)
+
+
+def _same_day(day: date, year: int) -> date:
+    """另一年的同一天；2 月 29 日在平年取 2 月 28 日"""
+    try:
+        return day.replace(year=year)
+    except ValueError:
+        return day.replace(year=year, day=28)
+
+
+# --- 单个地点的序列文件 ---
+class HistorySeries:
+    """只读映射一个序列文件；文件被回填替换后由 WeatherHistoryStore 重新打开"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        magic, version, n_fields, self.first_day, self.n_days, self.latitude, self.longitude = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or n_fields != len(FIELDS):
+            raise ValueError(f"{path} is not a weather history file (v{VERSION})")
+        if len(self._map) < HEADER.size + n_fields * self.n_days * 4:
+            raise ValueError(f"{path} is truncated")
+
+    def row(self, day: date):
+        """日期对应的行号，超出范围时返回 None"""
+        index = _day_number(day) - self.first_day
+        return index if 0 <= index < self.n_days else None
+
+    def column(self, field: str, start: int, count: int) -> tuple:
+        """某字段从 start 行起的 count 个值（调用方保证范围有效）"""
+        offset = HEADER.size + (FIELDS.index(field) * self.n_days + start) * 4
+        return struct.unpack_from(f"<{count}f", self._map, offset)
+
+    def day(self, day: date):
+        """某日的各字段数值；不在范围内或全部缺测时返回 None"""
+        index = self.row(day)
+        if index is None:
+            return None
+        values = {field: _clean(self.column(field, index, 1)[0]) for field in FIELDS}
+        if all(v is None for v in values.values()):
+            return None
+        if values["weather_code"] is not None:
+            values["weather_code"] = int(values["weather_code"])
+        return values
+
+    def read_all(self) -> dict:
+        """全部数据 {日期字符串: {字段: 值}}，回填合并时使用"""
+        columns = {field: self.column(field, 0, self.n_days) for field in FIELDS}
+        start = EPOCH + timedelta(days=self.first_day)
+        return {
+            (start + timedelta(days=i)).isoformat(): {field: _clean(columns[field][i]) for field in FIELDS}
+            for i in range(self.n_days)
+        }
+
+
+def write_series(path: str, latitude: float, longitude: float, days: dict):
+    """把 {日期字符串: {字段: 值}} 写成序列文件；先写临时文件再原子替换，正在读取的进程不受影响"""
+    dates = sorted(date.fromisoformat(d) for d in days)
+    first, n_days = dates[0], (dates[-1] - dates[0]).days + 1
+    columns = {field: [math.nan] * n_days for field in FIELDS}
+    for day_str, values in days.items():
+        index = (date.fromisoformat(day_str) - first).days
+        for field in FIELDS:
+            value = values.get(field)
+            if value is not None:
+                columns[field][index] = float(value)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(FIELDS), _day_number(first), n_days, latitude, longitude))
+        for field in FIELDS:
+            f.write(struct.pack(f"<{n_days}f", *columns[field]))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# --- 历史库 ---
+class WeatherHistoryStore:
+    """
+    按网格组织的历史天气库。打开的序列文件按 (inode, mtime) 缓存，回填替换文件后自动重新映射；
+    可在 asyncio.to_thread 的多个线程中同时查询。
+    """
+
+    def __init__(self, root: str, grid_deg: float = HISTORY_GRID_DEG):
+        self.root = root
+        self.grid_deg = grid_deg
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._series: dict[str, tuple] = {}
+        self._cities = (None, {})
+
+    def cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self.grid_deg), math.floor(longitude / self.grid_deg)
+
+    def path_for(self, latitude: float, longitude: float) -> str:
+        lat_cell, lon_cell = self.cell(latitude, longitude)
+        return os.path.join(self.root, f"{lat_cell}_{lon_cell}.wxh")
+
+    def series(self, latitude: float, longitude: float):
+        """该坐标所在网格的序列，没有回填过时返回 None"""
+        path = self.path_for(latitude, longitude)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._series.get(path)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        # 旧映射不主动关闭：其他线程可能仍在读取，引用释放后自动回收
+        series = HistorySeries(path)
+        with self._lock:
+            self._series[path] = (version, series)
+        return series
+
+    def get_day(self, latitude: float, longitude: float, date_str: str):
+        """某坐标某日的历史数值，库中没有时返回 None"""
+        series = self.series(latitude, longitude)
+        values = series.day(date.fromisoformat(date_str)) if series is not None else None
+        with self._lock:
+            if values is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return values
+
+    def climatology(self, latitude: float, longitude: float, date_str: str, window: int = CLIMATE_WINDOW_DAYS):
+        """
+        目标日期之前各年同期（前后 window 天）的平均最高/最低气温、平均降水与降水日比例，
+        以及去年同日的数值。库中没有往年数据时返回 None。
+        """
+        series = self.series(latitude, longitude)
+        if series is None:
+            return None
+        target = date.fromisoformat(date_str)
+        first_year = (EPOCH + timedelta(days=series.first_day)).year
+        sums = {"temp_max": [], "temp_min": [], "precipitation": []}
+        years = 0
+        for year in range(first_year, target.year):
+            center = _same_day(target, year)
+            start = max(_day_number(center - timedelta(days=window)) - series.first_day, 0)
+            end = min(_day_number(center + timedelta(days=window)) - series.first_day + 1, series.n_days)
+            if start >= end:
+                continue
+            found = False
+            for field, values in sums.items():
+                column = [v for v in series.column(field, start, end - start) if not math.isnan(v)]
+                values.extend(column)
+                found = found or bool(column)
+            years += found
+        if not years:
+            return None
+
+        def mean(values):
+            return round(sum(values) / len(values), 1) if values else None
+
+        rain = sums["precipitation"]
+        return {
+            "years": years,
+            "temp_max": mean(sums["temp_max"]),
+            "temp_min": mean(sums["temp_min"]),
+            "precipitation": mean(rain),
+            "rain_days": round(sum(1 for v in rain if v >= 1.0) / len(rain), 2) if rain else None,
+            "last_year": series.day(_same_day(target, target.year - 1)),
+        }
+
+    # --- 城市索引 ---
+    @property
+    def cities_path(self) -> str:
+        return os.path.join(self.root, "cities.json")
+
+    def cities(self) -> dict:
+        try:
+            mtime = os.stat(self.cities_path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if self._cities[0] != mtime:
+            with open(self.cities_path, encoding="utf-8") as f:
+                self._cities = (mtime, json.load(f))
+        return self._cities[1]
+
+    def lookup_city(self, city: str):
+        """已回填城市的 {"name", "latitude", "longitude"}，未收录时返回 None"""
+        return self.cities().get(city.strip().lower())
+
+    def add_city(self, query: str, name: str, latitude: float, longitude: float):
+        cities = dict(self.cities())
+        cities[query.strip().lower()] = {"name": name, "latitude": latitude, "longitude": longitude}
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.cities_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cities, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cities_path)
+
+    # --- 回填 ---
+    def merge(self, latitude: float, longitude: float, days: dict) -> int:
+        """把新数据合并进该网格的序列（新值覆盖旧值），返回合并后的天数"""
+        path = self.path_for(latitude, longitude)
+        existing = self.series(latitude, longitude)
+        merged = existing.read_all() if existing is not None else {}
+        for day_str, values in days.items():
+            merged.setdefault(day_str, {}).update({k: v for k, v in values.items() if v is not None})
+        if not merged:
+            return 0
+        write_series(path, latitude, longitude, merged)
+        return len(merged)
+
+    def summary(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "locations": len(self._series),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+HISTORY_STORE = WeatherHistoryStore(WEATHER_HISTORY_DIR) if WEATHER_HISTORY_DIR else None
+
+
+# --- Open-Meteo archive 数据 ---
+def parse_archive(data: dict) -> dict:
+    """Open-Meteo archive 响应中的 daily 数据 -> {日期字符串: {字段: 值}}"""
+    daily = data["daily"]
+    columns = {field: daily.get(source, []) for field, source in ARCHIVE_FIELDS.items()}
+    return {
+        day_str: {field: (values[i] if i < len(values) else None) for field, values in columns.items()}
+        for i, day_str in enumerate(daily["time"])
+    }
+
+
+def geocode(city: str) -> dict:
+    resp = requests.get(GEOCODING_URL, params={"name": city, "count": 1, "language": "zh", "format": "json"},
+                        timeout=10)
+    results = resp.json().get("results") or []
+    if not results:
+        raise ValueError(f"City not found: {city}")
+    return results[0]
+
+
+def backfill_city(store: WeatherHistoryStore, city: str, start: str, end: str) -> int:
+    """从 archive 接口拉取一个城市 start~end 的逐日数据并写入历史库，返回该地点的总天数"""
+    info = geocode(city)
+    latitude, longitude = info["latitude"], info["longitude"]
+    resp = requests.get(
+        ARCHIVE_URL,
+        params={
+            "latitude": latitude,
+            "longitude": longitude,
+            "daily": ",".join(ARCHIVE_FIELDS.values()),
+            "timezone": "auto",
+            "start_date": start,
+            "end_date": end,
+        },
+        timeout=120,
+    )
+    resp.raise_for_status()
+    # 以地理编码坐标（而非 archive 吸附后的格点）定位，查询时与 weather.py 的地理编码结果落在同一网格
+    total = store.merge(latitude, longitude, parse_archive(resp.json()))
+    store.add_city(city, info.get("name", city), latitude, longitude)
+    return total
+
+
+def import_dump(store: WeatherHistoryStore, path: str, cities: list) -> list:
+    """
+    导入 archive 接口的 JSON 导出（单个地点为一个对象，多个地点为数组）。
+    cities 按顺序对应各地点，给出时一并写入城市索引。返回 [(地点说明, 天数)]。
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    locations = data if isinstance(data, list) else [data]
+    imported = []
+    for i, location in enumerate(locations):
+        latitude, longitude = location["latitude"], location["longitude"]
+        total = store.merge(latitude, longitude, parse_archive(location))
+        label = f"({latitude}, {longitude})"
+        if i < len(cities):
+            store.add_city(cities[i], cities[i], latitude, longitude)
+            label = f"{cities[i]} {label}"
+        imported.append((label, total))
+    return imported
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="本地历史天气库")
+    parser.add_argument("--dir", default=WEATHER_HISTORY_DIR, help="历史库目录")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill", help="从 Open-Meteo archive 接口回填")
+    backfill.add_argument("--cities", required=True, help="逗号分隔的城市名")
+    backfill.add_argument("--start", required=True, help="起始日期 YYYY-MM-DD")
+    backfill.add_argument("--end", default=(datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d"),
+                          help="结束日期 YYYY-MM-DD（默认前天，archive 数据有约两天延迟）")
+
+    dump = commands.add_parser("import", help="导入 archive 接口的 JSON 导出文件")
+    dump.add_argument("file")
+    dump.add_argument("--cities", default="", help="逗号分隔的城市名，按顺序对应文件中的各地点")
+
+    show = commands.add_parser("show", help="查询某城市某日的历史数值与往年同期")
+    show.add_argument("city")
+    show.add_argument("date")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    store = WeatherHistoryStore(args.dir)
+
+    if args.command == "backfill":
+        for city in filter(None, (c.strip() for c in args.cities.split(","))):
+            try:
+                total = backfill_city(store, city, args.start, args.end)
+                print(f"✅ {city}: {total} days stored")
+            except Exception as e:
+                print(f"❌ {city}: {e}")
+    elif args.command == "import":
+        cities = [c.strip() for c in args.cities.split(",") if c.strip()]
+        for label, total in import_dump(store, args.file, cities):
+            print(f"✅ {label}: {total} days stored")
+    elif args.command == "show":
+        info = store.lookup_city(args.city)
+        if info is None:
+            sys.exit(f"{args.city} 尚未回填")
+        print(json.dumps({
+            "city": info["name"],
+            "date": args.date,
+            "day": store.get_day(info["latitude"], info["longitude"], args.date),
+            "climate": store.climatology(info["latitude"], info["longitude"], args.date),
+        }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()